@@ -1,16 +1,28 @@
 import os
 import re
+import json
 import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 mainDir = os.getcwd()
 workDir = os.path.join(mainDir, "app", "build", "outputs", "apk")
 
 extension = ".apk"
+manifestName = "apk_manifest.json"
 
-def setEnvValue(key, value):
-    print(f"Setting env varaible: {key}={value}")
+# Bytes read per step when copying or hashing an APK
+chunkSize = 1024 * 1024
+
+# Linux ioctl that shares the extents of one file with another (btrfs, xfs)
+FICLONE = 0x40049409
+
+def setEnvValues(values):
+    # One append for every entry, instead of reopening GITHUB_ENV per variable
+    for key, value in values.items():
+        print(f"Setting env varaible: {key}={value}")
     with open(os.environ['GITHUB_ENV'], 'a') as f:
-        f.write(f"{key}={value}\n")
+        f.write("".join(f"{key}={value}\n" for key, value in values.items()))
 
 def getAPKs():
     list_apks = []
@@ -20,9 +32,59 @@ def getAPKs():
                 list_apks.append([root, file])
     return list_apks
 
-def processAPK(path, fileName):
-    fileNamePath = os.path.join(path, fileName)
-    
+def hashFile(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunkSize):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def copyWithChecksum(source, target):
+    """Put source at target and return (method, sha256), reading the APK only once.
+
+    A hardlink or reflink shares the data instead of copying it, so only the hash
+    reads the file. Otherwise the checksum is computed from the copied chunks.
+    The result is built next to target and renamed over it, so whatever is already
+    at target (e.g. a hardlink to last build's APK) is replaced, never written into.
+    """
+    partial = f"{target}.part"
+    if os.path.exists(partial):
+        os.remove(partial) # Left behind by an interrupted run
+    try:
+        try:
+            os.link(source, partial)
+            method, sha256 = "hardlink", hashFile(partial)
+        except OSError:
+            method, sha256 = copyChunks(source, partial)
+        os.replace(partial, target)
+        if os.path.exists(partial):
+            # rename() does nothing when both names are already links to one file (a rerun)
+            os.remove(partial)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return method, sha256
+
+def copyChunks(source, target):
+    digest = hashlib.sha256()
+    # 'xb' creates target or fails, it never truncates an existing file
+    with open(source, 'rb') as src, open(target, 'xb') as dst:
+        try:
+            import fcntl
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            method = "reflink"
+        except (ImportError, OSError):
+            # Not Linux, other filesystem, or no reflink support
+            method = "copy"
+        while chunk := src.read(chunkSize):
+            digest.update(chunk)
+            if method == "copy":
+                dst.write(chunk)
+    shutil.copystat(source, target)
+    return method, digest.hexdigest()
+
+def releaseName(path, fileName):
     # Try to match flavor from path if filename match fails
     # Paths are usually: app/build/outputs/apk/<flavor>/<buildType>
     path_parts = path.replace("\\\\", "/").split("/")
@@ -31,7 +93,7 @@ def processAPK(path, fileName):
         flavour = "full"
     elif "foss" in path_parts:
         flavour = "foss"
-    
+
     # Try to extract version from filename
     # NovelDokusha_v2.4.59-full-release.apk
     version_match = re.search(r"v(\d+\.\d+\.\d+)", fileName)
@@ -41,20 +103,52 @@ def processAPK(path, fileName):
         # Fallback to env or default
         version = os.environ.get("GITHUB_REF_NAME", "0.0.0").replace("v", "")
 
-    newFileName = f"NovelDokusha_v{version}_{flavour}.apk"
+    return f"NovelDokusha_v{version}_{flavour}.apk", version, flavour
+
+def processAPK(path, fileName):
+    fileNamePath = os.path.join(path, fileName)
+    newFileName, version, flavour = releaseName(path, fileName)
     newFileNamePath = os.path.join(mainDir, newFileName)
 
-    shutil.copy2(fileNamePath, newFileNamePath)
+    method, sha256 = copyWithChecksum(fileNamePath, newFileNamePath)
+    size = os.path.getsize(newFileNamePath)
 
-    print(f"Processed: {fileName} -> {newFileName} (version={version}, flavor={flavour})")
+    print(f"Processed: {fileName} -> {newFileName} (version={version}, flavor={flavour}, {method}, {size} bytes, sha256={sha256})")
 
-    setEnvValue("APP_VERSION", version)
-    setEnvValue(f"APK_FILE_PATH_{flavour}", newFileName)
+    return {
+        "file": newFileName,
+        "source": os.path.relpath(fileNamePath, mainDir),
+        "flavor": flavour,
+        "version": version,
+        "size": size,
+        "sha256": sha256,
+        "method": method,
+    }
 
 apks = getAPKs()
 if not apks:
     print("No APKs found!")
     exit(1)
 
-for [path, fileName] in apks:
-    processAPK(path, fileName)
\ No newline at end of file
+# Two APKs with one release name (e.g. -PsplitByAbi, or several "unknown" flavors) would overwrite each other
+targets = {}
+for path, fileName in apks:
+    targets.setdefault(releaseName(path, fileName)[0], []).append(os.path.join(path, fileName))
+duplicates = {name: sources for name, sources in targets.items() if len(sources) > 1}
+if duplicates:
+    for name, sources in duplicates.items():
+        print(f"Several APKs map to {name}: {', '.join(os.path.relpath(s, mainDir) for s in sources)}")
+    exit(1)
+
+# Flavors are independent files, hashing and copying them overlaps on I/O
+with ThreadPoolExecutor(max_workers=len(apks)) as pool:
+    artifacts = list(pool.map(lambda apk: processAPK(*apk), apks))
+
+with open(os.path.join(mainDir, manifestName), 'w') as f:
+    json.dump({"artifacts": artifacts}, f, indent=2)
+print(f"Wrote {manifestName} ({len(artifacts)} artifacts)")
+
+env = {"APP_VERSION": artifacts[-1]["version"], "APK_MANIFEST_PATH": manifestName}
+for artifact in artifacts:
+    env[f"APK_FILE_PATH_{artifact['flavor']}"] = artifact["file"]
+setEnvValues(env)
@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SKILLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SKILLS_DIR, "tts-auditor", "scripts"))
+
+# Usage: python bench_cli.py [--runs 5] [--no-narrate]
+# Times interpreter start plus imports (--help of each command) and whole
+# commands (probe of a local page, narrate against the mock Edge server) three
+# ways: the script itself, cli.py --local, and cli.py talking to a warm worker
+# started on a private socket for the run. Every figure is the median of --runs
+# fresh processes, as the agent would start them.
+
+PAGE = b"<html><head><title>Book</title></head><body><h1>Book</h1>" + \
+    b"".join(b"<li><a href='/c/%d'>Chapter %d</a></li>" % (i, i) for i in range(500)) + b"</body></html>"
+
+def start_page():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_mock_tts():
+    import mock_tts_servers
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    box = {}
+
+    def run():
+        asyncio.set_event_loop(loop)
+        box["runner"], box["port"] = loop.run_until_complete(
+            mock_tts_servers.start(mock_tts_servers.MockTTS(edge_latency=0.05, edge_speed=200.0)))
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return mock_tts_servers.edge_url(box["port"])
+
+def timed(argv, env):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *argv], env=env, cwd=SKILLS_DIR, capture_output=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} failed: {result.stderr.decode(errors='replace')[-500:]}")
+    return elapsed * 1000
+
+def median_ms(argv, env, runs):
+    return round(statistics.median(timed(argv, env) for _ in range(runs)), 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare script, cli.py and worker start-up and command latency.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-narrate", action="store_true", help="skip the Edge TTS command")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    env = {**os.environ, "NOVELDOKUSHA_WORKER_SOCKET": os.path.join(tmp, "worker.sock")}
+    page = start_page()
+    page_url = f"http://127.0.0.1:{page.server_address[1]}/book"
+    # No rate limit, health rows or stored clearance: only start-up and the command itself are measured
+    probe_args = [page_url, '{"title": "h1", "chapters": "li a"}', "--rate", "0", "--no-clearance"]
+
+    workloads = {
+        "python -c pass": {"script": ["-c", "pass"]},
+        "probe --help": {"script": ["scraper-scientist/scripts/probe_site_v2.py", "--help"], "cli": ["probe", "--help"]},
+        "narrate --help": {"script": ["tts-auditor/scripts/edge_narrator.py", "--help"], "cli": ["narrate", "--help"]},
+        "probe": {"script": ["scraper-scientist/scripts/probe_site_v2.py", *probe_args], "cli": ["probe", *probe_args]},
+    }
+    if not args.no_narrate:
+        out = os.path.join(tmp, "chapter.mp3")
+        narrate_args = ["A short passage. " * 20, "en-US-AvaNeural", out, "--no-cache", "--endpoint", start_mock_tts()]
+        workloads["narrate"] = {"script": ["tts-auditor/scripts/edge_narrator.py", *narrate_args], "cli": ["narrate", *narrate_args]}
+
+    # Without a worker on the socket, cli.py runs the command itself
+    results = {}
+    for name, workload in workloads.items():
+        results[name] = {"script_ms": median_ms(workload["script"], env, args.runs)}
+        if "cli" in workload:
+            results[name]["cli_local_ms"] = median_ms(["cli.py", "--local", *workload["cli"]], env, args.runs)
+
+    start = time.perf_counter()
+    worker = subprocess.Popen([sys.executable, "cli.py", "worker"], env=env, cwd=SKILLS_DIR,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    worker.stdout.readline() # "ready" once everything is imported
+    worker_start_ms = round((time.perf_counter() - start) * 1000, 1)
+    try:
+        for name, workload in workloads.items():
+            if "cli" in workload:
+                timed(["cli.py", *workload["cli"]], env) # first call on a warm worker still opens connections
+                results[name]["cli_worker_ms"] = median_ms(["cli.py", *workload["cli"]], env, args.runs)
+                results[name]["speedup"] = round(results[name]["script_ms"] / results[name]["cli_worker_ms"], 1)
+    finally:
+        subprocess.run([sys.executable, "cli.py", "worker", "stop"], env=env, cwd=SKILLS_DIR, capture_output=True)
+        worker.wait(timeout=30)
+        page.shutdown()
+
+    print(json.dumps({"runs": args.runs, "worker_start_ms": worker_start_ms, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
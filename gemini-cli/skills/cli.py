@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import socket
+
+# Usage: python cli.py <command> [args ...]       (python cli.py for the list of commands)
+#        python cli.py worker [start|stop|status] [--preload probe,narrate]
+#        python cli.py --local <command> [args ...]
+# One entry point for the skill scripts. Nothing beyond the standard library is
+# imported until a command is chosen, and then only what that script imports.
+# While a worker is running (cli.py worker &), commands are sent to it over a
+# local socket instead: it has the scripts' dependencies imported and keeps
+# parsers, HTTP sessions, the cloudscraper profile and TTS modules warm between
+# commands, so a call costs a socket round trip rather than an interpreter start.
+# Each command still runs exactly as its script would; arguments, output and exit
+# code are passed through. --local skips the worker.
+
+SKILLS_DIR = os.path.dirname(os.path.abspath(__file__))
+SOCKET_PATH = os.environ.get("NOVELDOKUSHA_WORKER_SOCKET",
+                             os.path.join(os.path.expanduser("~"), ".cache", "noveldokusha-scraper", "worker.sock"))
+
+# command: (script, modules a worker imports ahead of time, description)
+COMMANDS = {
+    "probe": ("scraper-scientist/scripts/probe_site_v2.py", ("cloudscraper", "lxml.html", "lxml.cssselect", "bs4"),
+              "check selectors on one page, or a JSONL batch of pages"),
+    "audit": ("scraper-scientist/scripts/audit_sources.py", ("lxml.html", "lxml.cssselect", "bs4"),
+              "title/cover/chapter selectors of the known sources"),
+    "deep-audit": ("scraper-scientist/scripts/deep_audit.py", ("cloudscraper",),
+                   "DNS, plain HTTP and Cloudflare reachability of every source"),
+    "revive-audit": ("noveldokusha-reviver/tools/deep_audit.py", ("lxml.html", "lxml.cssselect", "bs4"),
+                     "selectors of the revived sources"),
+    "health": ("scraper-scientist/scripts/health_store.py", (), "report/export/prune the source health history"),
+    "narrate": ("tts-auditor/scripts/edge_narrator.py", (), "narrate text to MP3 with Edge TTS"),
+    "tts-test": ("tts-auditor/scripts/test_tts.py", (), "check that Gemini TTS returns audio"),
+}
+
+def usage(out=sys.stdout):
+    print("usage: cli.py [--local] <command> [args ...] | cli.py worker [start|stop|status]\n\ncommands:", file=out)
+    for name, (script, _, description) in COMMANDS.items():
+        print(f"  {name:<14}{description} ({script})", file=out)
+    print(f"  {'worker':<14}keep the scripts loaded and serve commands on {SOCKET_PATH}", file=out)
+
+def run_script(command, argv):
+    """Run a command's script as __main__ in this process and return its exit code."""
+    import runpy
+    path = os.path.join(SKILLS_DIR, COMMANDS[command][0])
+    if os.path.dirname(path) not in sys.path:
+        sys.path.insert(0, os.path.dirname(path))
+    saved_argv = sys.argv
+    sys.argv = [path, *argv]
+    try:
+        runpy.run_path(path, run_name="__main__")
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    finally:
+        sys.argv = saved_argv
+
+# Worker side
+
+def warm(commands):
+    # The scripts' own imports (run under another name, so their main blocks stay quiet) plus lazy ones
+    import runpy
+    import importlib
+    loaded = []
+    for command in commands:
+        script, modules, _ = COMMANDS[command]
+        path = os.path.join(SKILLS_DIR, script)
+        if os.path.dirname(path) not in sys.path:
+            sys.path.insert(0, os.path.dirname(path))
+        try:
+            runpy.run_path(path, run_name="__warm__")
+        except Exception as e:
+            print(f"⚠️ {command}: {e}", file=sys.stderr)
+            continue
+        for module in modules:
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                pass
+        loaded.append(command)
+    return loaded
+
+def execute(request):
+    import io
+    import time
+    import base64
+    import traceback
+    start = time.perf_counter()
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding='utf-8', write_through=True)
+    stderr = io.StringIO()
+    saved = sys.stdin, sys.stdout, sys.stderr, os.getcwd()
+    sys.stdin = io.StringIO(request.get("stdin") or "")
+    sys.stdout, sys.stderr = stdout, stderr
+    try:
+        os.chdir(request.get("cwd") or saved[3])
+        code = run_script(request["argv"][0], request["argv"][1:])
+    except Exception:
+        traceback.print_exc()
+        code = 1
+    finally:
+        # The end of the script's run: health rows, traces, fixtures and the cache index are written
+        # here rather than at exit. Commands that never loaded http_client have nothing to finish.
+        try:
+            if "http_client" in sys.modules:
+                sys.modules["http_client"].teardown()
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = saved[:3]
+            os.chdir(saved[3])
+    stdout.flush()
+    return {
+        "exit": code,
+        "stdout": base64.b64encode(stdout.buffer.getvalue()).decode('ascii'),
+        "stderr": stderr.getvalue(),
+        "worker_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+def read_message(conn):
+    data = bytearray()
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        data.extend(chunk)
+    return json.loads(data) if data else None
+
+def send_message(conn, message):
+    conn.sendall(json.dumps(message).encode('utf-8') + b"\n")
+
+def serve(socket_path=SOCKET_PATH, preload=None):
+    import time
+    if status(socket_path):
+        print(f"⚠️ A worker is already serving {socket_path}", file=sys.stderr)
+        return 1
+    if os.path.exists(socket_path):
+        os.unlink(socket_path) # left behind by a worker that did not shut down
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+
+    started = time.time()
+    loaded = warm(preload or list(COMMANDS))
+    served = 0
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    server.listen(16)
+    print(f"🔥 Worker {os.getpid()} ready on {socket_path} ({', '.join(loaded)} warm, "
+          f"{time.time() - started:.1f}s to load)", flush=True)
+    try:
+        while True:
+            # One command at a time: commands share this process' stdout, cwd and module state
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    request = read_message(conn)
+                except ValueError:
+                    continue
+                if not request:
+                    continue
+                if request.get("cmd") == "stop":
+                    send_message(conn, {"stopped": os.getpid()})
+                    break
+                if request.get("cmd") == "status":
+                    send_message(conn, {"pid": os.getpid(), "uptime_s": round(time.time() - started), "served": served, "warm": loaded})
+                    continue
+                if request.get("argv", [None])[0] not in COMMANDS:
+                    send_message(conn, {"exit": 2, "stdout": "", "stderr": f"unknown command: {request.get('argv')}\n"})
+                    continue
+                reply = execute(request)
+                served += 1
+                try:
+                    send_message(conn, reply)
+                except OSError:
+                    pass # the client gave up waiting
+    finally:
+        server.close()
+        os.unlink(socket_path)
+    return 0
+
+# Client side
+
+def connect(socket_path=SOCKET_PATH, timeout=None):
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(timeout)
+    try:
+        conn.connect(socket_path)
+        return conn
+    except OSError:
+        conn.close()
+        return None
+
+def status(socket_path=SOCKET_PATH):
+    conn = connect(socket_path, timeout=5)
+    if not conn:
+        return None
+    with conn:
+        send_message(conn, {"cmd": "status"})
+        return read_message(conn)
+
+def stop(socket_path=SOCKET_PATH):
+    conn = connect(socket_path, timeout=5)
+    if not conn:
+        return None
+    with conn:
+        send_message(conn, {"cmd": "stop"})
+        return read_message(conn)
+
+def forward(conn, argv):
+    """Run argv on the worker behind conn, copying its output here; returns the exit code."""
+    import base64
+    # Scripts read "-" as stdin; the worker has none of its own
+    stdin = sys.stdin.read() if "-" in argv[1:] and not sys.stdin.isatty() else None
+    with conn:
+        send_message(conn, {"argv": argv, "cwd": os.getcwd(), "stdin": stdin})
+        reply = read_message(conn)
+    if reply is None:
+        print("❌ The worker closed the connection without replying", file=sys.stderr)
+        return 1
+    sys.stderr.write(reply["stderr"])
+    sys.stderr.flush()
+    sys.stdout.flush()
+    sys.stdout.buffer.write(base64.b64decode(reply["stdout"]))
+    sys.stdout.flush()
+    return reply["exit"]
+
+def worker_main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="cli.py worker", description="Serve skill commands from one warm process.")
+    parser.add_argument("action", nargs="?", choices=["start", "stop", "status"], default="start")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--preload", type=lambda s: [c for c in s.split(",") if c], default=None,
+                        help=f"commands to load up front (default: all of {','.join(COMMANDS)})")
+    args = parser.parse_args(argv)
+    for command in args.preload or ():
+        if command not in COMMANDS:
+            parser.error(f"unknown command to preload: {command}")
+    if args.action == "start":
+        return serve(args.socket, args.preload)
+    reply = (stop if args.action == "stop" else status)(args.socket)
+    if reply is None:
+        print(f"No worker running on {args.socket}")
+        return 1
+    print(json.dumps(reply, indent=2))
+    return 0
+
+def main(argv):
+    local = bool(argv) and argv[0] == "--local"
+    if local:
+        argv = argv[1:]
+    if not argv or argv[0] in ("-h", "--help"):
+        usage()
+        return 0
+    if argv[0] == "worker":
+        return worker_main(argv[1:])
+    if argv[0] not in COMMANDS:
+        usage(sys.stderr)
+        return 2
+    conn = None if local else connect()
+    if conn:
+        return forward(conn, argv)
+    return run_script(argv[0], argv[1:])
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
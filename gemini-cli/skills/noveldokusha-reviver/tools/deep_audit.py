@@ -1,12 +1,17 @@
-import requests
-from bs4 import BeautifulSoup
+import os
 import sys
+import time
+import argparse
 
-# Modern User-Agent (Same as App)
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-    "Referer": "https://google.com"
-}
+# Shared pooled HTTP client and parsing backends live with the scraper-scientist scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "scraper-scientist", "scripts"))
+import http_client
+import parsing
+import streaming
+import health_store
+import tracing
+
+REFERER = "https://google.com"
 
 SOURCES = [
     {
@@ -84,38 +89,91 @@ SOURCES = [
     }
 ]
 
-def test_source(source):
+def count_streaming(response, selectors, min_chapters):
+    # Stops reading once the title closed and either chapter selector reached min_chapters
+    def done(m):
+        return m.text('title') is not None and max(m.counts['chapters'], m.counts.get('chapters_fallback', 0)) >= min_chapters
+
+    matcher, bytes_read, stopped_early = streaming.stream_match(response, selectors, capture={'title'}, done=done if min_chapters else None)
+    chapters = matcher.counts['chapters'] or matcher.counts.get('chapters_fallback', 0)
+    return matcher.counts['title'] > 0, chapters, stopped_early, bytes_read
+
+def count_dom(response, selectors, backend):
+    doc = parsing.parse(response.content, backend)
+    if not doc.select_one(selectors['title']):
+        return False, 0, False, len(response.content)
+
+    chapters = doc.select(selectors['chapters'])
+    if not chapters and 'chapters_fallback' in selectors:
+         chapters = doc.select(selectors['chapters_fallback'])
+    return True, len(chapters), False, len(response.content)
+
+def test_source(source, backend=None, stream=False, min_chapters=0):
     print(f"Testing {source['name']}...", end=" ")
+    start = time.perf_counter()
+    sample = {"url": source['url']}
+    status = None
+    try:
+        with tracing.span("source", source=source['name'], url=source['url']) as span:
+            status = check_source(source, backend, stream, min_chapters, sample)
+            span.set(status=status)
+        print(status)
+    finally:
+        # Chapter counts and error messages change run to run, the kind of result does not
+        kind = status if status and status.startswith("FAILED") else status and status.split(" (")[0].split(":")[0]
+        health_store.record(source['name'], kind == "PASSED", status=kind, total_ms=health_store.elapsed_ms(start), **sample)
+
+def check_source(source, backend, stream, min_chapters, sample):
     try:
-        response = requests.get(source['url'], headers=HEADERS, timeout=15)
+        response = http_client.get(source['url'], referer=REFERER, stream=stream)
+        sample["http_status"] = response.status_code
+        sample["ttfb_ms"] = round(response.elapsed.total_seconds() * 1000, 1)
         if response.status_code != 200:
-            print(f"FAILED (Status {response.status_code})")
-            return
+            response.close()
+            return f"FAILED (Status {response.status_code})"
+
+        counts = None
+        parse_start = time.perf_counter()
+        if stream:
+            try:
+                counts = count_streaming(response, source['selectors'], min_chapters)
+            except streaming.UnsupportedSelector:
+                pass # Needs the full DOM, nothing has been read yet
+        title_found, chapters, stopped_early, sample["bytes"] = counts or count_dom(response, source['selectors'], backend)
+        sample["parse_ms"] = health_store.elapsed_ms(parse_start)
+        sample["chapters"] = chapters
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
         # Check Title
-        title = soup.select_one(source['selectors']['title'])
-        if not title:
-            print("FAILED (Title not found)")
-            return
-            
-        # Check Chapters
-        chapters = soup.select(source['selectors']['chapters'])
-        if not chapters and 'chapters_fallback' in source['selectors']:
-             chapters = soup.select(source['selectors']['chapters_fallback'])
+        if not title_found:
+            return "FAILED (Title not found)"
 
-        if len(chapters) > 0:
-            print(f"PASSED (Found {len(chapters)} chapters)")
+        # Check Chapters
+        if chapters > 0:
+            return f"PASSED (Found {chapters}{'+' if stopped_early else ''} chapters)"
         else:
-            print("FAILED (No chapters found)")
             # Debug: print first 500 chars of body to see if blocked
             # print(response.text[:500])
+            return "FAILED (No chapters found)"
 
     except Exception as e:
-        print(f"ERROR: {e}")
+        return f"ERROR: {e}"
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check title and chapter-list selectors of the revived sources.")
+    parsing.add_arguments(parser)
+    streaming.add_arguments(parser)
+    http_client.add_arguments(parser)
+    health_store.add_arguments(parser)
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+    http_client.configure(args)
+    health_store.configure(args, "reviver/deep_audit.py")
+    tracing.configure(args, "reviver/deep_audit.py")
+
+    backend = args.parser or parsing.default_backend()
+    for source in SOURCES:
+        parsing.compile_selectors(source['selectors'], backend)
+
     print("Starting Deep Audit...")
     for source in SOURCES:
-        test_source(source)
+        test_source(source, backend, args.stream, args.min_chapters)
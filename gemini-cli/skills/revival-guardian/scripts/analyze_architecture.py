@@ -1,66 +1,323 @@
 import os
+import re
 import sys
+import time
+import argparse
+from collections import defaultdict
 
-def check_architecture(file_path):
+from scan_cache import ScanCache, cache_path, file_digest
+
+# Bump when parse_file changes so the cached index is rebuilt
+INDEX_VERSION = 1
+
+# Gradle modules from the lowest layer up. A module may depend on its own layer or
+# lower ones; features must not depend on each other. Patterns ending in ":*" match
+# any module below that prefix that is not listed explicitly.
+LAYERS = [
+    ("foundation", [":strings", ":tooling:algorithms", ":tooling:text_translator:domain"]),
+    ("core", [":core"]),
+    ("infrastructure", [":networking", ":tooling:local_database", ":tooling:epub_parser",
+                        ":tooling:text_translator:translator", ":tooling:text_translator:translator_nop",
+                        ":tooling:text_to_speech"]),
+    ("data", [":scraper", ":data", ":coreui", ":navigation"]),
+    ("tooling", [":tooling:*"]),
+    ("features", [":features:*"]),
+    ("app", [":app"]),
+]
+ISOLATED_LAYERS = {"features"}
+
+PACKAGE_RE = re.compile(r'^\s*package\s+([\w.]+)', re.M)
+IMPORT_RE = re.compile(r'^\s*import\s+([\w.*]+)(?:\s+as\s+\w+)?\s*;?\s*$', re.M)
+# Top-level declarations only (no indentation), enough to resolve imports to a module
+DECLARATION_RE = re.compile(
+    r'^(?:[a-z]+\s+)*(?:class|interface|object|typealias|fun|val|var)\s+(?:<[^>]*>\s*)?(?:[\w.]+\.)?(\w+)', re.M)
+
+def check_architecture(file_path, imports=None):
     issues = []
     is_domain = "/domain/" in file_path
     is_data = "/data/" in file_path
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line.startswith("import "):
-                continue
-                
-            imported = line.replace("import ", "").replace(";", "")
-            
-            # Domain Layer Rules
-            if is_domain:
-                if "android.view" in imported or "android.widget" in imported:
-                    issues.append(f"❌ Domain importing Android View: {imported}")
-                if "androidx.compose.ui" in imported:
-                    issues.append(f"❌ Domain importing Compose UI: {imported}")
-                if ".ui." in imported and not ".domain." in imported: # Heuristic
-                    issues.append(f"⚠️ Domain importing UI layer: {imported}")
-                    
-            # Data Layer Rules
-            if is_data:
-                if ".ui." in imported:
-                     issues.append(f"⚠️ Data importing UI layer: {imported}")
-
-    except Exception:
-        pass
-        
+
+    if imports is None:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                imports = IMPORT_RE.findall(f.read())
+        except Exception:
+            return issues
+
+    for imported in imports:
+        # Domain Layer Rules
+        if is_domain:
+            if "android.view" in imported or "android.widget" in imported:
+                issues.append(f"❌ Domain importing Android View: {imported}")
+            if "androidx.compose.ui" in imported:
+                issues.append(f"❌ Domain importing Compose UI: {imported}")
+            if ".ui." in imported and not ".domain." in imported: # Heuristic
+                issues.append(f"⚠️ Domain importing UI layer: {imported}")
+
+        # Data Layer Rules
+        if is_data:
+            if ".ui." in imported:
+                 issues.append(f"⚠️ Data importing UI layer: {imported}")
+
     return issues
 
+def parse_file(file_path, data):
+    text = data.decode('utf-8', errors='replace')
+    package = PACKAGE_RE.search(text)
+    imports = IMPORT_RE.findall(text)
+    return {
+        "package": package.group(1) if package else "",
+        "imports": imports,
+        "declarations": sorted(set(DECLARATION_RE.findall(text))),
+        "issues": check_architecture(file_path, imports),
+    }
+
+GENERATED_ROOTS = {"R", "BuildConfig", "databinding"}
+NAMESPACE_RE = re.compile(r'^\s*namespace\s*=\s*"([\w.]+)"', re.M)
+
+def find_modules(root_dir):
+    """Module directory -> Gradle path, and Android namespace -> Gradle path (for generated R/bindings)."""
+    modules, namespaces = {}, {}
+    for root, dirs, files in os.walk(root_dir):
+        dirs[:] = [d for d in dirs if d not in ("build", ".git", ".gradle", ".idea", "src")]
+        rel = os.path.relpath(root, root_dir)
+        build_file = next((f for f in ("build.gradle.kts", "build.gradle") if f in files), None)
+        if rel == "." or not build_file:
+            continue
+        module = ":" + rel.replace(os.sep, ":")
+        modules[os.path.realpath(root)] = module
+        with open(os.path.join(root, build_file), 'r', encoding='utf-8') as f:
+            namespace = NAMESPACE_RE.search(f.read())
+        if namespace:
+            namespaces[namespace.group(1)] = module
+    return modules, namespaces
+
+def module_of(file_path, modules):
+    directory = os.path.dirname(file_path)
+    while directory and directory != os.path.dirname(directory):
+        if directory in modules:
+            return modules[directory]
+        directory = os.path.dirname(directory)
+    return None
+
+def layer_of(module):
+    for rank, (name, patterns) in enumerate(LAYERS):
+        if module in patterns:
+            return rank, name
+    for rank, (name, patterns) in enumerate(LAYERS):
+        if any(p.endswith(":*") and module.startswith(p[:-1]) for p in patterns):
+            return rank, name
+    return None, None
+
+class ImportIndex:
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.cache = ScanCache(cache_path(root_dir, "architecture_index"), INDEX_VERSION)
+        self.files = {}
+        self.namespaces = {}
+        self.reread = 0
+
+    def update(self):
+        modules, self.namespaces = find_modules(self.root_dir)
+        seen = []
+        for root, dirs, files in os.walk(self.root_dir):
+            if "build" in root or "test" in root:
+                dirs[:] = []
+                continue
+            for file in files:
+                if not file.endswith(".kt"):
+                    continue
+                key = os.path.realpath(os.path.join(root, file))
+                seen.append(key)
+                stat = os.stat(key)
+                entry, known_digest = self.cache.lookup(key, stat)
+                if not entry:
+                    with open(key, 'rb') as f:
+                        data = f.read()
+                    digest = file_digest(data)
+                    cached = self.cache.files.get(key)
+                    result = cached["result"] if cached and digest == known_digest else parse_file(os.path.join(root, file), data)
+                    self.cache.store(key, stat, digest, result)
+                    self.reread += 1
+                    entry = self.cache.files[key]
+                self.files[os.path.join(root, file)] = dict(entry["result"], module=module_of(key, modules))
+        self.cache.prune(seen)
+        self.cache.save()
+
+    def build_graphs(self):
+        # Fully qualified top-level symbol -> module, package -> modules, then resolve every import
+        symbols = {}
+        package_modules = defaultdict(set)
+        for info in self.files.values():
+            package_modules[info["package"]].add(info["module"])
+            for name in info["declarations"]:
+                symbols[f"{info['package']}.{name}"] = info["module"]
+
+        self.module_edges = defaultdict(lambda: defaultdict(list))
+        self.package_edges = defaultdict(set)
+        self.package_external = defaultdict(set)
+        for file_path, info in self.files.items():
+            for imported in info["imports"]:
+                targets, package = self.resolve(imported, symbols, package_modules, self.namespaces)
+                if package is None:
+                    self.package_external[info["package"]].add(imported)
+                    continue
+                if package != info["package"]:
+                    self.package_edges[info["package"]].add(package)
+                # Files outside any Gradle module still count for packages, but have no module edges
+                if info["module"] is None:
+                    continue
+                for target in targets:
+                    if target and target != info["module"]:
+                        self.module_edges[info["module"]][target].append((file_path, imported))
+
+    @staticmethod
+    def resolve(imported, symbols, package_modules, namespaces):
+        """(candidate modules, package) for an import, or (set(), None) when it is external."""
+        parts = imported.split(".")
+        if parts[-1] == "*":
+            parts = parts[:-1]
+            if ".".join(parts) in package_modules:
+                return package_modules[".".join(parts)], ".".join(parts)
+        else:
+            # Longest declared symbol first so nested classes and members resolve to their owner
+            for i in range(len(parts), 1, -1):
+                name = ".".join(parts[:i])
+                if name in symbols:
+                    return {symbols[name]}, ".".join(parts[:i - 1])
+            if ".".join(parts[:-1]) in package_modules:
+                return package_modules[".".join(parts[:-1])], ".".join(parts[:-1])
+        # Generated code (R, BuildConfig, view bindings) lives under the module's Android namespace
+        for i in range(len(parts), 0, -1):
+            name = ".".join(parts[:i])
+            if name in namespaces and (i == len(parts) or parts[i] in GENERATED_ROOTS):
+                return {namespaces[name]}, name
+        return set(), None
+
+    def direct_violations(self):
+        issues = [(path, issue) for path, info in sorted(self.files.items()) for issue in info["issues"]]
+        for source, targets in sorted(self.module_edges.items()):
+            source_rank, source_layer = layer_of(source)
+            for target, uses in sorted(targets.items()):
+                target_rank, target_layer = layer_of(target)
+                if source_rank is None or target_rank is None:
+                    continue
+                if target_rank > source_rank:
+                    reason = f"❌ {source_layer} module {source} depends on {target_layer} module {target}"
+                elif source_layer in ISOLATED_LAYERS and target_layer == source_layer:
+                    reason = f"❌ Feature {source} depends on feature {target}"
+                else:
+                    continue
+                file_path, imported = uses[0]
+                issues.append((file_path, f"{reason} ({imported}, {len(uses)} imports)"))
+        return issues
+
+    def transitive_violations(self):
+        # Domain packages must not reach UI code through any chain of project imports
+        packages = set(self.package_edges) | set(self.package_external)
+        ui_packages = {p for p in packages if "ui" in p.split(".")}
+        ui_packages |= {p for p, ext in self.package_external.items()
+                        if any(e.startswith(("android.view", "android.widget", "androidx.compose.ui")) for e in ext)}
+        violations = []
+        for package in sorted(p for p in self.package_edges if ".domain" in f".{p}"):
+            parents = {package: None}
+            queue = [package]
+            while queue:
+                current = queue.pop(0)
+                for nxt in sorted(self.package_edges.get(current, ())):
+                    if nxt in parents:
+                        continue
+                    parents[nxt] = current
+                    queue.append(nxt)
+            for reached in sorted(ui_packages & set(parents)):
+                if reached == package or parents[reached] == package:
+                    continue # Direct imports are already reported per file
+                chain = [reached]
+                while parents[chain[-1]]:
+                    chain.append(parents[chain[-1]])
+                violations.append(" -> ".join(reversed(chain)))
+        return violations
+
+    def module_cycles(self):
+        # Tarjan's strongly connected components over the module dependency graph
+        index, low, stack, on_stack, cycles = {}, {}, [], set(), []
+        counter = [0]
+
+        def visit(node):
+            index[node] = low[node] = counter[0]
+            counter[0] += 1
+            stack.append(node)
+            on_stack.add(node)
+            for nxt in self.module_edges.get(node, ()):
+                if nxt not in index:
+                    visit(nxt)
+                    low[node] = min(low[node], low[nxt])
+                elif nxt in on_stack:
+                    low[node] = min(low[node], index[nxt])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1:
+                    cycles.append(sorted(component))
+
+        sys.setrecursionlimit(max(1000, len(self.module_edges) * 4))
+        for node in sorted(self.module_edges):
+            if node not in index:
+                visit(node)
+        return cycles
+
 def main():
-    root_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    parser = argparse.ArgumentParser(description="Check layering rules against a persistent Kotlin import index.")
+    parser.add_argument("root_dir", nargs="?", default=".")
+    parser.add_argument("--query", choices=["all", "direct", "transitive", "cycles", "deps"], default="all")
+    args = parser.parse_args()
+    root_dir = args.root_dir
     print(f"Checking architectural compliance in {root_dir}...")
-    
+
+    start = time.perf_counter()
+    index = ImportIndex(root_dir)
+    index.update()
+    indexed = time.perf_counter()
+    index.build_graphs()
+    built = time.perf_counter()
+
     violation_count = 0
-    
-    for root, dirs, files in os.walk(root_dir):
-        if "build" in root or "test" in root:
-            continue
-            
-        for file in files:
-            if file.endswith(".kt"):
-                file_path = os.path.join(root, file)
-                issues = check_architecture(file_path)
-                
-                if issues:
-                    print(f"\n🏛️ {file_path}")
-                    for issue in issues:
-                        print(f"  {issue}")
-                        violation_count += 1
-                        
-    if violation_count == 0:
-        print("✅ Architecture looks clean.")
-    else:
-        print(f"\n🚨 Found {violation_count} architectural violations.")
+    if args.query in ("all", "direct"):
+        by_file = defaultdict(list)
+        for file_path, issue in index.direct_violations():
+            by_file[file_path].append(issue)
+        for file_path, issues in by_file.items():
+            print(f"\n🏛️ {file_path}")
+            for issue in issues:
+                print(f"  {issue}")
+                violation_count += 1
+
+    if args.query in ("all", "transitive"):
+        for chain in index.transitive_violations():
+            print(f"\n🔗 Domain reaches UI transitively: {chain}")
+            violation_count += 1
+
+    if args.query in ("all", "cycles"):
+        for cycle in index.module_cycles():
+            print(f"\n🔁 Module cycle: {' <-> '.join(cycle)}")
+            violation_count += 1
+
+    if args.query == "deps":
+        for source, targets in sorted(index.module_edges.items()):
+            print(f"{source} -> {', '.join(sorted(targets))}")
+
+    if args.query != "deps":
+        if violation_count == 0:
+            print("✅ Architecture looks clean.")
+        else:
+            print(f"\n🚨 Found {violation_count} architectural violations.")
+    print(f"⏱️  index {len(index.files)} files ({index.reread} re-read) in {indexed - start:.2f}s, "
+          f"graph in {built - indexed:.2f}s, queries in {time.perf_counter() - built:.2f}s")
 
 if __name__ == "__main__":
     main()
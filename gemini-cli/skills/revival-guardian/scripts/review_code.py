@@ -1,70 +1,148 @@
+import io
 import os
-import sys
 import re
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
-def analyze_file(file_path):
+from scan_cache import ScanCache, cache_path, changed_since, file_digest
+
+# Bump when analyze_lines changes so cached results are not reused
+CACHE_VERSION = 1
+
+# Below this many files to analyze, process start-up costs more than it saves
+PARALLEL_THRESHOLD = 64
+
+def analyze_lines(lines):
     issues = []
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-        line_count = len(lines)
-        if line_count > 500:
-            issues.append(f"📦 Class too large ({line_count} lines) - Consider refactoring")
-
-        func_pattern = re.compile(r'^\s*fun\s+')
-        current_func_start = -1
-        current_func_lines = 0
-        
-        for i, line in enumerate(lines):
-            # Check indentation (Nesting)
-            indent = len(line) - len(line.lstrip())
-            if indent > 16: # Assuming 4 spaces per indent -> 4 levels = 16 spaces
-                issues.append(f"↳ Deep nesting at line {i+1} ({indent} spaces)")
-
-            # Simple function length check (heuristic)
-            if func_pattern.match(line):
-                if current_func_start != -1:
-                    if current_func_lines > 50:
-                        issues.append(f"📏 Function starting at {current_func_start} is too long ({current_func_lines} lines)")
-                current_func_start = i + 1
-                current_func_lines = 0
-            elif current_func_start != -1:
-                if line.strip() == "} ": # Very naive end check, but works for top level
-                    current_func_lines += 1
-                else:
-                    current_func_lines += 1
-
-    except Exception as e:
-        pass # Skip unreadable files
-        
+    line_count = len(lines)
+    if line_count > 500:
+        issues.append(f"📦 Class too large ({line_count} lines) - Consider refactoring")
+
+    func_pattern = re.compile(r'^\s*fun\s+')
+    current_func_start = -1
+    current_func_lines = 0
+
+    for i, line in enumerate(lines):
+        # Check indentation (Nesting)
+        indent = len(line) - len(line.lstrip())
+        if indent > 16: # Assuming 4 spaces per indent -> 4 levels = 16 spaces
+            issues.append(f"↳ Deep nesting at line {i+1} ({indent} spaces)")
+
+        # Simple function length check (heuristic)
+        if func_pattern.match(line):
+            if current_func_start != -1:
+                if current_func_lines > 50:
+                    issues.append(f"📏 Function starting at {current_func_start} is too long ({current_func_lines} lines)")
+            current_func_start = i + 1
+            current_func_lines = 0
+        elif current_func_start != -1:
+            if line.strip() == "} ": # Very naive end check, but works for top level
+                current_func_lines += 1
+            else:
+                current_func_lines += 1
+
     return issues
 
-def main():
-    root_dir = sys.argv[1] if len(sys.argv) > 1 else "."
-    print(f"Scanning {root_dir} for code quality issues...")
-    
-    issue_count = 0
-    
+def read_lines(data):
+    # Same line splitting as open(..., encoding='utf-8').readlines()
+    return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8').readlines()
+
+def scan_file(job):
+    # Runs in worker processes; returns issues=None when the content hash proves the cached result still holds
+    file_path, known_digest = job
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return file_path, None, []
+    digest = file_digest(data)
+    if digest == known_digest:
+        return file_path, digest, None
+    try:
+        return file_path, digest, analyze_lines(read_lines(data))
+    except Exception:
+        return file_path, digest, []
+
+def collect_files(root_dir):
+    found = []
     for root, dirs, files in os.walk(root_dir):
         if "build" in root or ".git" in root or ".idea" in root:
+            dirs[:] = [] # Nothing below a skipped directory is scanned either
             continue
-            
+
         for file in files:
             if file.endswith(".kt") or file.endswith(".java"):
-                file_path = os.path.join(root, file)
-                file_issues = analyze_file(file_path)
-                
-                if file_issues:
-                    print(f"\n📄 {file_path}")
-                    for issue in file_issues:
-                        print(f"  - {issue}")
-                        issue_count += 1
+                found.append(os.path.join(root, file))
+    return found
+
+def scan(files, cache, jobs):
+    results = {}
+    pending = []
+    stats = {}
+    for file_path in files:
+        key = os.path.realpath(file_path)
+        try:
+            stats[key] = os.stat(key)
+        except OSError:
+            continue
+        entry, known_digest = cache.lookup(key, stats[key]) if cache else (None, None)
+        if entry:
+            results[key] = entry["result"]
+        else:
+            pending.append((key, known_digest))
+
+    if len(pending) >= PARALLEL_THRESHOLD and jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            scanned = list(pool.map(scan_file, pending, chunksize=max(1, len(pending) // (jobs * 4))))
+    else:
+        scanned = [scan_file(job) for job in pending]
+
+    for key, digest, issues in scanned:
+        if issues is None:
+            issues = cache.files[key]["result"]
+        results[key] = issues
+        if cache and digest:
+            cache.store(key, stats[key], digest, issues)
+    return results, len(pending)
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag oversized classes/functions and deep nesting in Kotlin/Java sources.")
+    parser.add_argument("root_dir", nargs="?", default=".")
+    parser.add_argument("--changed-since", metavar="REV", help="only review files changed since this git revision (plus untracked files)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes for files that need analysis")
+    parser.add_argument("--no-cache", action="store_true", help="analyze every file again and leave the cache untouched")
+    args = parser.parse_args()
+    root_dir = args.root_dir
+    print(f"Scanning {root_dir} for code quality issues...")
+
+    start = time.perf_counter()
+    files = collect_files(root_dir)
+    if args.changed_since:
+        changed = changed_since(root_dir, args.changed_since)
+        files = [f for f in files if os.path.realpath(f) in changed]
+
+    cache = None if args.no_cache else ScanCache(cache_path(root_dir, "review_code"), CACHE_VERSION)
+    results, analyzed = scan(files, cache, args.jobs)
+    if cache:
+        if not args.changed_since:
+            cache.prune(results.keys())
+        cache.save()
+
+    issue_count = 0
+    for file_path in files:
+        file_issues = results.get(os.path.realpath(file_path))
+        if file_issues:
+            print(f"\n📄 {file_path}")
+            for issue in file_issues:
+                print(f"  - {issue}")
+                issue_count += 1
 
     if issue_count == 0:
         print("✨ Clean code! No obvious complexity issues found.")
     else:
         print(f"\n⚠️  Found {issue_count} potential quality issues.")
+    print(f"⏱️  {len(files)} files ({analyzed} analyzed, {len(files) - analyzed} from cache) in {time.perf_counter() - start:.2f}s")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,71 @@
+import os
+import json
+import hashlib
+import subprocess
+
+# Persistent per-file results shared by the guardian scanners. An entry is reused
+# when the file's mtime and size are unchanged, or when its content hash still
+# matches (e.g. after a checkout that only touched mtimes).
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "noveldokusha-guardian")
+
+def cache_path(root_dir, name):
+    # One cache per checkout so several clones do not evict each other
+    root = os.path.realpath(root_dir)
+    return os.path.join(CACHE_DIR, f"{name}-{hashlib.sha1(root.encode('utf-8')).hexdigest()[:12]}.json")
+
+def file_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+class ScanCache:
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+        self.files = {}
+        self.meta = {}
+        self.dirty = False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == version:
+                self.files = data["files"]
+                self.meta = data.get("meta", {})
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def lookup(self, path, stat):
+        """Cached entry if the file is unchanged by mtime/size, else (None, cached digest or None)."""
+        entry = self.files.get(path)
+        if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry, None
+        return None, entry["digest"] if entry else None
+
+    def store(self, path, stat, digest, result):
+        self.files[path] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "digest": digest, "result": result}
+        self.dirty = True
+
+    def prune(self, paths):
+        stale = set(self.files) - set(paths)
+        for path in stale:
+            del self.files[path]
+        self.dirty = self.dirty or bool(stale)
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": self.version, "files": self.files, "meta": self.meta}, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+def changed_since(root_dir, rev):
+    """Absolute paths changed since rev (committed, staged, unstaged) plus untracked files."""
+    top = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=root_dir,
+                         capture_output=True, text=True, check=True).stdout.strip()
+    diff = subprocess.run(["git", "diff", "--name-only", rev, "--"], cwd=top,
+                          capture_output=True, text=True, check=True).stdout.splitlines()
+    untracked = subprocess.run(["git", "ls-files", "--others", "--exclude-standard"], cwd=top,
+                               capture_output=True, text=True, check=True).stdout.splitlines()
+    return {os.path.realpath(os.path.join(top, p)) for p in diff + untracked}
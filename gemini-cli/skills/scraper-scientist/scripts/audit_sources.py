@@ -1,8 +1,16 @@
 import sys
-import requests
-from bs4 import BeautifulSoup
+import http_client
+import parsing
+import streaming
+import health_store
+import tracing
 import json
 import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Sources audited at once
+MAX_WORKERS = 8
 
 SOURCES = {
     "RoyalRoad": {
@@ -31,36 +39,100 @@ SOURCES = {
     }
 }
 
-def audit():
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    }
-    report = {}
-    for name, data in SOURCES.items():
-        print(f"Auditing {name}...")
+def stream_checks(res, selectors, min_chapters):
+    done = None
+    if min_chapters:
+        done = lambda m: m.text("title") is not None and m.counts["chapters"] >= min_chapters
+    matcher, bytes_read, stopped_early = streaming.stream_match(res, selectors, capture={"title"}, done=done)
+    # An early stop means the real chapter count is at least what was seen
+    more = "+" if stopped_early else ""
+    checks = {key: f"OK ({count}{more} found)" if count else "MISSING" for key, count in matcher.counts.items()}
+    return checks, matcher.counts.get("chapters"), bytes_read
+
+def health_status(result):
+    # (ok, status) kept in the health store; error messages vary, so only their kind is kept
+    if isinstance(result, dict):
+        missing = [key for key, check in result.items() if not check.startswith("OK")]
+        return not missing, f"MISSING {', '.join(missing)}" if missing else "OK"
+    return False, result if result.startswith("FAILED") else result.split(":")[0]
+
+def audit_source(name, data, backend, stream, min_chapters):
+    print(f"Auditing {name}...")
+    start = time.perf_counter()
+    sample = {"url": data['url']}
+    with tracing.span("source", source=name, url=data['url']) as span:
         try:
-            res = requests.get(data['url'], headers=headers, timeout=15)
-            if res.status_code != 200:
-                report[name] = f"FAILED: HTTP {res.status_code}"
-                continue
-            
-            soup = BeautifulSoup(res.text, 'html.parser')
-            checks = {}
-            for key, sel in data['selectors'].items():
-                found = soup.select(sel)
-                # Fallback for cover
-                if key == "cover" and not found:
-                    title = soup.select_one("h1").get_text(strip=True) if soup.select_one("h1") else ""
-                    found = soup.select(f"img[alt*='{title.take(5) if title else ''}']")
-                
-                checks[key] = f"OK ({len(found)} found)" if found else "MISSING"
-            
-            report[name] = checks
+            result = check_source(data, backend, stream, min_chapters, sample)
         except Exception as e:
-            report[name] = f"ERROR: {str(e)}"
-        time.sleep(1)
-    
+            result = f"ERROR: {str(e)}"
+        ok, status = health_status(result)
+        span.set(status=status)
+    health_store.record(name, ok, status=status, total_ms=health_store.elapsed_ms(start), **sample)
+    return result
+
+def check_source(data, backend, stream, min_chapters, sample):
+    res = http_client.get(data['url'], stream=stream)
+    sample["http_status"] = res.status_code
+    sample["ttfb_ms"] = round(res.elapsed.total_seconds() * 1000, 1)
+    if res.status_code != 200:
+        res.close()
+        return f"FAILED: HTTP {res.status_code}"
+
+    if stream:
+        try:
+            parse_start = time.perf_counter()
+            checks, sample["chapters"], sample["bytes"] = stream_checks(res, data['selectors'], min_chapters)
+            sample["parse_ms"] = health_store.elapsed_ms(parse_start)
+            if checks.get("cover") != "MISSING":
+                return checks
+            # The cover fallback below looks up images by the page's title, which needs the DOM
+            res = http_client.get(data['url'])
+            if res.status_code != 200:
+                return f"FAILED: HTTP {res.status_code}"
+        except streaming.UnsupportedSelector:
+            pass # Needs the full DOM, nothing has been read yet
+
+    parse_start = time.perf_counter()
+    sample["bytes"] = len(res.content)
+    doc = parsing.parse(res.content, backend)
+    checks = {}
+    for key, sel in data['selectors'].items():
+        found = doc.select(sel)
+        # Fallback for cover
+        if key == "cover" and not found:
+            heading = doc.select_one("h1")
+            title = heading.text() if heading else ""
+            found = doc.select(f"img[alt*='{title[:5]}']")
+
+        checks[key] = f"OK ({len(found)} found)" if found else "MISSING"
+        if key == "chapters":
+            sample["chapters"] = len(found)
+    sample["parse_ms"] = health_store.elapsed_ms(parse_start)
+    return checks
+
+def audit(backend=None, stream=False, min_chapters=0, workers=MAX_WORKERS):
+    backend = backend or parsing.default_backend()
+    for data in SOURCES.values():
+        parsing.compile_selectors(data['selectors'], backend)
+    # Sources are on different hosts; how often one host is hit is up to http_client's rate scheduler
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(audit_source, name, data, backend, stream, min_chapters)
+                   for name, data in SOURCES.items()}
+        report = {name: future.result() for name, future in futures.items()}
+
     print(json.dumps(report, indent=2))
+    return report
 
 if __name__ == "__main__":
-    audit()
+    parser = argparse.ArgumentParser(description="Check title/cover/chapter selectors against live book pages.")
+    parsing.add_arguments(parser)
+    streaming.add_arguments(parser)
+    http_client.add_arguments(parser)
+    health_store.add_arguments(parser)
+    tracing.add_arguments(parser)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="sources audited concurrently")
+    args = parser.parse_args()
+    http_client.configure(args)
+    health_store.configure(args, "audit_sources.py")
+    tracing.configure(args, "audit_sources.py")
+    audit(args.parser, args.stream, args.min_chapters, args.workers)
@@ -0,0 +1,93 @@
+import os
+import time
+import json
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_client
+import clearance
+
+# Usage: python bench_clearance.py [--runs 5] [--solve-delay 3.0]
+# A local stub answers 403 + challenge page until the client visits /solve, which
+# takes --solve-delay seconds (standing in for the JS challenge) and sets
+# cf_clearance, valid only with the User-Agent that solved it. Each run uses a
+# fresh cloudscraper session, with a User-Agent of its own, like a separate script
+# invocation.
+
+def start_stub(solve_delay, clearance_ttl):
+    tokens = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def reply(self, status, body, headers=()):
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/solve":
+                time.sleep(solve_delay)
+                token = os.urandom(8).hex()
+                tokens[token] = self.headers.get("User-Agent")
+                self.reply(200, b"solved", [("Set-Cookie", f"cf_clearance={token}; Max-Age={clearance_ttl}; Path=/")])
+                return
+            cookies = dict(c.strip().split("=", 1) for c in self.headers.get("Cookie", "").split(";") if "=" in c)
+            if cookies.get("cf_clearance") in tokens and tokens[cookies["cf_clearance"]] == self.headers.get("User-Agent"):
+                self.reply(200, b"<html><h1>Book</h1></html>", [("Content-Type", "text/html")])
+            else:
+                self.reply(403, b"<html><title>Just a moment...</title><script src='/cdn-cgi/challenge-platform/'></script></html>",
+                           [("Content-Type", "text/html"), ("cf-mitigated", "challenge")])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run(base_url, runs):
+    solves = 0
+
+    def solve(session, url):
+        nonlocal solves
+        solves += 1
+        http_client.get(f"{base_url}/solve", session=session)
+
+    start = time.perf_counter()
+    statuses = []
+    for _ in range(runs):
+        session = http_client.create_scraper()
+        statuses.append(clearance.fetch(session, f"{base_url}/book", solve=solve).status_code)
+    return {"runs": runs, "solves": solves, "ok": statuses.count(200), "seconds": round(time.perf_counter() - start, 3)}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--solve-delay", type=float, default=3.0)
+    args = parser.parse_args()
+
+    server = start_stub(args.solve_delay, clearance_ttl=3600)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    clearance._store = None
+    without_store = run(base_url, args.runs)
+    with tempfile.TemporaryDirectory() as tmp:
+        clearance.enable(os.path.join(tmp, "clearance.json"))
+        with_store = run(base_url, args.runs)
+    server.shutdown()
+
+    print(json.dumps({
+        "without_store": without_store,
+        "with_store": with_store,
+        "seconds_saved": round(without_store["seconds"] - with_store["seconds"], 3),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
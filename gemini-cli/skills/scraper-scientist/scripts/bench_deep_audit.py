@@ -0,0 +1,62 @@
+import time
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import deep_audit
+
+# Usage: python bench_deep_audit.py [--hosts 12] [--max-delay 2.0]
+# Starts one stub server per fake source, each answering after its own delay,
+# and checks that the audit takes about as long as the slowest host.
+
+def start_stub(delay):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            body = b"<html><body>ok</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hosts", type=int, default=12)
+    parser.add_argument("--max-delay", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=None, help="defaults to one worker per host")
+    args = parser.parse_args()
+
+    # Delays spread evenly up to max-delay; each source pays its delay twice (plain + cloudscraper)
+    delays = [args.max_delay * (i + 1) / args.hosts for i in range(args.hosts)]
+    servers = [start_stub(d) for d in delays]
+    sources = {f"Stub{i}": f"http://127.0.0.1:{s.server_address[1]}/" for i, s in enumerate(servers)}
+
+    workers = args.workers or args.hosts
+    start = time.perf_counter()
+    report = deep_audit.deep_audit(sources, max_workers=workers)
+    elapsed = time.perf_counter() - start
+
+    for s in servers:
+        s.shutdown()
+
+    alive = sum(1 for status in report.values() if status.get("cf_http") == 200)
+    print(json.dumps({
+        "hosts": args.hosts,
+        "workers": workers,
+        "alive": alive,
+        "slowest_host_s": round(2 * max(delays), 3),
+        "sequential_sum_s": round(2 * sum(delays), 3),
+        "wall_clock_s": round(elapsed, 3)
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
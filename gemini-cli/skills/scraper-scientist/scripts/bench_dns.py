@@ -0,0 +1,113 @@
+import time
+import json
+import random
+import struct
+import asyncio
+import argparse
+from urllib.parse import urlsplit
+
+import dns_resolver
+from deep_audit import SOURCES
+
+# Usage: python bench_dns.py [--min-delay 0.05] [--max-delay 0.4] [--dead 4]
+# Serves the deep_audit source hosts from a local stub DNS server, each answer
+# held back by its own delay like a recursive lookup, with --dead of them
+# answering NXDOMAIN. Compares one lookup after another (what check_dns did)
+# with the concurrent resolver stage, cold and then from its TTL cache.
+
+class StubResolver(asyncio.DatagramProtocol):
+    """UDP DNS server for a fixed zone: {name: {"addresses", "ttl", "delay"}}, NXDOMAIN otherwise."""
+
+    def __init__(self, zone, negative_ttl=60, default_delay=0.0):
+        self.zone = zone
+        self.negative_ttl = negative_ttl
+        self.default_delay = default_delay
+        self.queries = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.queries += 1
+        query_id, _, _, _, _, _ = struct.unpack("!HHHHHH", data[:12])
+        end = dns_resolver.skip_name(data, 12)
+        labels, pos = [], 12
+        while data[pos]:
+            labels.append(data[pos + 1:pos + 1 + data[pos]].decode('ascii'))
+            pos += 1 + data[pos]
+        qtype = struct.unpack("!H", data[end:end + 2])[0]
+        question = data[12:end + 4]
+        entry = self.zone.get(".".join(labels).lower())
+        delay = entry.get("delay", self.default_delay) if entry else self.default_delay
+        asyncio.get_running_loop().call_later(delay, self.transport.sendto,
+                                              self.reply(query_id, question, qtype, entry), addr)
+
+    def reply(self, query_id, question, qtype, entry):
+        answers, authority = [], []
+        if entry:
+            family = 4 if qtype == dns_resolver.TYPE_A else 16
+            for address in entry["addresses"]:
+                packed = bytes(int(p) for p in address.split(".")) if family == 4 else None
+                if packed:
+                    answers.append(struct.pack("!HHHIH", 0xC00C, qtype, 1, entry.get("ttl", 60), 4) + packed)
+        if not answers:
+            # Negative answer (NXDOMAIN, or no AAAA): SOA with the negative TTL as its minimum
+            soa = b"\0\0" + struct.pack("!IIIII", 1, 3600, 600, 86400, self.negative_ttl)
+            authority.append(struct.pack("!HHHIH", 0xC00C, dns_resolver.TYPE_SOA, 1, self.negative_ttl, len(soa)) + soa)
+        flags = 0x8180 | (0 if entry else 3)
+        header = struct.pack("!HHHHHH", query_id, flags, 1, len(answers), len(authority), 0)
+        return header + question + b"".join(answers) + b"".join(authority)
+
+async def start_stub(zone, host="127.0.0.1"):
+    loop = asyncio.get_running_loop()
+    transport, stub = await loop.create_datagram_endpoint(lambda: StubResolver(zone), local_addr=(host, 0))
+    return transport, stub, transport.get_extra_info("sockname")[:2]
+
+async def bench(args):
+    rng = random.Random(args.seed)
+    hosts = [urlsplit(url).hostname for url in SOURCES.values()]
+    dead = set(rng.sample(hosts, args.dead))
+    zone = {h: {"addresses": [f"10.0.{i // 250}.{i % 250 + 1}"], "ttl": 120,
+                "delay": rng.uniform(args.min_delay, args.max_delay)}
+            for i, h in enumerate(hosts) if h not in dead}
+    transport, stub, address = await start_stub(zone)
+    results = []
+    try:
+        async def run(mode, resolver, sequential=False):
+            stub.queries = 0
+            start = time.perf_counter()
+            if sequential:
+                answers = {h: await resolver.resolve(h) for h in hosts}
+            else:
+                answers = await resolver.resolve_many(hosts)
+            results.append({
+                "mode": mode,
+                "wall_ms": round((time.perf_counter() - start) * 1000, 1),
+                "slowest_lookup_ms": max(a["ms"] for a in answers.values()),
+                "dead": sorted(h for h, a in answers.items() if a["status"] in ("nxdomain", "nodata")),
+                "queries_sent": stub.queries,
+            })
+
+        await run("sequential", dns_resolver.Resolver([address], cache_path=None), sequential=True)
+        resolver = dns_resolver.Resolver([address], cache_path=None)
+        await run("concurrent, cold", resolver)
+        await run("concurrent, cached", resolver)
+    finally:
+        transport.close()
+    return {"hosts": len(hosts), "dead": sorted(dead), "results": results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the concurrent DNS stage against a local stub resolver.")
+    parser.add_argument("--min-delay", type=float, default=0.05)
+    parser.add_argument("--max-delay", type=float, default=0.4)
+    parser.add_argument("--dead", type=int, default=4, help="hosts answering NXDOMAIN")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    report = asyncio.run(bench(args))
+    for result in report["results"]:
+        # Every mode has to find exactly the dead hosts
+        result["dead_detected_correctly"] = result.pop("dead") == report["dead"]
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
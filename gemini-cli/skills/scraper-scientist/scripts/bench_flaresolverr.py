@@ -0,0 +1,80 @@
+import time
+import json
+import argparse
+
+import requests
+import mock_flaresolverr
+import flaresolverr_client
+
+# Usage: python bench_flaresolverr.py [--port 8191] [--sites 3] [--pages 6] [--browser-only 1]
+# Runs the mock FlareSolverr and --sites challenge-protected sites (the last
+# --browser-only of them reject clearance outside the browser) and fetches
+# --pages pages of each three ways: a one-off request.get per page as
+# test_flaresolverr.py does, pooled solver sessions only, and pooled sessions
+# with plain HTTP once clearance exists.
+
+def one_off(solver_url, urls):
+    # Every call gets a fresh browser context and solves the challenge again
+    statuses = []
+    with requests.Session() as session:
+        for url in urls:
+            data = session.post(solver_url, json={"cmd": "request.get", "url": url, "maxTimeout": 60000}, timeout=70).json()
+            statuses.append(data["solution"]["status"] if data.get("status") == "ok" else None)
+    return statuses, {}
+
+def pooled(solver_url, urls, workers, plain_http):
+    with flaresolverr_client.FlareSolverrClient(solver_url, max_workers=workers, plain_http=plain_http) as client:
+        responses = client.get_many(urls)
+        stats = {**client.stats, "sessions_created": client.pool.created, "sessions_recycled": client.pool.recycled}
+    return [None if isinstance(r, Exception) else r.status_code for r in responses], stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one-off FlareSolverr requests with the pooled session client.")
+    parser.add_argument("--port", type=int, default=8191, help="port of the mock FlareSolverr")
+    parser.add_argument("--sites", type=int, default=3)
+    parser.add_argument("--browser-only", type=int, default=1, help="sites that reject clearance outside the browser")
+    parser.add_argument("--pages", type=int, default=6, help="pages per site")
+    parser.add_argument("--workers", type=int, default=flaresolverr_client.MAX_WORKERS)
+    parser.add_argument("--launch-delay", type=float, default=0.5)
+    parser.add_argument("--solve-delay", type=float, default=1.0)
+    parser.add_argument("--page-delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    modes = {
+        "one-off request.get": lambda url, urls: one_off(url, urls),
+        "pooled sessions": lambda url, urls: pooled(url, urls, args.workers, plain_http=False),
+        "pooled sessions + plain HTTP": lambda url, urls: pooled(url, urls, args.workers, plain_http=True),
+    }
+    results = []
+    for mode, run in modes.items():
+        # Fresh solver and sites per mode, so no clearance carries over
+        solver = mock_flaresolverr.start_solver(args.port, args.launch_delay, args.solve_delay, args.page_delay)
+        sites = [mock_flaresolverr.start_site(f"127.0.0.{i + 1}", browser_only=i >= args.sites - args.browser_only)
+                 for i in range(args.sites)]
+        urls = [f"http://{s.server_address[0]}:{s.server_address[1]}/book/{n}" for n in range(args.pages) for s in sites]
+        solver_url = f"http://127.0.0.1:{solver.server_address[1]}/v1"
+
+        start = time.perf_counter()
+        statuses, stats = run(solver_url, urls)
+        elapsed = time.perf_counter() - start
+        solver.shutdown()
+        solver.server_close()
+        for s in sites:
+            s.shutdown()
+        results.append({
+            "mode": mode,
+            "seconds": round(elapsed, 2),
+            "pages_per_s": round(len(urls) / elapsed, 2),
+            "pages_ok": statuses.count(200),
+            "browser_launches": solver.counts["launches"],
+            "challenges_solved": solver.counts["solves"],
+            "pages_rendered": solver.counts["pages"],
+            **stats,
+        })
+    baseline = results[0]["challenges_solved"]
+    for result in results:
+        result["solves_saved"] = baseline - result["challenges_solved"]
+    print(json.dumps({"sites": args.sites, "pages_per_site": args.pages, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
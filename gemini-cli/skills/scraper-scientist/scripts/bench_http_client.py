@@ -0,0 +1,62 @@
+import time
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+import http_client
+
+# Usage: python bench_http_client.py [--requests 50]
+# Counts TCP connections a local keep-alive server sees for bare requests.get
+# calls versus the shared pooled session from http_client.
+
+class CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b"<html><ul>" + b"<li><a href='/c'>Chapter</a></li>" * 200 + b"</ul></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def run(server, label, fetch, count):
+    url = f"http://127.0.0.1:{server.server_address[1]}/book"
+    server.connections = 0
+    start = time.perf_counter()
+    for i in range(count):
+        fetch(f"{url}?page={i}")
+    elapsed = time.perf_counter() - start
+    return {"client": label, "requests": count, "connections": server.connections, "seconds": round(elapsed, 3)}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    server = CountingServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = [
+        run(server, "bare requests.get", lambda u: requests.get(u, headers=http_client.default_headers(), timeout=http_client.TIMEOUT), args.requests),
+        run(server, "http_client.get", http_client.get, args.requests),
+    ]
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+
+import parsing
+
+# Usage: python bench_parsers.py --archive run.jsonl.gz [--repeat 5]
+#        python bench_parsers.py --synthetic 5000
+# Times parse + select for every backend over recorded chapter-list pages.
+# Each backend runs in its own process so peak RSS is not shared between them.
+
+DEFAULT_SELECTORS = {
+    "title": "h1, h3.title, .title",
+    "cover": ".book img, img.thumbnail",
+    "chapters": "#list-chapter li a, ul.list-chapter li a, #chapters tbody tr a[href], li a",
+}
+
+def synthetic_page(chapters):
+    items = "".join(f'<li><a href="/book/chapter-{i}" title="Chapter {i}">Chapter {i}: Title</a></li>' for i in range(chapters))
+    return (f'<html><head><title>Book</title></head><body><h3 class="title">Book</h3>'
+            f'<div class="book"><img src="/cover.jpg"></div><div id="list-chapter"><ul class="list-chapter">{items}</ul></div></body></html>').encode('utf-8')
+
+def load_pages(args):
+    if args.synthetic:
+        return [(f"synthetic://{args.synthetic}", synthetic_page(args.synthetic))]
+    import fixtures
+    archive = fixtures.FixtureArchive.load(args.archive)
+    return [(url, body) for url, body in archive.bodies() if body]
+
+def rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_backend(args, backend):
+    pages = load_pages(args)
+    selectors = json.loads(args.selectors) if args.selectors else DEFAULT_SELECTORS
+    parsing.compile_selectors(selectors, backend)
+    # Warm the import so it is not billed to the first page
+    parsing.parse(b"<html></html>", backend)
+    baseline = rss_kb()
+
+    parse_time = select_time = 0.0
+    matches = 0
+    for _ in range(args.repeat):
+        for url, body in pages:
+            start = time.perf_counter()
+            doc = parsing.parse(body, backend)
+            parsed = time.perf_counter()
+            for selector in selectors.values():
+                matches += len(doc.select(selector))
+            select_time += time.perf_counter() - parsed
+            parse_time += parsed - start
+
+    runs = args.repeat * len(pages)
+    return {
+        "backend": backend,
+        "pages": len(pages),
+        "bytes": sum(len(body) for _, body in pages),
+        "parse_ms": round(parse_time * 1000 / runs, 3),
+        "select_ms": round(select_time * 1000 / runs, 3),
+        "total_ms": round((parse_time + select_time) * 1000 / runs, 3),
+        "matches_per_run": matches // args.repeat,
+        "peak_rss_delta_kb": rss_kb() - baseline,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--archive", help="fixture archive recorded with --record")
+    source.add_argument("--synthetic", type=int, help="generate one chapter-list page with this many chapters")
+    parser.add_argument("--selectors", help="JSON object of selectors (default: common title/cover/chapter selectors)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backend", choices=parsing.BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args, args.backend)))
+        return
+
+    results = []
+    for backend in parsing.available_backends():
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--backend", backend],
+                               capture_output=True, text=True)
+        if child.returncode != 0:
+            results.append({"backend": backend, "error": child.stderr.strip().splitlines()[-1]})
+        else:
+            results.append(json.loads(child.stdout))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
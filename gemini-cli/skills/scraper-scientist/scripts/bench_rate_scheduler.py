@@ -0,0 +1,108 @@
+import time
+import json
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_client
+import rate_scheduler
+
+# Usage: python bench_rate_scheduler.py [--hosts 6] [--requests 6] [--limit 2] [--window 1.0]
+# Starts one stub per fake source that answers 429 + Retry-After once a client
+# sends more than --limit requests within --window seconds (every third host is
+# twice as strict and answers 503 instead). The same workload runs three ways:
+# the old sequential loop with time.sleep(1), every host hammered in parallel,
+# and in parallel through the per-host rate scheduler (--rate/--burst, which the
+# scheduler has to discover the strict hosts' limits under).
+
+def start_stub(limit, window, status=429):
+    seen = deque()
+    lock = threading.Lock()
+    counts = {"ok": 0, "limited": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            now = time.monotonic()
+            with lock:
+                while seen and now - seen[0] >= window:
+                    seen.popleft()
+                allowed = len(seen) < limit
+                if allowed:
+                    seen.append(now)
+                counts["ok" if allowed else "limited"] += 1
+            body = b"<html><body>ok</body></html>" if allowed else b"slow down"
+            self.send_response(200 if allowed else status)
+            if not allowed:
+                self.send_header("Retry-After", str(max(1, round(window))))
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.counts = counts
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def fetch_all(session, urls):
+    return [session.get(url, timeout=30).status_code for url in urls]
+
+def run_sleep(session, jobs):
+    # What audit_sources.py did: one request at a time, a flat second after each
+    statuses = []
+    for urls in jobs:
+        for url in urls:
+            statuses.append(session.get(url, timeout=30).status_code)
+            time.sleep(1)
+    return statuses
+
+def run_parallel(session, jobs):
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        return [s for statuses in pool.map(lambda urls: fetch_all(session, urls), jobs) for s in statuses]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fixed sleeps with the per-host rate scheduler against rate-limited stubs.")
+    parser.add_argument("--hosts", type=int, default=6)
+    parser.add_argument("--requests", type=int, default=6, help="requests per host")
+    parser.add_argument("--limit", type=int, default=2, help="requests a stub accepts per window")
+    parser.add_argument("--window", type=float, default=1.0, help="seconds")
+    rate_scheduler.add_arguments(parser)
+    args = parser.parse_args()
+
+    modes = {
+        "sequential + sleep(1)": (run_sleep, None),
+        "parallel, no scheduler": (run_parallel, None),
+        "parallel + rate scheduler": (run_parallel, rate_scheduler.from_args(args)),
+    }
+    results = []
+    for mode, (run, scheduler) in modes.items():
+        servers = [start_stub(args.limit // 2 or 1, args.window * 2, 503) if i % 3 == 2 else start_stub(args.limit, args.window)
+                   for i in range(args.hosts)]
+        jobs = [[f"http://127.0.0.1:{s.server_address[1]}/page/{n}" for n in range(args.requests)] for s in servers]
+        if scheduler:
+            # Sessions only pick the scheduler up when created, the earlier modes stay unthrottled
+            http_client.enable_scheduler(scheduler)
+        session = http_client.create_session()
+
+        start = time.perf_counter()
+        statuses = run(session, jobs)
+        elapsed = time.perf_counter() - start
+        for s in servers:
+            s.shutdown()
+        results.append({
+            "mode": mode,
+            "wall_clock_s": round(elapsed, 2),
+            "pages_ok": statuses.count(200),
+            "pages_failed": len(statuses) - statuses.count(200),
+            "rejected_by_server": sum(s.counts["limited"] for s in servers),
+            **({"retries": scheduler.stats["retried"]} if scheduler else {}),
+        })
+    print(json.dumps({"hosts": args.hosts, "requests_per_host": args.requests, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import threading
+from urllib.parse import urlsplit
+
+import http_client
+
+# Usage: python clearance.py [--clearance-store FILE] (list|clear)
+# Persists Cloudflare clearance cookies (cf_clearance, __cf_bm, ...) per domain together
+# with the User-Agent that solved the challenge, since Cloudflare binds clearance to it.
+# Later runs load the cookies into the session and send the stored UA with every request
+# to that host (cloudscraper picks a new UA per session, and one session is shared by
+# threads fetching different hosts), and only solve again when the site answers 403 or
+# serves a challenge page.
+
+STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "noveldokusha-scraper", "clearance.json")
+
+# Cookies without an expiry (e.g. __cf_bm) are kept for this long
+SESSION_COOKIE_TTL = 30 * 60
+
+CHALLENGE_MARKERS = ("cf-chl", "challenge-platform", "Just a moment...", "cf_chl_opt")
+
+def is_cloudflare_cookie(name):
+    return name.startswith("cf_") or name.startswith("__cf")
+
+def is_challenge(response):
+    if response.headers.get("cf-mitigated") == "challenge":
+        return True
+    if response.status_code not in (403, 429, 503):
+        return False
+    head = response.content[:4096].decode('utf-8', errors='replace')
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+def host_matches(cookie_domain, host):
+    cookie_domain = cookie_domain.lstrip(".").lower()
+    return host == cookie_domain or host.endswith("." + cookie_domain)
+
+class ClearanceStore:
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.reused = 0
+        self.saved = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        # Stores written before the UA was kept per entry were keyed "host|UA"
+        for key in [k for k in self.entries if "|" in k]:
+            entry = self.entries.pop(key)
+            host, _, user_agent = key.partition("|")
+            if entry["saved"] > self.entries.get(host, {}).get("saved", 0):
+                self.entries[host] = {**entry, "user_agent": user_agent}
+
+    @staticmethod
+    def key(url):
+        return urlsplit(url).hostname
+
+    def apply(self, session, url):
+        """Load url's stored cookies into session; returns the entry, or None without live clearance.
+
+        The session's headers are left alone: send entry["user_agent"] with each request.
+        """
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(self.key(url))
+            cookies = [c for c in entry["cookies"] if c["expires"] > now] if entry else []
+        if not cookies:
+            return None
+        for c in cookies:
+            session.cookies.set(c["name"], c["value"], domain=c["domain"], path=c["path"], expires=int(c["expires"]))
+        self.reused += 1
+        return entry
+
+    def remember(self, session, url, user_agent=None):
+        host = urlsplit(url).hostname
+        now = time.time()
+        cookies = [{
+            "name": c.name,
+            "value": c.value,
+            "domain": c.domain,
+            "path": c.path,
+            "expires": c.expires or now + SESSION_COOKIE_TTL,
+        } for c in session.cookies if is_cloudflare_cookie(c.name) and host_matches(c.domain, host)]
+        if not cookies:
+            return
+        with self.lock:
+            self.entries[self.key(url)] = {"cookies": cookies, "user_agent": user_agent or session.headers.get("User-Agent"),
+                                           "saved": now}
+            self.saved += 1
+            self._save()
+
+    def forget(self, session, url):
+        host = urlsplit(url).hostname
+        for c in [c for c in session.cookies if is_cloudflare_cookie(c.name) and host_matches(c.domain, host)]:
+            session.cookies.clear(c.domain, c.path, c.name)
+        with self.lock:
+            if self.entries.pop(self.key(url), None) is not None:
+                self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp, self.path)
+
+_store = None
+
+def enable(path=STORE_PATH):
+    global _store
+    _store = ClearanceStore(path)
+    return _store
+
+def add_arguments(parser):
+    parser.add_argument("--clearance-store", default=STORE_PATH, help="where Cloudflare clearance cookies are kept between runs")
+    parser.add_argument("--no-clearance", action="store_true", help="always solve challenges from scratch")
+
+def configure(args):
+    global _store
+    _store = None
+    if not args.no_clearance:
+        enable(args.clearance_store)
+
+def fetch(session, url, solve=None, **kwargs):
+    """GET through session, reusing stored clearance and refreshing it only when rejected.
+
+    solve(session, url) obtains fresh clearance for sessions that cannot solve challenges
+    themselves; cloudscraper sessions solve inside the retried request and need none.
+    """
+    entry = _store.apply(session, url) if _store else None
+    # Per request, never on the session: other threads may be using it for hosts cleared with another UA
+    user_agent = entry and entry.get("user_agent")
+    headers = kwargs.pop("headers", {})
+    stored = {**headers, "User-Agent": user_agent} if user_agent else headers
+    response = http_client.get(url, session=session, headers=stored, **kwargs)
+    if is_challenge(response) or (entry and response.status_code == 403):
+        # Solved again below with the session's own User-Agent
+        user_agent = None
+        if entry:
+            _store.forget(session, url)
+        if solve:
+            solve(session, url)
+            response = http_client.get(url, session=session, headers=headers, **kwargs)
+        elif entry:
+            response = http_client.get(url, session=session, headers=headers, **kwargs)
+    if _store and response.status_code == 200:
+        _store.remember(session, url, user_agent)
+    return response
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or clear stored Cloudflare clearance cookies.")
+    parser.add_argument("--clearance-store", default=STORE_PATH)
+    parser.add_argument("command", choices=["list", "clear"])
+    args = parser.parse_args()
+    store = ClearanceStore(args.clearance_store)
+    if args.command == "clear":
+        store.entries = {}
+        store._save()
+    now = time.time()
+    for domain, entry in store.entries.items():
+        agent = entry.get("user_agent") or ""
+        remaining = min(c["expires"] for c in entry["cookies"]) - now
+        print(f"{domain}: {', '.join(c['name'] for c in entry['cookies'])} (expires in {int(remaining)}s, UA {agent[:40]}...)")
@@ -1,9 +1,16 @@
 import sys
-import cloudscraper
-import requests
+import http_client
+import clearance
+import health_store
+import dns_resolver
+import tracing
 import json
 import time
 import socket
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
 SOURCES = {
     "1stKissNovel": "https://1stkissnovel.love/",
@@ -36,58 +43,136 @@ SOURCES = {
     "WuxiaWorld": "https://www.wuxiaworld.com/"
 }
 
-def check_dns(domain):
+# Total sources checked at once, and connections allowed against a single host
+MAX_WORKERS = 8
+PER_HOST_LIMIT = 1
+
+# Answers that mean the domain itself is gone; timeouts and SERVFAIL still get the HTTP checks
+DEAD_DNS = ("nxdomain", "nodata")
+
+def resolve_hosts(sources, resolver):
+    # Every host looked up at once before the first HTTP check; {hostname: answer}
+    if http_client.replaying():
+        return {}
+    start = time.perf_counter()
+    with tracing.span("dns_stage", hosts=len(sources)):
+        answers = resolver.resolve_all([urlsplit(url).hostname for url in sources.values()])
+    dead = sum(1 for answer in answers.values() if answer["status"] in DEAD_DNS)
+    print(f"🌐 Resolved {len(answers)} hosts in {health_store.elapsed_ms(start)} ms "
+          f"({resolver.stats['cached']} cached, {dead} dead)")
+    return answers
+
+def time_connect(url, address, timeout=10):
+    # TCP handshake only, in ms; the HTTP checks below reuse pooled connections
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    start = time.perf_counter()
     try:
-        socket.gethostbyname(domain.split('//')[-1].split('/')[0])
-        return True
-    except:
-        return False
-
-def deep_audit():
-    scraper = cloudscraper.create_scraper(browser={'browser': 'chrome', 'platform': 'windows', 'mobile': False})
-    report = {}
-    
-    for name, url in SOURCES.items():
-        print(f"Deep checking {name} ({url})...")
-        status = {"url": url}
-        
-        # 1. DNS Check
-        if not check_dns(url):
-            status["dns"] = "FAILED (Domain might be dead)"
-            status["status"] = "❌ DEAD"
-            report[name] = status
-            continue
-        else:
-            status["dns"] = "OK"
-            
-        # 2. Connection Check (Standard)
-        try:
-            res = requests.get(url, timeout=10, headers={'User-Agent': 'Mozilla/5.0'})
-            status["std_http"] = res.status_code
-        except Exception as e:
-            status["std_http"] = f"ERROR: {str(e)}"
-            
-        # 3. Connection Check (Cloudscraper)
+        with tracing.span("connect", host=address, port=port), socket.create_connection((address, port), timeout):
+            return health_store.elapsed_ms(start)
+    except OSError:
+        return None
+
+class HostLimiter:
+    # One semaphore per host:port so mirrors sharing a server are not hammered in parallel
+    def __init__(self, limit):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.semaphores = {}
+
+    def get(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            if host not in self.semaphores:
+                self.semaphores[host] = threading.BoundedSemaphore(self.limit)
+            return self.semaphores[host]
+
+def check_source(name, url, scraper, limiter, answer=None):
+    print(f"Deep checking {name} ({url})...")
+    status = {"url": url}
+    sample = {}
+    start = time.perf_counter()
+
+    with limiter.get(url), tracing.span("source", source=name, url=url) as span:
         try:
-            res = scraper.get(url, timeout=15)
-            status["cf_http"] = res.status_code
-            if res.status_code == 200:
-                status["status"] = "✅ ALIVE"
-            elif res.status_code == 403:
-                status["status"] = "🛡️ PROTECTED (CF Strong)"
-            elif res.status_code == 410:
-                status["status"] = "❌ DISCONTINUED (410)"
-            else:
-                status["status"] = f"⚠️ UNCERTAIN ({res.status_code})"
-        except Exception as e:
-            status["cf_http"] = f"ERROR: {str(e)}"
-            status["status"] = "❌ DEAD/TIMEOUT"
-            
-        report[name] = status
-        time.sleep(1)
-        
+            check_reachability(url, scraper, status, sample, answer)
+            span.set(status=status.get("status"))
+        finally:
+            health_store.record(name, status.get("status") == "✅ ALIVE", url=url, status=status.get("status"),
+                                total_ms=health_store.elapsed_ms(start), **sample)
+
+    return status
+
+def check_reachability(url, scraper, status, sample, answer=None):
+    # 1. DNS Check, answered by the resolver stage (none when replaying, fixtures stand in for the network)
+    if not answer:
+        status["dns"] = "OK"
+    elif answer["status"] in DEAD_DNS:
+        status["dns"] = f"FAILED ({answer['status'].upper()}, domain might be dead)"
+        status["status"] = "❌ DEAD"
+        return
+    elif answer["status"] != "ok":
+        status["dns"] = f"UNKNOWN ({answer['status']})"
+    else:
+        status["dns"] = "OK (cached)" if answer["cached"] else f"OK ({answer['ms']} ms)"
+        # The HTTP checks connect to the addresses found here instead of resolving again
+        dns_resolver.pin(answer["host"], answer["addresses"], answer["ttl"])
+        sample["connect_ms"] = time_connect(url, answer["addresses"][0])
+    if answer and not answer["cached"]:
+        sample["dns_ms"] = answer["ms"]
+
+    # 2. Connection Check (Standard)
+    try:
+        res = http_client.get(url, timeout=10)
+        status["std_http"] = res.status_code
+    except Exception as e:
+        status["std_http"] = f"ERROR: {str(e)}"
+
+    # 3. Connection Check (Cloudscraper)
+    try:
+        res = clearance.fetch(scraper, url)
+        status["cf_http"] = res.status_code
+        sample.update(http_status=res.status_code, ttfb_ms=round(res.elapsed.total_seconds() * 1000, 1),
+                      bytes=len(res.content))
+        if res.status_code == 200:
+            status["status"] = "✅ ALIVE"
+        elif res.status_code == 403:
+            status["status"] = "🛡️ PROTECTED (CF Strong)"
+        elif res.status_code == 410:
+            status["status"] = "❌ DISCONTINUED (410)"
+        else:
+            status["status"] = f"⚠️ UNCERTAIN ({res.status_code})"
+    except Exception as e:
+        status["cf_http"] = f"ERROR: {str(e)}"
+        status["status"] = "❌ DEAD/TIMEOUT"
+
+def deep_audit(sources=SOURCES, max_workers=MAX_WORKERS, per_host=PER_HOST_LIMIT, resolver=None):
+    answers = resolve_hosts(sources, resolver or dns_resolver.Resolver())
+    scraper = http_client.create_scraper(pool_maxsize=max(per_host, http_client.POOL_MAXSIZE))
+    limiter = HostLimiter(per_host)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {name: pool.submit(check_source, name, url, scraper, limiter, answers.get(urlsplit(url).hostname))
+                   for name, url in sources.items()}
+        # Keep the report in SOURCES order regardless of completion order
+        report = {name: future.result() for name, future in futures.items()}
+
     print("\n--- DEEP AUDIT REPORT ---")
     print(json.dumps(report, indent=2))
+    return report
 
 if __name__ == "__main__":
-    deep_audit()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Check DNS, plain HTTP and Cloudflare reachability of every source.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="sources checked concurrently")
+    parser.add_argument("--per-host", type=int, default=PER_HOST_LIMIT, help="concurrent checks against one host")
+    http_client.add_arguments(parser, cache=False)
+    clearance.add_arguments(parser)
+    health_store.add_arguments(parser)
+    dns_resolver.add_arguments(parser)
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+    http_client.configure(args)
+    clearance.configure(args)
+    health_store.configure(args, "deep_audit.py")
+    tracing.configure(args, "deep_audit.py")
+    deep_audit(max_workers=args.workers, per_host=args.per_host, resolver=dns_resolver.configure(args))
@@ -0,0 +1,311 @@
+import os
+import json
+import time
+import random
+import socket
+import struct
+import asyncio
+import ipaddress
+import threading
+
+import tracing
+
+# Usage: python dns_resolver.py [--nameserver 127.0.0.1:5353] [--no-dns-cache] host [host ...]
+# Asynchronous A/AAAA resolution straight over UDP, so every source host of an
+# audit is looked up at once instead of one blocking gethostbyname after another.
+# Answers are cached with the record TTL (negative ones with the zone's SOA
+# minimum) in memory and in CACHE_PATH between runs. Timeouts and SERVFAIL are
+# reported as such rather than as dead domains, and are not cached.
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "noveldokusha-scraper", "dns.json")
+TIMEOUT = 2.0
+ATTEMPTS = 2
+# Used when an answer carries no usable TTL
+DEFAULT_TTL = 300
+NEGATIVE_TTL = 300
+MAX_TTL = 24 * 3600
+
+TYPE_A, TYPE_AAAA, TYPE_SOA = 1, 28, 6
+RCODES = {0: "ok", 2: "servfail", 3: "nxdomain", 5: "refused"}
+# Results that say something about the domain itself, and may be cached
+CACHEABLE = ("ok", "nxdomain", "nodata")
+
+def system_nameservers(path="/etc/resolv.conf"):
+    servers = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    servers.append((parts[1], 53))
+    except OSError:
+        pass
+    return servers
+
+def parse_nameserver(text):
+    host, _, port = text.rpartition(":") if text.count(":") == 1 else (text, "", "")
+    return host, int(port or 53)
+
+def build_query(query_id, host, qtype):
+    # Header: id, flags (recursion desired), 1 question, no other records
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+    name = b"".join(bytes([len(label)]) + label for label in host.rstrip(".").encode('idna').split(b".")) + b"\0"
+    return header + name + struct.pack("!HH", qtype, 1)
+
+def skip_name(data, pos):
+    while True:
+        length = data[pos]
+        if length & 0xC0 == 0xC0: # compression pointer ends the name
+            return pos + 2
+        pos += 1 + length
+        if length == 0:
+            return pos
+
+def parse_response(data, query_id):
+    """(rcode name, addresses, ttl) of a reply, ttl being the shortest record TTL."""
+    reply_id, flags, qdcount, ancount, nscount, _ = struct.unpack("!HHHHHH", data[:12])
+    if reply_id != query_id:
+        raise ValueError("reply to another query")
+    if flags & 0x0200:
+        raise ValueError("truncated reply")
+    pos = 12
+    for _ in range(qdcount):
+        pos = skip_name(data, pos) + 4
+    addresses, ttls, negative_ttl = [], [], None
+    for index in range(ancount + nscount):
+        pos = skip_name(data, pos)
+        rtype, _, ttl, length = struct.unpack("!HHIH", data[pos:pos + 10])
+        pos += 10
+        rdata = data[pos:pos + length]
+        if index < ancount:
+            # CNAME chains come first; only the addresses at the end matter
+            if rtype == TYPE_A and length == 4:
+                addresses.append(socket.inet_ntop(socket.AF_INET, rdata))
+                ttls.append(ttl)
+            elif rtype == TYPE_AAAA and length == 16:
+                addresses.append(socket.inet_ntop(socket.AF_INET6, rdata))
+                ttls.append(ttl)
+        elif rtype == TYPE_SOA:
+            # RFC 2308: negative answers live for min(SOA TTL, SOA MINIMUM)
+            end = skip_name(data, skip_name(data, pos))
+            minimum = struct.unpack("!I", data[end + 16:end + 20])[0]
+            negative_ttl = min(ttl, minimum)
+        pos += length
+    rcode = RCODES.get(flags & 0x000F, "error")
+    if rcode == "ok" and not addresses:
+        rcode = "nodata"
+    return rcode, addresses, min(ttls) if ttls else negative_ttl
+
+class _Query(asyncio.DatagramProtocol):
+    def __init__(self, query_id):
+        self.query_id = query_id
+        self.reply = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        if not self.reply.done():
+            try:
+                self.reply.set_result(parse_response(data, self.query_id))
+            except (ValueError, struct.error, IndexError) as e:
+                self.reply.set_exception(e)
+
+    def error_received(self, exc):
+        if not self.reply.done():
+            self.reply.set_exception(exc)
+
+class Resolver:
+    def __init__(self, nameservers=None, timeout=TIMEOUT, attempts=ATTEMPTS, cache_path=CACHE_PATH):
+        self.nameservers = nameservers or system_nameservers()
+        self.timeout = timeout
+        self.attempts = attempts
+        self.cache_path = cache_path
+        self.lock = threading.Lock()
+        self.cache = {}
+        self.dirty = False
+        self.stats = {"lookups": 0, "cached": 0}
+        if cache_path:
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    self.cache = json.load(f)
+            except (OSError, ValueError):
+                self.cache = {}
+
+    async def _ask(self, nameserver, host, qtype):
+        loop = asyncio.get_running_loop()
+        query_id = random.randrange(1 << 16)
+        family = socket.AF_INET6 if ":" in nameserver[0] else socket.AF_INET
+        transport, protocol = await loop.create_datagram_endpoint(
+            lambda: _Query(query_id), remote_addr=nameserver, family=family)
+        try:
+            transport.sendto(build_query(query_id, host, qtype))
+            return await asyncio.wait_for(protocol.reply, self.timeout)
+        finally:
+            transport.close()
+
+    async def _query(self, host, qtype):
+        last = ("timeout", [], None)
+        for attempt in range(self.attempts):
+            for nameserver in self.nameservers:
+                try:
+                    result = await self._ask(nameserver, host, qtype)
+                except asyncio.TimeoutError:
+                    continue
+                except (OSError, ValueError, struct.error, IndexError):
+                    last = ("error", [], None)
+                    continue
+                if result[0] in CACHEABLE:
+                    return result
+                last = result # SERVFAIL/REFUSED: another server may do better
+        return last
+
+    async def _system(self, host):
+        # No nameserver, or no usable reply from one (unreachable, truncated): the OS resolver, without TTLs
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await asyncio.wait_for(loop.getaddrinfo(host, None, type=socket.SOCK_STREAM),
+                                           self.timeout * self.attempts)
+        except socket.gaierror as e:
+            return ("nxdomain" if e.errno == socket.EAI_NONAME else "error"), [], None
+        except asyncio.TimeoutError:
+            return "timeout", [], None
+        return "ok", list(dict.fromkeys(info[4][0] for info in infos)), None
+
+    async def resolve(self, host):
+        """{"host", "status", "addresses", "ttl", "ms", "cached"} for one host name."""
+        host = host.lower().rstrip(".")
+        start = time.perf_counter()
+        try:
+            ipaddress.ip_address(host)
+            return {"host": host, "status": "ok", "addresses": [host], "ttl": None, "ms": 0.0, "cached": False}
+        except ValueError:
+            pass
+        with self.lock:
+            entry = self.cache.get(host)
+            if entry and entry["expires"] > time.time():
+                self.stats["cached"] += 1
+                return {"host": host, "status": entry["status"], "addresses": entry["addresses"],
+                        "ttl": round(entry["expires"] - time.time()), "ms": 0.0, "cached": True}
+            self.stats["lookups"] += 1
+
+        with tracing.span("dns", host=host) as s:
+            status, addresses, ttl = await self._lookup(host)
+            s.set(status=status)
+        if status in CACHEABLE:
+            ttl = min(ttl if ttl is not None else (DEFAULT_TTL if status == "ok" else NEGATIVE_TTL), MAX_TTL)
+            with self.lock:
+                self.cache[host] = {"status": status, "addresses": addresses, "expires": time.time() + ttl}
+                self.dirty = True
+        return {"host": host, "status": status, "addresses": addresses, "ttl": ttl,
+                "ms": round((time.perf_counter() - start) * 1000, 1), "cached": False}
+
+    async def _lookup(self, host):
+        if self.nameservers and host != "localhost":
+            # A and AAAA asked together; a host with only one of them is still alive
+            (status, v4, ttl4), (status6, v6, ttl6) = await asyncio.gather(
+                self._query(host, TYPE_A), self._query(host, TYPE_AAAA))
+            addresses = v4 + v6
+            ttls = [t for t in (ttl4, ttl6) if t is not None]
+            ttl = min(ttls) if ttls else None
+            statuses = (status, status6)
+            if addresses:
+                status = "ok"
+            elif "nxdomain" in statuses:
+                status = "nxdomain"
+            elif statuses != ("nodata", "nodata"):
+                # Timeout/SERVFAIL on one of them: the domain's state is unknown
+                status = next(s for s in statuses if s != "nodata")
+            if status == "error":
+                return await self._system(host)
+            return status, addresses, ttl
+        return await self._system(host)
+
+    async def resolve_many(self, hosts):
+        unique = list(dict.fromkeys(h.lower().rstrip(".") for h in hosts))
+        answers = await asyncio.gather(*(self.resolve(h) for h in unique))
+        return dict(zip(unique, answers))
+
+    def resolve_all(self, hosts):
+        """Resolve hosts concurrently from synchronous code; {host: answer}."""
+        answers = asyncio.run(self.resolve_many(hosts))
+        self.save()
+        return answers
+
+    def save(self):
+        if not self.cache_path or not self.dirty:
+            return
+        now = time.time()
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        with self.lock:
+            live = {host: entry for host, entry in self.cache.items() if entry["expires"] > now}
+            self.dirty = False
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(live, f, indent=1)
+        os.replace(tmp, self.cache_path)
+
+# Addresses handed to the HTTP phase, so urllib3 connects without resolving again.
+# host -> (addresses, monotonic expiry); an expired pin falls back to normal resolution.
+_pins = {}
+_pins_lock = threading.Lock()
+_installed = False
+
+def pin(host, addresses, ttl=None):
+    global _installed
+    expires = time.monotonic() + (ttl if ttl is not None else DEFAULT_TTL)
+    with _pins_lock:
+        _pins[host.lower()] = (list(addresses), expires)
+        if _installed:
+            return
+        # urllib3 looks create_connection up on this module for every new connection.
+        # TLS still uses the host name for SNI and certificate checks. The wrapper stays
+        # installed (tracing may have wrapped it in turn) and passes through without pins.
+        import urllib3.util.connection as connection
+        original = connection.create_connection
+
+        def create_connection(address, *args, **kwargs):
+            host, port = address
+            for pinned in pinned_addresses(host):
+                try:
+                    return original((pinned, port), *args, **kwargs)
+                except OSError:
+                    continue
+            return original(address, *args, **kwargs)
+
+        connection.create_connection = create_connection
+        _installed = True
+
+def pinned_addresses(host):
+    with _pins_lock:
+        addresses, expires = _pins.get(host.lower(), ((), 0))
+        if expires <= time.monotonic():
+            _pins.pop(host.lower(), None)
+            return ()
+        return addresses
+
+def unpin():
+    # Each run starts from its own DNS stage; a long-lived worker (cli.py worker) must not reuse the last one's
+    with _pins_lock:
+        _pins.clear()
+
+def add_arguments(parser):
+    parser.add_argument("--nameserver", action="append", type=parse_nameserver,
+                        help="DNS server host[:port] to query (default: those in /etc/resolv.conf)")
+    parser.add_argument("--dns-cache", default=CACHE_PATH, help="file DNS answers are kept in between runs")
+    parser.add_argument("--no-dns-cache", action="store_true")
+
+def from_args(args):
+    return Resolver(args.nameserver, cache_path=None if args.no_dns_cache else args.dns_cache)
+
+def configure(args):
+    unpin()
+    return from_args(args)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Resolve host names concurrently through the audit DNS stage.")
+    parser.add_argument("hosts", nargs="+")
+    add_arguments(parser)
+    args = parser.parse_args()
+    resolver = from_args(args)
+    start = time.perf_counter()
+    answers = resolver.resolve_all(args.hosts)
+    print(json.dumps({"answers": list(answers.values()), "wall_ms": round((time.perf_counter() - start) * 1000, 1)}, indent=2))
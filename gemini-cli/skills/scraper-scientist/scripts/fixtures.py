@@ -0,0 +1,97 @@
+import json
+import gzip
+import base64
+import threading
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from http_cache import DROPPED_HEADERS
+
+# Usage: python fixtures.py <archive.jsonl.gz>
+# A fixture archive is gzip-compressed JSONL, one full response per line:
+#   {"method", "url", "status", "reason", "headers", "body" (base64)}
+# Re-recording the same method/URL keeps only the newest response.
+
+class FixtureArchive:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.records = {}
+
+    @classmethod
+    def load(cls, path):
+        archive = cls(path)
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    archive.records[(record["method"], record["url"])] = record
+        return archive
+
+    def add(self, method, url, response):
+        record = {
+            "method": method,
+            "url": url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS},
+            "body": base64.b64encode(response.content).decode('ascii'),
+        }
+        with self.lock:
+            self.records[(method, url)] = record
+
+    def get(self, method, url):
+        return self.records.get((method, url))
+
+    def bodies(self):
+        for record in self.records.values():
+            yield record["url"], base64.b64decode(record["body"])
+
+    def save(self):
+        with self.lock:
+            with gzip.open(self.path, 'wt', encoding='utf-8') as f:
+                for record in self.records.values():
+                    f.write(json.dumps(record) + "\n")
+
+def build_response(record, request):
+    response = requests.Response()
+    response.status_code = record["status"]
+    response.reason = record.get("reason") or ""
+    response.headers = CaseInsensitiveDict(record["headers"])
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response._content = base64.b64decode(record["body"])
+    response._content_consumed = True
+    response.url = request.url
+    response.request = request
+    return response
+
+class RecordingAdapter(HTTPAdapter):
+    def __init__(self, archive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        # Reading .content here buffers the body so the caller still sees it afterwards
+        self.archive.add(request.method, request.url, response)
+        return response
+
+class ReplayAdapter(BaseAdapter):
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        record = self.archive.get(request.method, request.url)
+        if record is None:
+            raise requests.ConnectionError(f"No fixture recorded for {request.method} {request.url}", request=request)
+        return build_response(record, request)
+
+    def close(self):
+        pass
+
+if __name__ == "__main__":
+    import sys
+    archive = FixtureArchive.load(sys.argv[1])
+    for (method, url), record in archive.records.items():
+        print(f"{record['status']} {method} {url} ({len(base64.b64decode(record['body']))} bytes)")
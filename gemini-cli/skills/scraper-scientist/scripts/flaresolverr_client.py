@@ -0,0 +1,331 @@
+import time
+import uuid
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import urlsplit
+
+import http_client
+import clearance
+
+# Usage: python flaresolverr_client.py [--solver-url URL] [--workers 4] url [url ...]
+# FlareSolverr client that keeps browser sessions alive (sessions.create) instead of
+# a one-off request.get per page, which launches a fresh browser context every time.
+# Sessions are pooled per domain, so each keeps that site's clearance, and pages are
+# dispatched to them concurrently. Once a solve has produced clearance cookies the
+# domain is fetched over plain HTTP with the browser's User-Agent; the browser is
+# only used again when those cookies stop working.
+
+SOLVER_URL = "http://localhost:8191/v1"
+# Milliseconds FlareSolverr may spend on one challenge
+MAX_TIMEOUT = 60000
+SESSIONS_PER_DOMAIN = 2
+# Every session is a browser; this bounds them across all domains
+MAX_SESSIONS = 6
+# Sessions are replaced after this long or this many pages, before the browser bloats
+SESSION_MAX_AGE = 20 * 60
+SESSION_MAX_REQUESTS = 200
+MAX_WORKERS = 4
+# Clearance rejected within this many seconds of the solve means plain HTTP cannot use it at all
+FRESH_CLEARANCE = 60
+
+class SolverError(Exception):
+    pass
+
+class SolverSession:
+    def __init__(self, session_id, domain):
+        self.id = session_id
+        self.domain = domain
+        self.created = time.monotonic()
+        self.requests = 0
+
+    def stale(self, max_age=SESSION_MAX_AGE, max_requests=SESSION_MAX_REQUESTS):
+        return time.monotonic() - self.created > max_age or self.requests >= max_requests
+
+class SessionPool:
+    """Solver sessions per domain, created on demand and recycled once stale."""
+
+    def __init__(self, client, per_domain=SESSIONS_PER_DOMAIN, max_sessions=MAX_SESSIONS,
+                 max_age=SESSION_MAX_AGE, max_requests=SESSION_MAX_REQUESTS):
+        self.client = client
+        self.per_domain = per_domain
+        self.max_sessions = max_sessions
+        self.max_age = max_age
+        self.max_requests = max_requests
+        self.cond = threading.Condition()
+        self.idle = {}
+        self.owned = {}
+        self.total = 0
+        self.created = 0
+        self.recycled = 0
+
+    def _retire(self, session, retired):
+        # Called with the lock held; the browser is closed after it is released
+        self.owned[session.domain] -= 1
+        self.total -= 1
+        self.recycled += 1
+        retired.append(session)
+
+    def _evict_idle(self, retired):
+        # Oldest idle session of any domain makes room for a domain without one
+        candidates = [s for sessions in self.idle.values() for s in sessions]
+        if not candidates:
+            return False
+        oldest = min(candidates, key=lambda s: s.created)
+        self.idle[oldest.domain].remove(oldest)
+        self._retire(oldest, retired)
+        return True
+
+    def acquire(self, domain):
+        retired = []
+        try:
+            with self.cond:
+                while True:
+                    idle = self.idle.setdefault(domain, [])
+                    while idle:
+                        session = idle.pop()
+                        if not session.stale(self.max_age, self.max_requests):
+                            return session
+                        self._retire(session, retired)
+                    if self.owned.get(domain, 0) < self.per_domain and \
+                            (self.total < self.max_sessions or self._evict_idle(retired)):
+                        self.owned[domain] = self.owned.get(domain, 0) + 1
+                        self.total += 1
+                        break
+                    self.cond.wait()
+        finally:
+            self._destroy(retired)
+
+        # Launching the browser is slow, others keep using the pool meanwhile
+        try:
+            session = SolverSession(self.client.create_session(), domain)
+        except Exception:
+            with self.cond:
+                self.owned[domain] -= 1
+                self.total -= 1
+                self.cond.notify_all()
+            raise
+        with self.cond:
+            self.created += 1
+        return session
+
+    def release(self, session, broken=False):
+        retired = []
+        with self.cond:
+            if broken or session.stale(self.max_age, self.max_requests):
+                self._retire(session, retired)
+            else:
+                self.idle.setdefault(session.domain, []).append(session)
+            self.cond.notify_all()
+        self._destroy(retired)
+
+    def _destroy(self, sessions):
+        for session in sessions:
+            try:
+                self.client.destroy_session(session.id)
+            except (SolverError, requests.RequestException):
+                pass # FlareSolverr drops it on restart anyway
+
+    def close(self):
+        with self.cond:
+            sessions = [s for idle in self.idle.values() for s in idle]
+            self.idle = {}
+        for session in sessions:
+            try:
+                self.client.destroy_session(session.id)
+            except (SolverError, requests.RequestException):
+                pass
+
+def solution_response(solution, url):
+    response = requests.Response()
+    response.status_code = solution.get("status") or 200
+    response.reason = ""
+    response.url = solution.get("url") or url
+    response.headers = CaseInsensitiveDict(solution.get("headers") or {})
+    response.encoding = "utf-8"
+    response._content = (solution.get("response") or "").encode('utf-8')
+    response._content_consumed = True
+    response.from_solver = True
+    return response
+
+class FlareSolverrClient:
+    def __init__(self, solver_url=SOLVER_URL, max_timeout=MAX_TIMEOUT, per_domain=SESSIONS_PER_DOMAIN,
+                 max_sessions=MAX_SESSIONS, max_workers=MAX_WORKERS, plain_http=True):
+        self.solver_url = solver_url
+        self.max_timeout = max_timeout
+        self.max_workers = max_workers
+        self.plain_http = plain_http
+        self.pool = SessionPool(self, per_domain, max_sessions)
+        # The solver API is local; it must not be throttled like a scraped site
+        self.api_session = requests.Session()
+        self.api_session.mount("http://", HTTPAdapter(pool_maxsize=max(max_sessions, max_workers)))
+        self.lock = threading.Lock()
+        # Per domain: a plain requests session carrying the browser's clearance and User-Agent
+        self.plain = {}
+        self.solving = {}
+        # Domains whose clearance does not carry over to plain HTTP (e.g. TLS fingerprinting)
+        self.browser_only = set()
+        self.stats = {"solver": 0, "plain": 0, "plain_rejected": 0}
+
+    def command(self, payload, timeout=None):
+        response = self.api_session.post(self.solver_url, json=payload,
+                                         timeout=timeout or self.max_timeout / 1000 + 10)
+        data = response.json()
+        if data.get("status") != "ok":
+            raise SolverError(f"{payload['cmd']}: {data.get('message', response.status_code)}")
+        return data
+
+    def create_session(self):
+        return self.command({"cmd": "sessions.create", "session": uuid.uuid4().hex})["session"]
+
+    def destroy_session(self, session_id):
+        self.command({"cmd": "sessions.destroy", "session": session_id})
+
+    def _solve(self, url, domain):
+        session = self.pool.acquire(domain)
+        broken = True
+        try:
+            data = self.command({"cmd": "request.get", "url": url, "session": session.id, "maxTimeout": self.max_timeout})
+            session.requests += 1
+            solution = data["solution"]
+            response = solution_response(solution, url)
+            # A session still stuck on the challenge will not get past it on the next page either
+            broken = clearance.is_challenge(response)
+        finally:
+            self.pool.release(session, broken)
+        with self.lock:
+            self.stats["solver"] += 1
+        if not broken and self.plain_http:
+            self._keep_clearance(url, domain, solution)
+        return response
+
+    def _keep_clearance(self, url, domain, solution):
+        # Kept even without Cloudflare cookies: a site that never challenged needs no browser either
+        cookies = solution.get("cookies") or []
+        session = http_client.create_session()
+        session.headers["User-Agent"] = solution.get("userAgent") or session.headers["User-Agent"]
+        for c in cookies:
+            session.cookies.set(c["name"], c["value"], domain=c.get("domain") or domain, path=c.get("path") or "/")
+        if clearance._store:
+            clearance._store.remember(session, url)
+        with self.lock:
+            self.plain[domain] = session, time.monotonic()
+
+    def _plain_session(self, url, domain):
+        with self.lock:
+            if domain in self.browser_only:
+                return None
+            entry = self.plain.get(domain)
+        if entry or not clearance._store:
+            return entry
+        # Clearance from an earlier run, sent with the browser User-Agent it was stored with
+        session = http_client.create_session()
+        entry = clearance._store.apply(session, url)
+        if not entry:
+            return None
+        # This session only ever fetches this domain, so the UA can live on it
+        session.headers["User-Agent"] = entry.get("user_agent") or session.headers["User-Agent"]
+        with self.lock:
+            # Its age is unknown, a rejection says nothing about plain HTTP in general
+            return self.plain.setdefault(domain, (session, 0.0))
+
+    def _try_plain(self, url, domain, **kwargs):
+        """The response over plain HTTP, or None when the domain has no clearance that works."""
+        entry = self._plain_session(url, domain)
+        if not entry:
+            return None
+        session, obtained = entry
+        response = http_client.get(url, session=session, **kwargs)
+        if response.status_code != 403 and not clearance.is_challenge(response):
+            with self.lock:
+                self.stats["plain"] += 1
+            return response
+        with self.lock:
+            self.stats["plain_rejected"] += 1
+            if self.plain.get(domain) is entry:
+                del self.plain[domain]
+            if time.monotonic() - obtained < FRESH_CLEARANCE:
+                # e.g. TLS fingerprinting: this site needs the browser for every page
+                self.browser_only.add(domain)
+        if clearance._store:
+            clearance._store.forget(session, url)
+        return None
+
+    def get(self, url, **kwargs):
+        """Fetch url through plain HTTP when the domain has clearance, through a solver session otherwise."""
+        domain = urlsplit(url).hostname
+        if not self.plain_http:
+            return self._solve(url, domain)
+        response = self._try_plain(url, domain, **kwargs)
+        if response is not None:
+            return response
+        with self.lock:
+            if domain in self.browser_only:
+                gate = None
+            else:
+                gate = self.solving.setdefault(domain, threading.Lock())
+        if gate is None:
+            return self._solve(url, domain)
+        # Without clearance one page per domain is solved at a time; those queued behind it go plain
+        with gate:
+            response = self._try_plain(url, domain, **kwargs)
+            if response is not None:
+                return response
+            return self._solve(url, domain)
+
+    def get_many(self, urls, **kwargs):
+        """Responses (or the exception raised) for urls, in order, fetched max_workers at a time."""
+        def fetch(url):
+            try:
+                return self.get(url, **kwargs)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(fetch, urls))
+
+    def close(self):
+        self.pool.close()
+        self.api_session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def add_arguments(parser):
+    group = parser.add_argument_group("flaresolverr")
+    group.add_argument("--solver-url", default=SOLVER_URL, help="FlareSolverr API endpoint")
+    group.add_argument("--solver-sessions", type=int, default=SESSIONS_PER_DOMAIN, help="browser sessions per domain")
+    group.add_argument("--solver-max-sessions", type=int, default=MAX_SESSIONS, help="browser sessions across all domains")
+    group.add_argument("--no-plain-http", action="store_true", help="send every page through the browser")
+
+def from_args(args, max_workers=MAX_WORKERS):
+    return FlareSolverrClient(args.solver_url, per_domain=args.solver_sessions, max_sessions=args.solver_max_sessions,
+                              max_workers=max_workers, plain_http=not args.no_plain_http)
+
+if __name__ == "__main__":
+    import json
+    import argparse
+    parser = argparse.ArgumentParser(description="Fetch pages through pooled FlareSolverr sessions.")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    add_arguments(parser)
+    http_client.add_arguments(parser)
+    clearance.add_arguments(parser)
+    args = parser.parse_args()
+    http_client.configure(args)
+    clearance.configure(args)
+    start = time.perf_counter()
+    with from_args(args, args.workers) as client:
+        for url, response in zip(args.urls, client.get_many(args.urls)):
+            if isinstance(response, Exception):
+                print(f"❌ {url}: {response}")
+            else:
+                via = "browser" if getattr(response, "from_solver", False) else "plain"
+                print(f"{'✅' if response.status_code == 200 else '⚠️'} {url}: {response.status_code}, {len(response.content)} bytes via {via}")
+        print(json.dumps({**client.stats, "sessions_created": client.pool.created, "sessions_recycled": client.pool.recycled,
+                          "seconds": round(time.perf_counter() - start, 3)}, indent=2))
@@ -0,0 +1,250 @@
+import os
+import re
+import csv
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+
+import http_client
+
+# Usage: python health_store.py [--db FILE] report [--since 7d] [--source NAME] [--script NAME] [--json]
+#        python health_store.py [--db FILE] export [--since 30d] [--format csv|json] [--out FILE]
+#        python health_store.py [--db FILE] prune --older-than 90d
+# The audit scripts append one row per source and run here (per-phase latency,
+# status, chapter count, bytes) instead of only printing their report, so slow,
+# degrading or flapping sources show up across runs. Rows recorded while
+# replaying fixtures or serving from the cache are kept but left out of reports
+# unless --all-modes is given, since their timings say nothing about the site.
+
+DB_PATH = os.path.join(os.path.expanduser("~"), ".cache", "noveldokusha-scraper", "health.sqlite3")
+
+# Per-phase timings in milliseconds, None when a script does not measure it
+PHASES = ("dns_ms", "connect_ms", "ttfb_ms", "parse_ms", "total_ms")
+FIELDS = ("url", "status", "http_status", *PHASES, "chapters", "bytes")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    script TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    started REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    ts REAL NOT NULL,
+    source TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    url TEXT,
+    status TEXT,
+    http_status INTEGER,
+    dns_ms REAL,
+    connect_ms REAL,
+    ttfb_ms REAL,
+    parse_ms REAL,
+    total_ms REAL,
+    chapters INTEGER,
+    bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS samples_source_ts ON samples(source, ts);
+CREATE INDEX IF NOT EXISTS samples_ts ON samples(ts);
+"""
+
+# A source is degrading when the median of the later half of its window is this much slower
+DEGRADING_RATIO = 1.5
+
+def percentile(values, p):
+    # Nearest-rank, so small run counts report an observed value
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, -(-p * len(ordered) // 100))
+    return ordered[rank - 1]
+
+def parse_window(text):
+    """Seconds in a window such as 90m, 24h, 7d or 2w."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*', text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"not a time window: {text!r} (e.g. 24h, 7d)")
+    unit = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}[match.group(2)]
+    return float(match.group(1)) * unit
+
+class HealthStore:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pending = []
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def record(self, source, ok, **fields):
+        """Queue one sample; rows are written together by commit()."""
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"unknown health fields: {', '.join(sorted(unknown))}")
+        with self.lock:
+            self.pending.append((time.time(), source, int(bool(ok)), *(fields.get(f) for f in FIELDS)))
+
+    def commit(self, script, mode="live", started=None):
+        # One transaction per run, so an audit of many sources costs a single fsync
+        with self.lock:
+            rows, self.pending = self.pending, []
+        if not rows:
+            return 0
+        with self.db:
+            run_id = self.db.execute("INSERT INTO runs (script, mode, started) VALUES (?, ?, ?)",
+                                     (script, mode, started or rows[0][0])).lastrowid
+            self.db.executemany(f"INSERT INTO samples (run_id, ts, source, ok, {', '.join(FIELDS)}) "
+                                f"VALUES (?, {', '.join('?' * (len(FIELDS) + 3))})",
+                                [(run_id, *row) for row in rows])
+        return len(rows)
+
+    def samples(self, since=None, source=None, script=None, all_modes=False):
+        where, params = ["samples.ts >= ?"], [time.time() - since if since else 0]
+        if source:
+            where.append("samples.source = ?")
+            params.append(source)
+        if script:
+            where.append("runs.script = ?")
+            params.append(script)
+        if not all_modes:
+            where.append("runs.mode = 'live'")
+        cursor = self.db.execute(
+            f"SELECT samples.*, runs.script, runs.mode FROM samples JOIN runs ON runs.id = samples.run_id "
+            f"WHERE {' AND '.join(where)} ORDER BY samples.source, samples.ts", params)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def report(self, **query):
+        """Per source: sample count, success rate, flaps, p50/p95 of every phase, trend."""
+        by_source = {}
+        for sample in self.samples(**query):
+            by_source.setdefault(sample["source"], []).append(sample)
+        report = []
+        for source, samples in by_source.items():
+            entry = {
+                "source": source,
+                "samples": len(samples),
+                "ok_rate": round(sum(s["ok"] for s in samples) / len(samples), 3),
+                # Times the status changed between consecutive runs
+                "flaps": sum(a["status"] != b["status"] for a, b in zip(samples, samples[1:])),
+                "last_status": samples[-1]["status"],
+                "last_chapters": samples[-1]["chapters"],
+            }
+            for phase in PHASES:
+                values = [s[phase] for s in samples if s[phase] is not None]
+                entry[f"{phase}_p50"] = percentile(values, 50)
+                entry[f"{phase}_p95"] = percentile(values, 95)
+            totals = [s["total_ms"] for s in samples if s["total_ms"] is not None]
+            half = len(totals) // 2
+            entry["degrading"] = bool(half) and \
+                percentile(totals[half:], 50) > DEGRADING_RATIO * percentile(totals[:half], 50)
+            report.append(entry)
+        # Slowest first
+        return sorted(report, key=lambda e: -(e["total_ms_p95"] or 0))
+
+    def prune(self, older_than):
+        with self.db:
+            removed = self.db.execute("DELETE FROM samples WHERE ts < ?", (time.time() - older_than,)).rowcount
+            self.db.execute("DELETE FROM runs WHERE id NOT IN (SELECT DISTINCT run_id FROM samples)")
+        self.db.execute("VACUUM")
+        return removed
+
+_store = None
+_script = None
+_started = None
+
+def enable(script, path=DB_PATH):
+    global _store, _script, _started
+    _store = HealthStore(path)
+    _script = script
+    _started = time.time()
+    http_client.on_teardown(flush)
+    return _store
+
+def record(source, ok, **fields):
+    if _store:
+        _store.record(source, ok, **fields)
+
+def flush():
+    if _store:
+        _store.commit(_script, http_client.mode(), _started)
+
+def add_arguments(parser):
+    parser.add_argument("--health-db", default=DB_PATH, help="SQLite file the per-source results are appended to")
+    parser.add_argument("--no-health", action="store_true", help="do not record this run's results")
+
+def configure(args, script):
+    global _store
+    _store = None
+    if not args.no_health:
+        enable(script, args.health_db)
+
+def elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 1)
+
+def format_ms(value):
+    return "-" if value is None else f"{value:.0f}"
+
+def print_report(report):
+    print(f"{'source':<24}{'n':>5}{'ok':>7}{'flaps':>6}{'ttfb p50':>10}{'p95':>7}{'total p50':>11}{'p95':>7}  last")
+    for e in report:
+        trend = " 📈 degrading" if e["degrading"] else ""
+        print(f"{e['source']:<24}{e['samples']:>5}{e['ok_rate']:>7.0%}{e['flaps']:>6}"
+              f"{format_ms(e['ttfb_ms_p50']):>10}{format_ms(e['ttfb_ms_p95']):>7}"
+              f"{format_ms(e['total_ms_p50']):>11}{format_ms(e['total_ms_p95']):>7}  {e['last_status']}{trend}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the source health history written by the audit scripts.")
+    parser.add_argument("--db", default=DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("report", "export"):
+        command = commands.add_parser(name)
+        command.add_argument("--since", type=parse_window, default=parse_window("7d" if name == "report" else "30d"),
+                             help="time window, e.g. 24h, 7d")
+        command.add_argument("--source")
+        command.add_argument("--script", help="only runs of this audit script, e.g. deep_audit.py")
+        command.add_argument("--all-modes", action="store_true", help="include replayed and cached runs")
+    commands.choices["report"].add_argument("--json", action="store_true")
+    commands.choices["export"].add_argument("--format", choices=("csv", "json"), default="csv")
+    commands.choices["export"].add_argument("--out", help="file to write (default: stdout)")
+    prune = commands.add_parser("prune")
+    prune.add_argument("--older-than", type=parse_window, required=True)
+    args = parser.parse_args()
+
+    store = HealthStore(args.db)
+    if args.command == "prune":
+        print(f"🧹 Removed {store.prune(args.older_than)} samples")
+        return
+    query = {"since": args.since, "source": args.source, "script": args.script, "all_modes": args.all_modes}
+    if args.command == "report":
+        report = store.report(**query)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        elif report:
+            print_report(report)
+        else:
+            print("No samples in this window.")
+        return
+
+    # Flat rows for spreadsheets and dashboards
+    rows = store.samples(**query)
+    out = open(args.out, 'w', newline='', encoding='utf-8') if args.out else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump(rows, out, indent=1)
+            out.write("\n")
+        else:
+            writer = csv.DictWriter(out, fieldnames=["ts", "source", "ok", *FIELDS, "script", "mode", "run_id"])
+            writer.writeheader()
+            writer.writerows(rows)
+    finally:
+        if args.out:
+            out.close()
+
+if __name__ == "__main__":
+    main()
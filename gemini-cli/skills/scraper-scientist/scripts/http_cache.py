@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import Counter
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Usage: python http_cache.py [--cache-dir DIR] (stats|clear)
+# Bodies are stored once per SHA-256 under blobs/, index.json maps each URL to
+# its validators (ETag/Last-Modified), headers and body hash.
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "noveldokusha-scraper", "http")
+TTL = 6 * 3600
+MAX_BYTES = 256 * 1024 * 1024
+
+# Bodies are stored decoded, so transport framing headers no longer apply
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+class OfflineMiss(requests.ConnectionError):
+    pass
+
+class HttpCache:
+    def __init__(self, directory=CACHE_DIR, ttl=TTL, max_bytes=MAX_BYTES, offline=False):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        # Hits, misses and revalidations only change the index in memory; close() writes it once
+        # (a blob evicted meanwhile is treated as a miss by lookup())
+        self.dirty = False
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self.index_path = os.path.join(directory, "index.json")
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(f"GET {url}".encode('utf-8')).hexdigest()
+
+    def blob_path(self, digest):
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    def lookup(self, url):
+        with self.lock:
+            entry = self.index.get(self.key(url))
+            if entry and not os.path.exists(self.blob_path(entry["body"])):
+                del self.index[self.key(url)]
+                return None
+            return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry["stored"] < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def respond(self, entry, url):
+        with open(self.blob_path(entry["body"]), 'rb') as f:
+            body = f.read()
+        with self.lock:
+            self.hits += 1
+            entry["used"] = time.time()
+            self.dirty = True
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = "OK"
+        response.url = url
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = body
+        response._content_consumed = True
+        response.from_cache = True
+        return response
+
+    def touch(self, entry, response):
+        # 304 Not Modified: the stored body is still valid, restart its TTL
+        with self.lock:
+            self.revalidated += 1
+            entry["stored"] = time.time()
+            entry["etag"] = response.headers.get("ETag", entry.get("etag"))
+            entry["last_modified"] = response.headers.get("Last-Modified", entry.get("last_modified"))
+            self.dirty = True
+
+    def store(self, url, response):
+        if response.status_code != 200:
+            return
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, path)
+        now = time.time()
+        with self.lock:
+            self.index[self.key(url)] = {
+                "url": url,
+                "status": response.status_code,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS},
+                "body": digest,
+                "size": len(body),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "stored": now,
+                "used": now,
+            }
+            self._evict()
+            self.dirty = True
+
+    def fetch(self, session, url, **kwargs):
+        entry = self.lookup(url)
+        if entry and (self.offline or self.is_fresh(entry)):
+            return self.respond(entry, url)
+        if self.offline:
+            raise OfflineMiss(f"Not cached (offline mode): {url}")
+
+        with self.lock:
+            self.misses += 1
+        if entry:
+            kwargs["headers"] = {**self.conditional_headers(entry), **kwargs.get("headers", {})}
+        response = session.get(url, **kwargs)
+        if entry and response.status_code == 304:
+            self.touch(entry, response)
+            return self.respond(entry, url)
+        # Storing reads the whole body, which would undo stream=True; streamed pages are not cached
+        if not kwargs.get("stream"):
+            self.store(url, response)
+        return response
+
+    def _evict(self):
+        # Least recently used entries go first; blobs are removed once nothing references them
+        bodies = self._unique_bodies()
+        total = sum(e["size"] for e in bodies.values())
+        if total <= self.max_bytes:
+            return
+        refs = Counter(e["body"] for e in self.index.values())
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]["used"]):
+            if total <= self.max_bytes:
+                break
+            del self.index[key]
+            refs[entry["body"]] -= 1
+            if refs[entry["body"]] == 0:
+                total -= entry["size"]
+                try:
+                    os.remove(self.blob_path(entry["body"]))
+                except OSError:
+                    pass
+
+    def _unique_bodies(self):
+        return {e["body"]: e for e in self.index.values()}
+
+    def close(self):
+        with self.lock:
+            if self.dirty:
+                self._save()
+
+    def _save(self):
+        self.dirty = False
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
+
+    def stats(self):
+        bodies = self._unique_bodies()
+        return {
+            "directory": self.directory,
+            "entries": len(self.index),
+            "blobs": len(bodies),
+            "bytes": sum(e["size"] for e in bodies.values()),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+        }
+
+    def clear(self):
+        with self.lock:
+            for entry in self._unique_bodies().values():
+                try:
+                    os.remove(self.blob_path(entry["body"]))
+                except OSError:
+                    pass
+            self.index = {}
+            self._save()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or clear the on-disk HTTP cache used by the probe/audit scripts.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("command", choices=["stats", "clear"])
+    args = parser.parse_args()
+    cache = HttpCache(args.cache_dir)
+    if args.command == "clear":
+        cache.clear()
+    print(json.dumps(cache.stats(), indent=2))
@@ -0,0 +1,201 @@
+import os
+import atexit
+import threading
+import traceback
+import requests
+from requests.adapters import HTTPAdapter
+import http_cache
+import fixtures
+import rate_scheduler
+import tracing
+
+# Single place for the identity and limits every probe/audit script uses.
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+SCRAPER_BROWSER = {'browser': 'chrome', 'platform': 'windows', 'mobile': False}
+TIMEOUT = 15
+
+# Hosts kept in the pool manager, and keep-alive connections kept per host
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 8
+
+def accept_encoding():
+    # requests only decodes brotli when one of the brotli packages is installed
+    for module in ("brotli", "brotlicffi"):
+        try:
+            __import__(module)
+            return "gzip, deflate, br"
+        except ImportError:
+            continue
+    return "gzip, deflate"
+
+def default_headers(referer=None):
+    headers = {
+        "User-Agent": USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Encoding": accept_encoding(),
+        "Connection": "keep-alive",
+    }
+    if referer:
+        headers["Referer"] = referer
+    return headers
+
+# Work deferred to the end of a run (fixtures, cache index, health rows, traces). It runs
+# at exit, or after every command in a long-lived worker (cli.py worker) via teardown().
+_teardown = []
+
+def on_teardown(func):
+    _teardown.append(func)
+    return func
+
+def teardown():
+    # Last registered first, as atexit would
+    while _teardown:
+        func = _teardown.pop()
+        try:
+            func()
+        except Exception:
+            traceback.print_exc()
+
+atexit.register(teardown)
+
+# Fixture archives set by --record/--replay; every session created afterwards uses them
+_record = None
+_replay = None
+# Per-host token buckets set by configure(); likewise applies to sessions created afterwards
+_scheduler = None
+
+def enable_record(path):
+    global _record
+    _record = fixtures.FixtureArchive.load(path) if os.path.exists(path) else fixtures.FixtureArchive(path)
+    on_teardown(_record.save)
+    return _record
+
+def enable_replay(path):
+    global _replay
+    _replay = fixtures.FixtureArchive.load(path)
+    return _replay
+
+def replaying():
+    return _replay is not None
+
+def mode():
+    # Where responses come from; timings are only meaningful for "live"
+    if _replay:
+        return "replay"
+    if _cache:
+        return "offline" if _cache.offline else "cache"
+    return "live"
+
+def mount_pools(session, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    if _replay:
+        adapter = fixtures.ReplayAdapter(_replay)
+    elif _record:
+        adapter = fixtures.RecordingAdapter(_record, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    if tracing.enabled():
+        # Inside the scheduler, so waiting for a token is not counted as time to first byte
+        adapter = tracing.TracedAdapter(adapter)
+    if _scheduler and not _replay:
+        adapter = rate_scheduler.ScheduledAdapter(adapter, _scheduler)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def create_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    session = requests.Session()
+    session.headers.update(default_headers())
+    return mount_pools(session, pool_connections, pool_maxsize)
+
+def create_scraper(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    # cloudscraper picks a User-Agent matching its TLS fingerprint, so only the encoding is overridden
+    import cloudscraper
+    scraper = cloudscraper.create_scraper(browser=SCRAPER_BROWSER)
+    scraper.headers["Accept-Encoding"] = accept_encoding()
+    return mount_pools(scraper, pool_connections, pool_maxsize)
+
+_session = None
+_session_lock = threading.Lock()
+_cache = None
+
+def enable_scheduler(scheduler=None):
+    global _scheduler
+    _scheduler = scheduler or rate_scheduler.RateScheduler()
+    return _scheduler
+
+def enable_cache(directory=http_cache.CACHE_DIR, ttl=http_cache.TTL, max_bytes=http_cache.MAX_BYTES, offline=False):
+    global _cache
+    _cache = http_cache.HttpCache(directory, ttl=ttl, max_bytes=max_bytes, offline=offline)
+    on_teardown(_cache.close)
+    return _cache
+
+CACHE_OPTIONS = {"cache": False, "offline": False, "cache_dir": http_cache.CACHE_DIR, "cache_ttl": http_cache.TTL,
+                 "cache_max_mb": http_cache.MAX_BYTES // (1024 * 1024)}
+
+def add_arguments(parser, cache=True):
+    # cache=False for scripts that check liveness, where a cached answer would say nothing
+    group = parser.add_argument_group("http")
+    if cache:
+        group.add_argument("--cache", action="store_true", help="serve repeated fetches from the on-disk response cache")
+        group.add_argument("--offline", action="store_true", help="only serve from the cache, never touch the network")
+        group.add_argument("--cache-dir", default=http_cache.CACHE_DIR)
+        group.add_argument("--cache-ttl", type=int, default=http_cache.TTL, help="seconds before a cached page is revalidated")
+        group.add_argument("--cache-max-mb", type=int, default=CACHE_OPTIONS["cache_max_mb"])
+    else:
+        parser.set_defaults(**CACHE_OPTIONS)
+    rate_scheduler.add_arguments(group)
+    fixture = group.add_mutually_exclusive_group()
+    fixture.add_argument("--record", metavar="ARCHIVE", help="save every response into a .jsonl.gz fixture archive")
+    fixture.add_argument("--replay", metavar="ARCHIVE", help="serve responses from a fixture archive instead of the network")
+
+# Options configure() was last called with; see configure()
+_configured = None
+
+def configure(args):
+    # A long-lived worker (cli.py worker) configures once per command: the same options
+    # keep the warm session, scraper and scheduler, different ones start over
+    global _configured, _record, _replay, _scheduler, _cache, _session, _scraper
+    options = tuple(getattr(args, name) for name in ("rate", "burst", "max_retries", "record", "replay", "cache",
+                                                     "offline", "cache_dir", "cache_ttl", "cache_max_mb"))
+    # Fixture archives are saved at exit, so a recording or replaying command always starts over
+    if options == _configured and not (args.record or args.replay):
+        if _cache:
+            on_teardown(_cache.close) # this run's hits are saved at its own end
+        return
+    _configured = options
+    _record = _replay = _scheduler = _cache = _session = _scraper = None
+    scheduler = rate_scheduler.from_args(args)
+    if scheduler:
+        enable_scheduler(scheduler)
+    if args.record:
+        enable_record(args.record)
+    if args.replay:
+        enable_replay(args.replay)
+    if args.cache or args.offline:
+        enable_cache(args.cache_dir, ttl=args.cache_ttl, max_bytes=args.cache_max_mb * 1024 * 1024, offline=args.offline)
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+_scraper = None
+
+def get_scraper():
+    # Shared cloudscraper session; creating one loads its browser profiles, which is not free
+    global _scraper
+    with _session_lock:
+        if _scraper is None:
+            _scraper = create_scraper()
+        return _scraper
+
+def get(url, referer=None, timeout=TIMEOUT, session=None, **kwargs):
+    session = session or get_session()
+    headers = kwargs.pop("headers", {})
+    if referer:
+        headers = {"Referer": referer, **headers}
+    if _cache:
+        return _cache.fetch(session, url, headers=headers, timeout=timeout, **kwargs)
+    return session.get(url, headers=headers, timeout=timeout, **kwargs)
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import clearance
+
+# Usage: python mock_flaresolverr.py [--port 8191] [--launch-delay 0.5] [--solve-delay 1.0] [--sites 3]
+# Stands in for FlareSolverr's /v1 API (sessions.create/destroy/list, request.get)
+# plus local Cloudflare-like sites to point it at. Starting a browser costs
+# --launch-delay, passing a challenge --solve-delay and rendering any page
+# --page-delay. Sessions keep their cookies like a real browser profile, while a
+# request.get without a session pays for a fresh browser every time.
+
+MOCK_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) HeadlessChrome/124.0.0.0 Safari/537.36"
+# Sent by the mock browser only, so a site can refuse anything that is not it
+BROWSER_HEADER = "X-Mock-Browser"
+
+def start_site(host="127.0.0.1", clearance_ttl=3600, browser_only=False):
+    """Site that serves a challenge until /solve hands out cf_clearance for the caller's User-Agent."""
+    tokens = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def reply(self, status, body, headers=()):
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            agent = self.headers.get("User-Agent", "")
+            if self.path == "/solve":
+                token = os.urandom(8).hex()
+                tokens[token] = agent
+                self.reply(200, b"solved", [("Set-Cookie", f"cf_clearance={token}; Max-Age={clearance_ttl}; Path=/")])
+                return
+            cookies = dict(c.strip().split("=", 1) for c in self.headers.get("Cookie", "").split(";") if "=" in c)
+            # Cloudflare binds clearance to the User-Agent that earned it; browser_only also fingerprints the client
+            cleared = tokens.get(cookies.get("cf_clearance")) == agent
+            if cleared and (not browser_only or self.headers.get(BROWSER_HEADER)):
+                body = f"<html><h1>Book</h1><a href='{self.path}'>chapter</a></html>".encode('utf-8')
+                self.reply(200, body, [("Content-Type", "text/html")])
+            else:
+                self.reply(403, b"<html><title>Just a moment...</title><script src='/cdn-cgi/challenge-platform/'></script></html>",
+                           [("Content-Type", "text/html"), ("cf-mitigated", "challenge")])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class MockBrowser:
+    # One session: a cookie jar that survives between pages, one page at a time
+    def __init__(self, launch_delay):
+        time.sleep(launch_delay)
+        self.http = requests.Session()
+        self.http.headers.update({"User-Agent": MOCK_USER_AGENT, BROWSER_HEADER: "1"})
+        self.lock = threading.Lock()
+
+def start_solver(port=8191, launch_delay=0.5, solve_delay=1.0, page_delay=0.2, host="127.0.0.1"):
+    sessions = {}
+    lock = threading.Lock()
+    counts = {"launches": 0, "solves": 0, "pages": 0}
+
+    def count(name):
+        with lock:
+            counts[name] += 1
+
+    def launch():
+        count("launches")
+        return MockBrowser(launch_delay)
+
+    def request_get(browser, payload):
+        url = payload["url"]
+        with browser.lock:
+            response = browser.http.get(url, timeout=payload.get("maxTimeout", 60000) / 1000)
+            if clearance.is_challenge(response):
+                count("solves")
+                time.sleep(solve_delay)
+                origin = url.split("/", 3)
+                browser.http.get(f"{origin[0]}//{origin[2]}/solve", timeout=10)
+                response = browser.http.get(url, timeout=10)
+            time.sleep(page_delay)
+            count("pages")
+            return {
+                "url": response.url,
+                "status": response.status_code,
+                "headers": dict(response.headers),
+                "response": response.text,
+                "cookies": [{"name": c.name, "value": c.value, "domain": c.domain, "path": c.path,
+                             "expires": c.expires or -1} for c in browser.http.cookies],
+                "userAgent": MOCK_USER_AGENT,
+            }
+
+    def handle(payload):
+        cmd = payload.get("cmd")
+        session_id = payload.get("session")
+        if cmd == "sessions.create":
+            browser = launch()
+            with lock:
+                sessions[session_id] = browser
+            return {"status": "ok", "message": "Session created successfully.", "session": session_id}
+        if cmd == "sessions.destroy":
+            with lock:
+                browser = sessions.pop(session_id, None)
+            if not browser:
+                return {"status": "error", "message": "The session doesn't exist."}
+            return {"status": "ok", "message": "The session has been removed."}
+        if cmd == "sessions.list":
+            with lock:
+                return {"status": "ok", "sessions": list(sessions)}
+        if cmd == "request.get":
+            if session_id:
+                with lock:
+                    browser = sessions.get(session_id)
+                if not browser:
+                    return {"status": "error", "message": "Session not found."}
+            else:
+                browser = launch() # What FlareSolverr does for every session-less request
+            return {"status": "ok", "message": "Challenge solved!", "solution": request_get(browser, payload)}
+        return {"status": "error", "message": f"Request parameter 'cmd' = '{cmd}' is invalid."}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            try:
+                data = handle(payload)
+            except requests.RequestException as e:
+                data = {"status": "error", "message": f"Error solving the challenge. {e}"}
+            body = json.dumps(data).encode('utf-8')
+            self.send_response(200 if data["status"] == "ok" else 500)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.counts = counts
+    server.sessions = sessions
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run a mock FlareSolverr and challenge-protected sites locally.")
+    parser.add_argument("--port", type=int, default=8191)
+    parser.add_argument("--launch-delay", type=float, default=0.5)
+    parser.add_argument("--solve-delay", type=float, default=1.0)
+    parser.add_argument("--page-delay", type=float, default=0.2)
+    parser.add_argument("--sites", type=int, default=3)
+    args = parser.parse_args()
+    solver = start_solver(args.port, args.launch_delay, args.solve_delay, args.page_delay)
+    # Separate loopback addresses, so every site gets its own cookies
+    sites = [start_site(f"127.0.0.{i + 1}") for i in range(args.sites)]
+    print(f"🧪 Mock FlareSolverr on http://127.0.0.1:{solver.server_address[1]}/v1")
+    for site in sites:
+        print(f"   site: http://{site.server_address[0]}:{site.server_address[1]}/")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps(solver.counts))
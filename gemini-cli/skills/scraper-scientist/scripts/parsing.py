@@ -0,0 +1,114 @@
+from functools import lru_cache
+
+import tracing
+
+# Parsing backends selectable per run with --parser. Selectors are compiled once
+# per (backend, selector) and reused for every page parsed afterwards.
+BACKENDS = ("lxml", "selectolax", "html.parser")
+
+def available_backends():
+    found = []
+    for backend, module in (("lxml", "lxml.cssselect"), ("selectolax", "selectolax.lexbor"), ("html.parser", "bs4")):
+        try:
+            __import__(module)
+            found.append(backend)
+        except ImportError:
+            continue
+    return found
+
+def default_backend():
+    backends = available_backends()
+    return backends[0] if backends else "html.parser"
+
+class Element:
+    def __init__(self, node, backend):
+        self.node = node
+        self.backend = backend
+
+    def text(self):
+        # Same result as BeautifulSoup's get_text(strip=True) on every backend
+        if self.backend == "html.parser":
+            return self.node.get_text(strip=True)
+        if self.backend == "lxml":
+            return "".join(s.strip() for s in self.node.itertext())
+        return self.node.text(strip=True)
+
+    def attr(self, name):
+        if self.backend == "selectolax":
+            return self.node.attributes.get(name)
+        return self.node.get(name)
+
+class Document:
+    def __init__(self, root, backend):
+        self.root = root
+        self.backend = backend
+
+    def select(self, selector):
+        with tracing.span("select", selector=selector) as s:
+            nodes = self._select(selector)
+            s.set(matches=len(nodes))
+        return nodes
+
+    def _select(self, selector):
+        if self.backend == "selectolax":
+            # lexbor returns a node once per matching selector in a group, drop the repeats
+            seen = set()
+            nodes = [n for n in self.root.css(selector) if not (n.mem_id in seen or seen.add(n.mem_id))]
+        elif self.backend == "lxml":
+            nodes = compile_selector(selector, "lxml")(self.root)
+        else:
+            nodes = compile_selector(selector, "html.parser").select(self.root)
+        return [Element(n, self.backend) for n in nodes]
+
+    def select_one(self, selector):
+        with tracing.span("select", selector=selector) as s:
+            element = self._select_one(selector)
+            s.set(matches=int(element is not None))
+        return element
+
+    def _select_one(self, selector):
+        if self.backend == "selectolax":
+            node = self.root.css_first(selector)
+        elif self.backend == "lxml":
+            nodes = compile_selector(selector, "lxml")(self.root)
+            node = nodes[0] if nodes else None
+        else:
+            node = compile_selector(selector, "html.parser").select_one(self.root)
+        return Element(node, self.backend) if node is not None else None
+
+@lru_cache(maxsize=512)
+def compile_selector(selector, backend):
+    if backend == "lxml":
+        from lxml.cssselect import CSSSelector
+        return CSSSelector(selector)
+    if backend == "html.parser":
+        import soupsieve
+        return soupsieve.compile(selector)
+    # selectolax (lexbor) parses selectors natively, there is nothing to keep
+    return selector
+
+def compile_selectors(selectors, backend):
+    for selector in selectors.values():
+        compile_selector(selector, backend)
+
+def parse(html, backend=None):
+    backend = backend or default_backend()
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    with tracing.span("parse", backend=backend, bytes=len(html)):
+        return _parse(html, backend)
+
+def _parse(html, backend):
+    if backend == "lxml":
+        import lxml.html
+        # lxml refuses empty input, an empty page simply matches nothing
+        return Document(lxml.html.document_fromstring(html or b"<html></html>"), backend)
+    if backend == "selectolax":
+        from selectolax.lexbor import LexborHTMLParser
+        return Document(LexborHTMLParser(html), backend)
+    from bs4 import BeautifulSoup
+    return Document(BeautifulSoup(html, 'html.parser'), backend)
+
+def add_arguments(parser):
+    parser.add_argument("--parser", choices=BACKENDS, default=None,
+                        help=f"HTML parsing backend (default: first available of {', '.join(BACKENDS)})")
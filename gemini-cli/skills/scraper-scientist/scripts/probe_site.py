@@ -1,27 +1,28 @@
-import sys
-import requests
-from bs4 import BeautifulSoup
+import http_client
+import parsing
+import tracing
 import json
+import argparse
 
-def probe(url, selectors):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Referer': url
-    }
+def probe(url, selectors, backend=None):
+    with tracing.span("probe", url=url):
+        return probe_page(url, selectors, backend)
+
+def probe_page(url, selectors, backend=None):
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        response = http_client.get(url, referer=url)
         if response.status_code != 200:
             return {"error": f"HTTP {response.status_code}", "url": url}
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        doc = parsing.parse(response.content, backend)
         results = {}
         for key, selector in selectors.items():
-            element = soup.select_one(selector)
+            element = doc.select_one(selector)
             if element:
                 if key == "cover":
-                    results[key] = element.get('src') or element.get('data-src') or element.get('abs:src')
+                    results[key] = element.attr('src') or element.attr('data-src') or element.attr('abs:src')
                 else:
-                    results[key] = element.get_text(strip=True)[:100] + "..."
+                    results[key] = element.text()[:100] + "..."
             else:
                 results[key] = "NOT_FOUND"
         return results
@@ -29,7 +30,14 @@ def probe(url, selectors):
         return {"error": str(e), "url": url}
 
 if __name__ == "__main__":
-    # Usage: python probe.py <url> <json_selectors>
-    url = sys.argv[1]
-    selectors = json.loads(sys.argv[2])
-    print(json.dumps(probe(url, selectors), indent=2))
+    # Usage: python probe.py <url> <json_selectors> [--cache] [--offline]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("selectors", type=json.loads)
+    parsing.add_arguments(parser)
+    http_client.add_arguments(parser)
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+    http_client.configure(args)
+    tracing.configure(args, "probe_site.py")
+    print(json.dumps(probe(args.url, args.selectors, args.parser), indent=2))
@@ -1,33 +1,117 @@
 import sys
-import cloudscraper
-from bs4 import BeautifulSoup
+import http_client
+import clearance
+import parsing
+import tracing
 import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 
-def probe(url, selectors):
-    scraper = cloudscraper.create_scraper(browser={'browser': 'chrome', 'platform': 'windows', 'mobile': False})
+BATCH_WORKERS = 8
+
+def probe(url, selectors, backend=None, scraper=None):
+    with tracing.span("probe", url=url):
+        return probe_page(url, selectors, backend, scraper)
+
+def probe_page(url, selectors, backend=None, scraper=None):
+    scraper = scraper or http_client.get_scraper()
     try:
-        response = scraper.get(url, timeout=15)
+        response = clearance.fetch(scraper, url)
         if response.status_code != 200:
             return {"error": f"HTTP {response.status_code}", "url": url}
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
+
+        doc = parsing.parse(response.content, backend)
         results = {}
         for key, selector in selectors.items():
-            elements = soup.select(selector)
+            elements = doc.select(selector)
             if elements:
                 if key == "cover":
-                    results[key] = elements[0].get('src') or elements[0].get('data-src') or elements[0].get('abs:src')
+                    results[key] = elements[0].attr('src') or elements[0].attr('data-src') or elements[0].attr('abs:src')
                 elif key == "chapters":
                     results[key] = f"OK ({len(elements)} found)"
                 else:
-                    results[key] = elements[0].get_text(strip=True)[:100]
+                    results[key] = elements[0].text()[:100]
             else:
                 results[key] = "NOT_FOUND"
         return results
     except Exception as e:
         return {"error": str(e), "url": url}
 
+def read_batch(stream):
+    # One JSON object per line: {"url": ..., "selectors": {...}}; any "id" is echoed back
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        item = json.loads(line)
+        selectors = item.get("selectors", {})
+        if isinstance(selectors, str):
+            selectors = json.loads(selectors)
+        yield {"id": item.get("id", number), "url": item["url"], "selectors": selectors}
+
+class HostWarmup:
+    # The first probe per host solves any Cloudflare challenge; the others wait and reuse its cookies
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = {}
+
+    def claim(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            if host in self.events:
+                return self.events[host], False
+            self.events[host] = threading.Event()
+            return self.events[host], True
+
+def probe_batch(items, backend=None, workers=BATCH_WORKERS, out=sys.stdout):
+    scraper = http_client.create_scraper(pool_maxsize=max(workers, http_client.POOL_MAXSIZE))
+    warmup = HostWarmup()
+    if backend:
+        for item in items:
+            parsing.compile_selectors(item["selectors"], backend)
+
+    def run(item):
+        event, first = warmup.claim(item["url"])
+        if not first:
+            event.wait()
+        start = time.perf_counter()
+        try:
+            result = probe(item["url"], item["selectors"], backend, scraper)
+        finally:
+            if first:
+                event.set()
+        return {"id": item["id"], "url": item["url"], "seconds": round(time.perf_counter() - start, 3), "result": result}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(run, item) for item in items]):
+            out.write(json.dumps(future.result()) + "\n")
+            out.flush()
+
 if __name__ == "__main__":
-    url = sys.argv[1]
-    selectors = json.loads(sys.argv[2])
-    print(json.dumps(probe(url, selectors), indent=2))
+    # Usage: python probe_site_v2.py <url> <json_selectors> [--cache] [--offline]
+    #        python probe_site_v2.py --batch <file.jsonl|-> [--workers 8]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url", nargs="?")
+    parser.add_argument("selectors", nargs="?", type=json.loads)
+    parser.add_argument("--batch", metavar="FILE", help="JSONL of {\"url\", \"selectors\"} probes, '-' for stdin; prints one JSON result per line")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="concurrent probes in batch mode")
+    parsing.add_arguments(parser)
+    http_client.add_arguments(parser)
+    clearance.add_arguments(parser)
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+    http_client.configure(args)
+    clearance.configure(args)
+    tracing.configure(args, "probe_site_v2.py")
+
+    if args.batch:
+        with (sys.stdin if args.batch == "-" else open(args.batch, 'r', encoding='utf-8')) as f:
+            items = list(read_batch(f))
+        probe_batch(items, args.parser or parsing.default_backend(), args.workers)
+    elif args.url and args.selectors is not None:
+        print(json.dumps(probe(args.url, args.selectors, args.parser), indent=2))
+    else:
+        parser.error("either <url> <json_selectors> or --batch is required")
@@ -0,0 +1,155 @@
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from requests.adapters import BaseAdapter
+
+# Per-host politeness for every request that actually reaches the network. Each
+# host gets a token bucket; hosts never wait on each other, so audits can fetch
+# different sites in parallel while one site still sees at most RATE requests per
+# second. A 429 (or a 503 that is not a Cloudflare challenge) halves that host's
+# rate, blocks it for Retry-After or a jittered exponential delay, and the same
+# request is sent again; successes slowly win the rate back.
+
+RATE = 1.0 # requests per second and host
+BURST = 2
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# Rate never drops below this share of the configured one
+MIN_RATE_FACTOR = 1 / 16
+# Share of the configured rate given back per successful response
+RECOVERY_STEP = 0.1
+
+def retry_after(response, now=None):
+    """Seconds the server asked us to wait, or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - (now or time.time()))
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def backoff(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    # "Full jitter": spreads retries of many clients over the whole window
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def should_retry(response):
+    if response.status_code == 429:
+        return True
+    if response.status_code != 503:
+        return False
+    # Cloudflare serves its challenge as 503; cloudscraper has to see it, not a retry loop
+    is_cloudflare = response.headers.get("Server", "").lower() == "cloudflare" or "cf-mitigated" in response.headers
+    return "Retry-After" in response.headers or not is_cloudflare
+
+class TokenBucket:
+    # Kept as the time the bucket is next empty (GCRA), which is the same bucket
+    # without a refill loop: a request may go once that time is less than
+    # burst - 1 intervals away.
+    def __init__(self, rate=RATE, burst=BURST):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.empty_at = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how long to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            interval = 1 / self.rate
+            empty_at = max(self.empty_at, now)
+            # Booking the slot now lets concurrent callers queue up in order
+            self.empty_at = empty_at + interval
+            return max(0.0, empty_at - (self.burst - 1) * interval - now)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def block(self, seconds):
+        # No request before the deadline, and no burst right after it
+        with self.lock:
+            self.empty_at = max(self.empty_at, time.monotonic() + seconds + (self.burst - 1) / self.rate)
+
+    def slow_down(self):
+        with self.lock:
+            self.rate = max(self.base_rate * MIN_RATE_FACTOR, self.rate / 2)
+
+    def speed_up(self):
+        with self.lock:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_STEP)
+
+class RateScheduler:
+    def __init__(self, rate=RATE, burst=BURST, max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.stats = {"requests": 0, "retried": 0, "waited_s": 0.0}
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def send(self, url, send):
+        """Call send() under url's host budget, retrying rate-limited answers."""
+        bucket = self.bucket(url)
+        for attempt in range(self.max_retries + 1):
+            waited = bucket.acquire()
+            response = send()
+            with self.lock:
+                self.stats["requests"] += 1
+                self.stats["waited_s"] += waited
+            if not should_retry(response):
+                bucket.speed_up()
+                return response
+            bucket.slow_down()
+            if attempt == self.max_retries:
+                return response
+            delay = retry_after(response)
+            # Retry-After is a minimum; jitter keeps parallel workers from returning together
+            delay = delay + random.uniform(0, self.backoff_base) if delay is not None \
+                else backoff(attempt, self.backoff_base, self.backoff_max)
+            bucket.block(min(delay, self.backoff_max))
+            response.close()
+            with self.lock:
+                self.stats["retried"] += 1
+        return response
+
+class ScheduledAdapter(BaseAdapter):
+    # Wraps the transport adapter, so cache hits and replays never spend a token
+    def __init__(self, adapter, scheduler):
+        super().__init__()
+        self.adapter = adapter
+        self.scheduler = scheduler
+
+    def send(self, request, **kwargs):
+        return self.scheduler.send(request.url, lambda: self.adapter.send(request, **kwargs))
+
+    def close(self):
+        self.adapter.close()
+
+def add_arguments(group):
+    group.add_argument("--rate", type=float, default=RATE, help="requests per second allowed against one host (0: unlimited)")
+    group.add_argument("--burst", type=int, default=BURST, help="requests a host may get back to back")
+    group.add_argument("--max-retries", type=int, default=MAX_RETRIES, help="retries of a 429/503 answer")
+
+def from_args(args):
+    return RateScheduler(args.rate, args.burst, args.max_retries) if args.rate > 0 else None
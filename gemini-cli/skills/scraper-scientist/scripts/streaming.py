@@ -0,0 +1,209 @@
+import re
+import codecs
+from html.parser import HTMLParser
+
+import tracing
+
+# Streaming selector matching for huge chapter-list pages: the body is fed to an
+# incremental parser chunk by chunk and matches are counted as tags open, so only
+# the stack of open elements is kept in memory and the download can stop early.
+#
+# Supported selectors: tag, *, #id, .class, [attr], [attr=v], [attr~=v], [attr^=v],
+# [attr$=v], [attr*=v], [attr|=v], descendant and child (>) combinators, and groups
+# (a, b). Anything else raises UnsupportedSelector so callers can fall back to a DOM.
+
+CHUNK_SIZE = 64 * 1024
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# Block-level tags whose start implicitly ends an open <p>, as in lxml and the browser DOM
+P_CLOSERS = {"address", "article", "aside", "blockquote", "details", "dialog", "div", "dl", "fieldset",
+             "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hgroup",
+             "hr", "main", "menu", "nav", "ol", "p", "pre", "section", "table", "ul"}
+
+# Opening the key tag implicitly closes any of these still open on top of the stack
+AUTO_CLOSE = {
+    **{tag: {"p"} for tag in P_CLOSERS},
+    "li": {"li", "p"},
+    "option": {"option"},
+    "tr": {"tr", "td", "th"},
+    "td": {"td", "th"},
+    "th": {"td", "th"},
+    "dt": {"dt", "dd", "p"},
+    "dd": {"dt", "dd", "p"},
+}
+
+class UnsupportedSelector(ValueError):
+    pass
+
+COMPOUND_TOKEN = re.compile(r"""
+    (?P<tag>[a-zA-Z][\w-]*|\*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w:-]+)\s*(?:(?P<op>[~^$*|]?=)\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<bare>[^\]\s]+))\s*)?\]
+""", re.VERBOSE)
+
+def _compound(text, selector):
+    tag, conditions, pos = None, [], 0
+    while pos < len(text):
+        m = COMPOUND_TOKEN.match(text, pos)
+        if not m or (m.group("tag") and pos != 0):
+            raise UnsupportedSelector(selector)
+        if m.group("tag"):
+            tag = None if m.group("tag") == "*" else m.group("tag").lower()
+        elif m.group("id"):
+            conditions.append(("id", "=", m.group("id")))
+        elif m.group("cls"):
+            conditions.append(("class", "~=", m.group("cls")))
+        else:
+            value = next((v for v in (m.group("dq"), m.group("sq"), m.group("bare")) if v is not None), None)
+            conditions.append((m.group("attr").lower(), m.group("op"), value))
+        pos = m.end()
+    return tag, conditions
+
+def compile_selector(selector):
+    alternatives = []
+    for part in selector.split(","):
+        tokens = re.sub(r"\s*>\s*", " > ", part.strip()).split()
+        if not tokens or tokens[0] == ">" or tokens[-1] == ">":
+            raise UnsupportedSelector(selector)
+        steps, combinator = [], " "
+        for token in tokens:
+            if token == ">":
+                combinator = ">"
+                continue
+            steps.append((_compound(token, selector), combinator))
+            combinator = " "
+        alternatives.append(steps)
+    return alternatives
+
+def _matches_compound(compound, element):
+    tag, conditions = compound
+    name, attrs = element
+    if tag and tag != name:
+        return False
+    for attr, op, value in conditions:
+        actual = attrs.get(attr)
+        if actual is None:
+            return False
+        if op is None:
+            continue
+        if op == "=" and actual != value:
+            return False
+        if op == "~=" and value not in actual.split():
+            return False
+        if op == "^=" and not actual.startswith(value):
+            return False
+        if op == "$=" and not actual.endswith(value):
+            return False
+        if op == "*=" and value not in actual:
+            return False
+        if op == "|=" and not (actual == value or actual.startswith(value + "-")):
+            return False
+    return True
+
+def _matches_steps(steps, stack, index):
+    # Right-to-left: steps[-1] must match stack[index], the rest must match its ancestors
+    compound, combinator = steps[-1]
+    if not _matches_compound(compound, stack[index]):
+        return False
+    if len(steps) == 1:
+        return True
+    if combinator == ">":
+        return index > 0 and _matches_steps(steps[:-1], stack, index - 1)
+    return any(_matches_steps(steps[:-1], stack, i) for i in range(index - 1, -1, -1))
+
+def matches(alternatives, stack):
+    return any(_matches_steps(steps, stack, len(stack) - 1) for steps in alternatives)
+
+class StreamMatcher(HTMLParser):
+    def __init__(self, selectors, capture=()):
+        super().__init__(convert_charrefs=True)
+        self.compiled = {key: compile_selector(sel) for key, sel in selectors.items()}
+        self.counts = {key: 0 for key in selectors}
+        self.texts = {}
+        self.capture = set(capture)
+        self.stack = []
+        self.active = {}
+
+    def handle_starttag(self, tag, attrs):
+        allowed = AUTO_CLOSE.get(tag)
+        while allowed and self.stack and self.stack[-1][0] in allowed:
+            self._pop()
+        self.stack.append((tag, {k: v or "" for k, v in attrs}))
+        for key, alternatives in self.compiled.items():
+            if matches(alternatives, self.stack):
+                self.counts[key] += 1
+                if key in self.capture and key not in self.texts and key not in self.active:
+                    self.active[key] = (len(self.stack), [])
+        if tag in VOID_TAGS:
+            self._pop()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self._pop()
+
+    def handle_endtag(self, tag):
+        # Stray end tags are ignored; a real one also closes anything left open inside it
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                while len(self.stack) > i:
+                    self._pop()
+                return
+
+    def handle_data(self, data):
+        for _, parts in self.active.values():
+            parts.append(data.strip())
+
+    def _pop(self):
+        self.stack.pop()
+        for key, (depth, parts) in list(self.active.items()):
+            if len(self.stack) < depth:
+                self.texts[key] = "".join(parts)
+                del self.active[key]
+
+    def text(self, key):
+        return self.texts.get(key)
+
+def _charset(response):
+    match = re.search(r"charset=([\w-]+)", response.headers.get("Content-Type", ""), re.I)
+    try:
+        return codecs.lookup(match.group(1)).name if match else "utf-8"
+    except LookupError:
+        return "utf-8"
+
+def stream_match(response, selectors, capture=(), done=None, chunk_size=CHUNK_SIZE):
+    """Feed the response body through a StreamMatcher until done(matcher) is true.
+
+    Returns (matcher, bytes_read, stopped_early). The connection is closed on early
+    stop so the rest of the page is never downloaded.
+    """
+    matcher = StreamMatcher(selectors, capture)
+    decoder = codecs.getincrementaldecoder(_charset(response))(errors="replace")
+    bytes_read = 0
+    stopped_early = False
+    # Reading and matching interleave: the parse spans nest inside download, whose self time is the network wait
+    try:
+        with tracing.span("download", url=response.url, stream=True) as download:
+            for chunk in response.iter_content(chunk_size):
+                bytes_read += len(chunk)
+                with tracing.span("parse", backend="stream", bytes=len(chunk)):
+                    matcher.feed(decoder.decode(chunk))
+                if done and done(matcher):
+                    stopped_early = True
+                    break
+            else:
+                with tracing.span("parse", backend="stream", bytes=0):
+                    matcher.feed(decoder.decode(b"", final=True))
+                    matcher.close()
+            download.set(bytes=bytes_read, stopped_early=stopped_early)
+    finally:
+        response.close()
+    return matcher, bytes_read, stopped_early
+
+def add_arguments(parser):
+    parser.add_argument("--stream", action="store_true",
+                        help="count matches while downloading instead of building a full DOM (streamed pages are not stored by --cache)")
+    parser.add_argument("--min-chapters", type=int, default=0,
+                        help="with --stream, stop downloading once the title and this many chapters are found")
@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_client
+import clearance
+
+# Usage: python test_clearance.py   (or pytest test_clearance.py)
+# Two hosts (127.0.0.1 and 127.0.0.2) whose stored clearance was earned with
+# different User-Agents are fetched concurrently through one shared session, as
+# deep_audit.py and probe_site_v2.py do. Each stub only accepts its clearance with
+# its own UA, so a UA leaking from one host's request into the other's shows up as
+# a 403, a forgotten entry or an entry saved with the wrong UA.
+
+AGENTS = {"127.0.0.1": "Mozilla/5.0 (first run) Chrome/124.0", "127.0.0.2": "Mozilla/5.0 (second run) Chrome/125.0"}
+TOKENS = {host: os.urandom(8).hex() for host in AGENTS}
+DELAY = 0.02
+
+def start_stub(host):
+    rejected = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            cookies = dict(c.strip().split("=", 1) for c in self.headers.get("Cookie", "").split(";") if "=" in c)
+            # Held open so requests to both hosts overlap
+            time.sleep(DELAY)
+            if cookies.get("cf_clearance") == TOKENS[host] and self.headers.get("User-Agent") == AGENTS[host]:
+                status, body = 200, b"<html><h1>Book</h1></html>"
+            else:
+                rejected.append(self.headers.get("User-Agent"))
+                status, body = 403, b"<html><title>Just a moment...</title></html>"
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, 0), Handler)
+    server.rejected = rejected
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def store_entries(servers):
+    expires = time.time() + 3600
+    return {host: {
+        "cookies": [{"name": "cf_clearance", "value": TOKENS[host], "domain": host, "path": "/", "expires": expires}],
+        "user_agent": AGENTS[host],
+        "saved": time.time(),
+    } for host in servers}
+
+def test_concurrent_hosts_keep_their_user_agents(rounds=40):
+    servers = {host: start_stub(host) for host in AGENTS}
+    urls = [f"http://{host}:{server.server_address[1]}/book/{n}" for n in range(rounds) for host, server in servers.items()]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "clearance.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(store_entries(servers), f)
+        saved = clearance._store
+        store = clearance.enable(path)
+        try:
+            session = http_client.create_session()
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                statuses = list(pool.map(lambda url: clearance.fetch(session, url).status_code, urls))
+        finally:
+            clearance._store = saved
+            for server in servers.values():
+                server.shutdown()
+                server.server_close()
+
+    assert statuses == [200] * len(urls), f"{statuses.count(403)} of {len(urls)} rejected"
+    assert not any(server.rejected for server in servers.values())
+    assert {host: entry["user_agent"] for host, entry in store.entries.items()} == AGENTS
+    assert store.reused == len(urls)
+
+if __name__ == "__main__":
+    try:
+        test_concurrent_hosts_keep_their_user_agents()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("✅ Concurrent hosts kept their own stored User-Agents")
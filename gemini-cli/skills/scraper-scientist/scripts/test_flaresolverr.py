@@ -1,39 +1,59 @@
 import sys
-import requests
 import json
+import socket
+import argparse
 
-def test_flaresolverr_logic():
-    # Simulate what the Kotlin FlareSolverrClient does
-    solver_url = "http://localhost:8191/v1"
-    target_url = "https://www.lightnovelpub.com/"
-    
-    payload = {
-        "cmd": "request.get",
-        "url": target_url,
-        "maxTimeout": 60000
-    }
-    
-    print(f"Simulating FlareSolverr request to {target_url}...")
+import flaresolverr_client
+
+# Usage: python test_flaresolverr.py [--mock] [url ...]
+# --mock starts mock_flaresolverr.py on 8191 with a local challenge site instead of
+# needing a real FlareSolverr.
+
+def test_flaresolverr_logic(urls=None, mock=False):
+    # Pooled sessions instead of the Kotlin FlareSolverrClient's one-off request.get per page
+    solver_url = flaresolverr_client.SOLVER_URL
+    if mock:
+        import mock_flaresolverr
+        mock_flaresolverr.start_solver(8191)
+        site = mock_flaresolverr.start_site()
+        urls = urls or [f"http://127.0.0.1:{site.server_address[1]}/book/{n}" for n in range(4)]
+    urls = urls or ["https://www.lightnovelpub.com/"]
+
+    print(f"Simulating FlareSolverr requests to {', '.join(urls)}...")
     try:
-        # Note: This will only work if FlareSolverr is actually running
-        # If not, we just verify the payload structure is correct.
-        print(f"Payload: {json.dumps(payload, indent=2)}")
-        
         # Check if service is listening locally
-        import socket
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         result = sock.connect_ex(('127.0.0.1', 8191))
+        sock.close()
         if result == 0:
             print("✅ FlareSolverr service detected at 8191.")
-            res = requests.post(solver_url, json=payload, timeout=70)
-            print(f"Response Status: {res.status_code}")
-            print(f"Data: {res.text[:200]}...")
+            with flaresolverr_client.FlareSolverrClient(solver_url) as client:
+                send = client.command
+
+                def command(payload, timeout=None):
+                    # Every payload exactly as the client posts it
+                    print(f"Payload: {json.dumps(payload)}")
+                    return send(payload, timeout)
+
+                client.command = command
+                for url, res in zip(urls, client.get_many(urls)):
+                    if isinstance(res, Exception):
+                        print(f"❌ {url}: {res}")
+                        continue
+                    via = "browser" if getattr(res, "from_solver", False) else "plain HTTP"
+                    print(f"Response Status: {res.status_code} via {via}")
+                    print(f"Data: {res.text[:200]}...")
+                print(f"Sessions created: {client.pool.created}, stats: {client.stats}")
         else:
-            print("⚠️ FlareSolverr service NOT running locally (Expected in lab).")
+            print("⚠️ FlareSolverr service NOT running locally (Expected in lab, try --mock).")
             print("✅ Logic Structure Verified.")
-            
+
     except Exception as e:
         print(f"❌ Error in simulation: {str(e)}")
 
 if __name__ == "__main__":
-    test_flaresolverr_logic()
+    parser = argparse.ArgumentParser(description="Check FlareSolverr access through the pooled session client.")
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("--mock", action="store_true", help="run against mock_flaresolverr.py on 8191")
+    args = parser.parse_args()
+    test_flaresolverr_logic(args.urls, args.mock)
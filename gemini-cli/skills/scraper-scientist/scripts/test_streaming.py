@@ -0,0 +1,61 @@
+import sys
+
+import parsing
+import streaming
+
+# Usage: python test_streaming.py   (or pytest test_streaming.py)
+# Checks that --stream counts the same matches as a full DOM parse of the same
+# markup, including the tags HTML closes implicitly. html.parser (bs4) keeps
+# unclosed tags open instead of closing them, so only lxml and selectolax are
+# compared, on markup with a doctype (in quirks mode <table> does not end <p>).
+
+CASES = {
+    "block tags end <p>": (
+        "<!DOCTYPE html><div class='book'><p>Intro<div class='list'><a href='/1'>1</a></div>"
+        "<p>Notes<ul><li><a href='/2'>2</a></li></ul><p>End<h3 class='title'>T</h3>"
+        "<p>x<table><tr><td><a href='/3'>3</a></td></tr></table><p>y<ol><li><a href='/4'>4</a></ol></div>",
+        {"under_p": "p a", "child_of_p": "p > a", "p_div": "p div", "title": "p h3.title, h3.title",
+         "links": ".book a", "lists": "p ol, p ul"},
+    ),
+    "unclosed list items": (
+        "<ul id='list-chapter'><li><p>a<a href='/1'>1</a><li><a href='/2'>2</a><li><p>c<a href='/3'>3</a></ul>",
+        {"chapters": "#list-chapter li a", "in_p": "li p a", "direct": "li > a"},
+    ),
+    "definition lists and tables": (
+        "<dl><dt><p>t<a>1</a><dd><p>d<a>2</a><dt>u</dl>"
+        "<table><tr><td>a<td><a>3</a><tr><th>h<td><a>4</a></table>",
+        {"dd": "dd a", "dt": "dt > p > a", "cells": "tr > td a", "rows": "tr"},
+    ),
+}
+
+def dom_counts(html, selectors, backend):
+    doc = parsing.parse(html, backend)
+    return {key: len(doc.select(selector)) for key, selector in selectors.items()}
+
+def stream_counts(html, selectors):
+    matcher = streaming.StreamMatcher(selectors)
+    matcher.feed(html)
+    matcher.close()
+    return matcher.counts
+
+def test_stream_matches_dom():
+    backends = [b for b in parsing.available_backends() if b != "html.parser"]
+    assert backends, "needs lxml or selectolax"
+    for name, (html, selectors) in CASES.items():
+        streamed = stream_counts(html, selectors)
+        for backend in backends:
+            assert streamed == dom_counts(html, selectors, backend), f"{name}: stream {streamed} vs {backend}"
+
+if __name__ == "__main__":
+    backends = [b for b in parsing.available_backends() if b != "html.parser"]
+    failed = 0
+    for name, (html, selectors) in CASES.items():
+        streamed = stream_counts(html, selectors)
+        for backend in backends:
+            expected = dom_counts(html, selectors, backend)
+            if streamed == expected:
+                print(f"✅ {name} ({backend})")
+            else:
+                failed += 1
+                print(f"❌ {name} ({backend}): stream {streamed}, dom {expected}")
+    sys.exit(1 if failed or not backends else 0)
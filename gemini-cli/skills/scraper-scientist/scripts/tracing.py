@@ -0,0 +1,432 @@
+import os
+import sys
+import json
+import time
+import random
+import socket
+import pstats
+import cProfile
+import threading
+import contextvars
+from collections import Counter, defaultdict
+from requests.adapters import BaseAdapter
+
+# Usage: python <audit or probe script> ... --trace out.json [--trace-format json|chrome|otlp]
+#        python <audit or probe script> ... --profile out.pstats [--profile-mode cprofile|sample]
+#        python tracing.py summary out.json
+# Timing spans for every phase of a fetch (dns, connect, tls, ttfb, download) and of
+# our own work (parse, each select), nested under one root span per source or probe.
+# At exit the spans are written as plain JSON, a Chrome trace (chrome://tracing,
+# Perfetto) or OTLP/JSON, and a table on stderr shows for every root whether its time
+# went to the network or to parsing. Phases are summed as self time: the dns/connect/
+# tls of a new connection happen inside ttfb and are not counted twice.
+
+FORMATS = ("json", "chrome", "otlp")
+NETWORK_PHASES = ("dns", "connect", "tls", "ttfb", "download")
+PARSE_PHASES = ("parse", "select")
+SAMPLE_INTERVAL_MS = 5.0
+# Lines of the profile printed at exit
+PROFILE_TOP = 25
+
+_current = contextvars.ContextVar("tracing_span", default=None)
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "trace_id", "span_id", "parent_id", "thread", "start", "end", "token")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        parent = _current.get()
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.thread = threading.current_thread().name
+        self.token = _current.set(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter_ns()
+        _current.reset(self.token)
+        if exc_type:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer.finish(self)
+        return False
+
+class _NullSpan:
+    # What span() hands out while tracing is off: nothing measured, nothing allocated
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class Tracer:
+    def __init__(self, script):
+        self.script = script
+        self.lock = threading.Lock()
+        self.spans = []
+        # Durations come from perf_counter, exports need wall-clock timestamps
+        self.origin = time.perf_counter_ns()
+        self.origin_wall = time.time_ns()
+
+    def finish(self, span):
+        with self.lock:
+            self.spans.append(span)
+
+    def wall_ns(self, perf_ns):
+        return self.origin_wall + perf_ns - self.origin
+
+    def records(self):
+        with self.lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return [{
+            "name": s.name,
+            "trace_id": s.trace_id,
+            "span_id": s.span_id,
+            "parent_id": s.parent_id,
+            "thread": s.thread,
+            "start_ms": round((s.start - self.origin) / 1e6, 3),
+            "duration_ms": round((s.end - s.start) / 1e6, 3),
+            "attrs": s.attrs,
+        } for s in spans]
+
+    def to_json(self):
+        records = self.records()
+        return {"script": self.script, "started": self.origin_wall / 1e9, "spans": records, "summary": summarize(records)}
+
+    def to_chrome(self):
+        records = self.records()
+        threads = {name: index for index, name in enumerate(dict.fromkeys(r["thread"] for r in records))}
+        events = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                  for name, tid in threads.items()]
+        events += [{
+            "name": r["name"],
+            "cat": category(r["name"]),
+            "ph": "X",
+            "ts": round(r["start_ms"] * 1000, 1),
+            "dur": round(r["duration_ms"] * 1000, 1),
+            "pid": os.getpid(),
+            "tid": threads[r["thread"]],
+            "args": r["attrs"],
+        } for r in records]
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"script": self.script}}
+
+    def to_otlp(self):
+        with self.lock:
+            spans = list(self.spans)
+        return {"resourceSpans": [{
+            "resource": {"attributes": otlp_attributes({"service.name": self.script, "process.pid": os.getpid()})},
+            "scopeSpans": [{
+                "scope": {"name": "noveldokusha-scraper.tracing"},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                    "name": s.name,
+                    "kind": 3 if s.name in NETWORK_PHASES else 1, # CLIENT / INTERNAL
+                    "startTimeUnixNano": str(self.wall_ns(s.start)),
+                    "endTimeUnixNano": str(self.wall_ns(s.end)),
+                    "attributes": otlp_attributes({**s.attrs, "thread.name": s.thread}),
+                    **({"status": {"code": 2, "message": s.attrs["error"]}} if "error" in s.attrs else {}),
+                } for s in spans],
+            }],
+        }]}
+
+    def export(self, fmt):
+        return {"json": self.to_json, "chrome": self.to_chrome, "otlp": self.to_otlp}[fmt]()
+
+def category(name):
+    if name in NETWORK_PHASES:
+        return "network"
+    return "parse" if name in PARSE_PHASES else "work"
+
+def otlp_attributes(attrs):
+    values = []
+    for key, value in attrs.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        values.append({"key": key, "value": typed})
+    return values
+
+def summarize(records):
+    """Self time per phase under every root span, and whether network or parsing dominated."""
+    by_id = {r["span_id"]: r for r in records}
+    child_ms = defaultdict(float)
+    for r in records:
+        if r["parent_id"] in by_id:
+            child_ms[r["parent_id"]] += r["duration_ms"]
+
+    def root_of(r):
+        while r["parent_id"] in by_id:
+            r = by_id[r["parent_id"]]
+        return r
+
+    summary, roots = {}, set()
+    for r in records:
+        root = root_of(r)
+        label = str(root["attrs"].get("source") or root["attrs"].get("url") or root["name"])
+        entry = summary.setdefault(label, {"total_ms": 0.0, "phases": Counter()})
+        if root["span_id"] not in roots:
+            roots.add(root["span_id"])
+            entry["total_ms"] += root["duration_ms"]
+        # Parallel children (async DNS) can add up to more than their parent
+        entry["phases"][r["name"]] += max(0.0, r["duration_ms"] - child_ms[r["span_id"]])
+    for entry in summary.values():
+        phases = entry["phases"]
+        entry["network_ms"] = round(sum(phases[p] for p in NETWORK_PHASES), 1)
+        entry["parse_ms"] = round(sum(phases[p] for p in PARSE_PHASES), 1)
+        entry["bound"] = "network" if entry["network_ms"] >= entry["parse_ms"] else "parser"
+        entry["phases"] = {name: round(ms, 1) for name, ms in phases.items()}
+        entry["total_ms"] = round(entry["total_ms"], 1)
+    return summary
+
+def print_summary(summary, out=None):
+    out = out or sys.stderr
+    columns = [*NETWORK_PHASES, *PARSE_PHASES]
+    print("\n⏱️  Where the time went (self time, ms)", file=out)
+    print(f"{'root':<28}" + "".join(f"{c:>10}" for c in columns) + f"{'total':>10}  bound", file=out)
+    for label, entry in sorted(summary.items(), key=lambda item: -item[1]["total_ms"]):
+        cells = "".join(f"{entry['phases'].get(c, 0):>10.1f}" for c in columns)
+        print(f"{label[:27]:<28}{cells}{entry['total_ms']:>10.1f}  {entry['bound']}", file=out)
+
+class ThreadProfiler:
+    # cProfile only sees the thread that enabled it. Before 3.12 every new thread
+    # starts its own profiler and the stats are merged at the end; from 3.12 on
+    # cProfile runs on sys.monitoring, which already covers all threads.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.profiles = []
+
+    def start(self):
+        profile = cProfile.Profile()
+        self.profiles.append(profile)
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._start_thread)
+        profile.enable()
+
+    def _start_thread(self, frame, event, arg):
+        # First profiling event of a new thread: hand it over to a profiler of its own
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def stop(self, path, out=None):
+        out = out or sys.stderr
+        threading.setprofile(None)
+        self.profiles[0].disable()
+        stats = pstats.Stats(self.profiles[0], stream=out)
+        for profile in self.profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        print(f"\n📊 cProfile ({len(self.profiles)} thread(s)) saved to {path}; top {PROFILE_TOP} by cumulative time:", file=out)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+
+class Sampler:
+    # Wall-clock sampling of every thread's stack, written as folded stacks for
+    # flamegraph.pl or speedscope; cheap enough to leave on for a whole audit
+    def __init__(self, interval_ms=SAMPLE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="tracing-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join([names.get(ident, str(ident)), *reversed(stack)])] += 1
+            self.samples += 1
+
+    def stop(self, path, out=None):
+        out = out or sys.stderr
+        self.stopped.set()
+        self.thread.join()
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        print(f"\n📊 {self.samples} samples every {self.interval * 1000:g} ms saved to {path}; busiest frames:", file=out)
+        for frame, count in leaves.most_common(PROFILE_TOP):
+            print(f"{count / total:>7.1%}  {frame}", file=out)
+
+class TracedAdapter(BaseAdapter):
+    # ttfb covers sending the request until the headers are in (plus connection
+    # setup, which shows up as its own nested spans); download is reading the body
+    def __init__(self, adapter):
+        super().__init__()
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):
+        with span("ttfb", url=request.url, method=request.method) as s:
+            response = self.adapter.send(request, **kwargs)
+            s.set(status=response.status_code)
+        if not kwargs.get("stream"):
+            with span("download", url=request.url) as s:
+                s.set(bytes=len(response.content))
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+def _is_address(host):
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+            return True
+        except OSError:
+            continue
+    return False
+
+def _instrument_urllib3():
+    # Either side of dns_resolver.pin()'s wrapper: in a long-lived worker a traced run can
+    # follow an untraced deep-audit, so the host name is always what gets passed down
+    import urllib3.connection
+    import urllib3.util.connection as connection
+    create_connection = connection.create_connection
+    ssl_wrap_socket = urllib3.connection.ssl_wrap_socket
+
+    def traced_create_connection(address, *args, **kwargs):
+        host, port = address
+        # Not imported here: dns_resolver imports this module, and without it nothing is pinned
+        resolver = sys.modules.get("dns_resolver")
+        if _is_address(host) or (resolver and resolver.pinned_addresses(host)):
+            # Nothing to resolve, or the audit's DNS stage resolved it already and timed that itself
+            with span("connect", host=host, port=port, pinned=not _is_address(host)) as s:
+                sock = create_connection(address, *args, **kwargs)
+                s.set(address=sock.getpeername()[0])
+                return sock
+        with span("dns", host=host):
+            infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        with span("connect", host=host, port=port) as s:
+            error = None
+            for info in infos:
+                try:
+                    sock = create_connection((info[4][0], port), *args, **kwargs)
+                    s.set(address=info[4][0])
+                    return sock
+                except OSError as e:
+                    error = e
+            raise error or OSError(f"no address for {host}")
+
+    def traced_ssl_wrap_socket(*args, **kwargs):
+        with span("tls", server_hostname=kwargs.get("server_hostname")):
+            return ssl_wrap_socket(*args, **kwargs)
+
+    connection.create_connection = traced_create_connection
+    urllib3.connection.ssl_wrap_socket = traced_ssl_wrap_socket
+
+_tracer = None
+_profiler = None
+_instrumented = False
+
+def enabled():
+    return _tracer is not None
+
+def span(name, **attrs):
+    """Context manager timing one phase; nests under the span open in this thread or task."""
+    return Span(_tracer, name, attrs) if _tracer else NULL_SPAN
+
+def enable(script):
+    global _tracer, _instrumented
+    if _tracer is None:
+        _tracer = Tracer(script)
+    if not _instrumented:
+        _instrument_urllib3()
+        _instrumented = True
+    return _tracer
+
+def start_profiler(mode="cprofile", interval_ms=SAMPLE_INTERVAL_MS):
+    global _profiler
+    _profiler = Sampler(interval_ms) if mode == "sample" else ThreadProfiler()
+    _profiler.start()
+    return _profiler
+
+def write(path, fmt="json"):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(_tracer.export(fmt), f)
+
+def post_otlp(endpoint):
+    import requests
+    response = requests.post(endpoint, json=_tracer.to_otlp(), timeout=10)
+    response.raise_for_status()
+
+def add_arguments(parser):
+    group = parser.add_argument_group("tracing")
+    group.add_argument("--trace", metavar="FILE", help="write per-phase timing spans (dns, connect, tls, ttfb, download, parse, select) to FILE")
+    group.add_argument("--trace-format", choices=FORMATS, default="json", help="json, Chrome trace (chrome://tracing, Perfetto) or OTLP/JSON")
+    group.add_argument("--otlp-endpoint", metavar="URL", help="also send the spans to an OTLP/HTTP collector, e.g. http://localhost:4318/v1/traces")
+    group.add_argument("--profile", metavar="FILE", help="profile the run into FILE (pstats, or folded stacks with --profile-mode sample)")
+    group.add_argument("--profile-mode", choices=("cprofile", "sample"), default="cprofile")
+    group.add_argument("--sample-interval", type=float, default=SAMPLE_INTERVAL_MS, help="ms between stack samples")
+
+def configure(args, script):
+    if args.trace or args.otlp_endpoint:
+        enable(script)
+    if args.profile:
+        start_profiler(args.profile_mode, args.sample_interval)
+    if not (_tracer or _profiler):
+        return
+
+    def finish():
+        global _tracer, _profiler
+        if _profiler:
+            _profiler.stop(args.profile)
+        if _tracer:
+            print_summary(summarize(_tracer.records()))
+            if args.trace:
+                write(args.trace, args.trace_format)
+                print(f"🧵 {len(_tracer.spans)} spans written to {args.trace} ({args.trace_format})", file=sys.stderr)
+            if args.otlp_endpoint:
+                try:
+                    post_otlp(args.otlp_endpoint)
+                except Exception as e:
+                    print(f"⚠️ Could not send spans to {args.otlp_endpoint}: {e}", file=sys.stderr)
+        # A worker runs this after every command; the next one starts untraced
+        _tracer = _profiler = None
+
+    import http_client # imports this module, so not at the top
+    http_client.on_teardown(finish)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Summarize a JSON trace written with --trace.")
+    parser.add_argument("command", choices=["summary"])
+    parser.add_argument("trace")
+    args = parser.parse_args()
+    with open(args.trace, 'r', encoding='utf-8') as f:
+        print_summary(summarize(json.load(f)["spans"]), out=sys.stdout)
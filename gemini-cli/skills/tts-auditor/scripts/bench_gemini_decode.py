@@ -0,0 +1,75 @@
+import os
+import json
+import time
+import base64
+import argparse
+import tempfile
+import multiprocessing
+import requests
+
+import test_tts
+import mock_tts_servers
+from bench_tts import serve_mocks, traced
+from bench_narrator import SAMPLE_PARAGRAPH
+
+# Usage: python bench_gemini_decode.py [--paragraphs 20] [--repeat 2]
+# Peak Python memory and time to first audio for one long passage against the
+# local Gemini mock: the old buffered path (response.json() then b64decode),
+# generateContent decoded while it downloads, and streamGenerateContent.
+
+def buffered(api_key, text, out):
+    # What test_tts did before: raw JSON, parsed dict and decoded audio all at once
+    start = time.perf_counter()
+    url = f"{test_tts.API_BASE}/v1beta/models/{test_tts.MODEL}:generateContent?key={api_key}"
+    data = requests.post(url, json=test_tts.build_payload(text), timeout=60).json()
+    audio = base64.b64decode(data["candidates"][0]["content"]["parts"][0]["inlineData"]["data"])
+    with open(out, 'wb') as f:
+        f.write(audio)
+    elapsed = round(time.perf_counter() - start, 3)
+    return {"bytes": len(audio), "time_to_first_audio_s": elapsed, "total_s": elapsed}
+
+MODES = {
+    "buffered generateContent": buffered,
+    "streamed generateContent": lambda key, text, out: test_tts.synthesize_gemini(key, text, out, timeout=60),
+    "streamGenerateContent": lambda key, text, out: test_tts.synthesize_gemini(key, text, out, stream=True, timeout=60),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory and time to first audio of the Gemini reply decoders.")
+    parser.add_argument("--paragraphs", type=int, default=20, help="passage length in generated paragraphs")
+    parser.add_argument("--repeat", type=int, default=2)
+    mock_tts_servers.add_arguments(parser)
+    args = parser.parse_args()
+
+    text = "\n\n".join(SAMPLE_PARAGRAPH * 2 for _ in range(args.paragraphs))
+    mock = mock_tts_servers.from_args(args)
+    settings = {k: getattr(mock, k) for k in ("edge_latency", "edge_speed", "gemini_latency", "gemini_speed")}
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve_mocks, args=(settings, ready), daemon=True)
+    server.start()
+    test_tts.API_BASE = mock_tts_servers.gemini_base(ready.get(timeout=30))
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "out.audio")
+            for mode, run in MODES.items():
+                runs = []
+                for _ in range(args.repeat):
+                    with traced() as peak:
+                        stats = run("mock-key", text, out)
+                    runs.append({**stats, "peak_mem_bytes": peak["bytes"]})
+                results.append({
+                    "mode": mode,
+                    "chars": len(text),
+                    "audio_bytes": runs[0]["bytes"],
+                    "time_to_first_audio_s": min(r["time_to_first_audio_s"] for r in runs),
+                    "total_s": min(r["total_s"] for r in runs),
+                    "peak_mem_mb": round(max(r["peak_mem_bytes"] for r in runs) / 1024 / 1024, 2),
+                })
+    finally:
+        server.terminate()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import json
+import random
+import asyncio
+import argparse
+import tempfile
+
+import edge_narrator
+from tts_cache import AudioCache
+
+# Usage: python bench_narrator.py [--text-file chapter.txt] [--failure-rate 0.1]
+# Narrates a chapter through a local stand-in synthesizer whose latency grows with
+# text length (like the Edge service) and which fails randomly, comparing a single
+# whole-text request with the chunked concurrent pipeline, then the same chapter
+# from a cold and a warm audio cache.
+
+SAMPLE_PARAGRAPH = ("The lecture hall fell silent as Zorian stepped forward. He had rehearsed this a hundred times, "
+                    "yet the words still caught in his throat. Outside, the bells of Cyoria rang the hour, and somewhere "
+                    "beyond the walls the restart was already waiting for him. ")
+
+def stand_in(base_latency, per_char, failure_rate, rng):
+    async def synthesize(text, voice, rate):
+        await asyncio.sleep(base_latency + per_char * len(text))
+        if rng.random() < failure_rate:
+            raise ConnectionError("stand-in synthesizer dropped the connection")
+        # 48 kbit/s MP3 is about 6 bytes per ms; assume ~14 chars per second of speech
+        return b"\xff\xf3" + b"\x00" * int(len(text) / 14 * 6000)
+    return synthesize
+
+async def measure(text, label, synthesize, **kwargs):
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = await edge_narrator.narrate(text, "en-US-AvaNeural", os.path.join(tmp, "out.mp3"),
+                                            synthesize=synthesize, **kwargs)
+    return {"mode": label, **stats}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--text-file", help="chapter text (default: a generated ~12k character chapter)")
+    parser.add_argument("--base-latency", type=float, default=0.3, help="seconds before any audio comes back")
+    parser.add_argument("--per-char", type=float, default=0.0004, help="extra seconds per character")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--chunk-chars", type=int, default=edge_narrator.CHUNK_CHARS)
+    parser.add_argument("--concurrency", type=int, default=edge_narrator.CONCURRENCY)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.text_file:
+        with open(args.text_file, 'r', encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = "\n\n".join(SAMPLE_PARAGRAPH * 3 for _ in range(20))
+
+    rng = random.Random(args.seed)
+    synthesize = stand_in(args.base_latency, args.per_char, args.failure_rate, rng)
+    results = [
+        asyncio.run(measure(text, "single request", synthesize, max_chars=len(text), concurrency=1)),
+        asyncio.run(measure(text, "chunked", synthesize, max_chars=args.chunk_chars, concurrency=args.concurrency)),
+    ]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for label in ("chunked, cold cache", "chunked, warm cache"):
+            cache = AudioCache(cache_dir)
+            results.append(asyncio.run(measure(text, label, synthesize, max_chars=args.chunk_chars,
+                                               concurrency=args.concurrency, cache=cache)))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
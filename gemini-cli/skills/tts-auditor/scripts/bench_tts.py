@@ -0,0 +1,198 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+import multiprocessing
+
+import edge_narrator
+import test_tts
+import mock_tts_servers
+from bench_narrator import SAMPLE_PARAGRAPH
+
+# Usage: python bench_tts.py [--corpus chapters/] [--report bench_tts.json] [--baseline previous.json]
+# Narrates a corpus of chapters with every engine/voice/rate combination against the
+# local mock Edge and Gemini servers, through the same code paths the skill uses
+# (edge_narrator.narrate and test_tts.synthesize_gemini). Writes per-run samples and
+# per-combination latency percentiles, real-time factor, audio bytes per second and
+# peak Python memory to a JSON report, and exits 1 when a metric regressed against
+# a baseline report.
+
+EDGE_VOICES = ["en-US-AvaNeural", "en-GB-SoniaNeural"]
+GEMINI_VOICES = ["Kore", "Puck"]
+RATES = ["+0%", "+25%"]
+PERCENTILES = (50, 90, 95, 99)
+
+# Summary metrics compared against a baseline; all of them are "lower is better"
+REGRESSION_METRICS = ("latency_p95_s", "ttfa_p95_s", "rtf_mean", "peak_mem_mb_max")
+
+def load_corpus(paths):
+    if not paths:
+        # Short, medium and long generated chapters
+        return {f"generated-{n}p": "\n\n".join(SAMPLE_PARAGRAPH * 2 for _ in range(n)) for n in (1, 4, 10)}
+    corpus = {}
+    for path in paths:
+        files = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(".txt")] if os.path.isdir(path) else [path]
+        for file_path in files:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                corpus[os.path.basename(file_path)] = f.read()
+    return corpus
+
+def percentile(values, p):
+    # Same nearest-rank definition as scraper-scientist's health_store (skills do not import each other)
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, -(-p * len(ordered) // 100))
+    return ordered[rank - 1]
+
+def serve_mocks(settings, ready):
+    async def main():
+        runner, port = await mock_tts_servers.start(mock_tts_servers.MockTTS(**settings))
+        ready.put(port)
+        await asyncio.Event().wait()
+    asyncio.run(main())
+
+@contextlib.contextmanager
+def traced():
+    tracemalloc.start()
+    peak = {}
+    try:
+        yield peak
+    finally:
+        peak["bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+def run_edge(text, voice, rate, out, concurrency):
+    with traced() as peak:
+        stats = asyncio.run(edge_narrator.narrate(text, voice, out, rate, concurrency=concurrency))
+    return {"latency_s": stats["total_s"], "ttfa_s": stats["time_to_first_audio_s"],
+            "audio_bytes": stats["bytes"], "peak_mem_bytes": peak["bytes"]}
+
+def run_gemini(text, voice, rate, out, concurrency, stream=False):
+    with traced() as peak:
+        stats = test_tts.synthesize_gemini("mock-key", text, out, voice, stream=stream, timeout=120)
+    return {"latency_s": stats["total_s"], "ttfa_s": stats["time_to_first_audio_s"],
+            "audio_bytes": stats["bytes"], "peak_mem_bytes": peak["bytes"]}
+
+def run_gemini_stream(text, voice, rate, out, concurrency):
+    return run_gemini(text, voice, rate, out, concurrency, stream=True)
+
+ENGINES = {"edge": run_edge, "gemini": run_gemini, "gemini-stream": run_gemini_stream}
+
+def summarize(samples):
+    groups = {}
+    for sample in samples:
+        groups.setdefault((sample["engine"], sample["voice"], sample["rate"]), []).append(sample)
+    summary = []
+    for (engine, voice, rate), runs in sorted(groups.items()):
+        latencies = [r["latency_s"] for r in runs]
+        ttfas = [r["ttfa_s"] for r in runs]
+        audio_s = sum(r["audio_s"] for r in runs)
+        row = {"engine": engine, "voice": voice, "rate": rate, "runs": len(runs)}
+        row.update({f"latency_p{p}_s": percentile(latencies, p) for p in PERCENTILES})
+        row.update({f"ttfa_p{p}_s": percentile(ttfas, p) for p in PERCENTILES})
+        row["rtf_mean"] = round(sum(r["rtf"] for r in runs) / len(runs), 4)
+        row["audio_s_per_s"] = round(audio_s / sum(latencies), 2)
+        row["audio_bytes_per_s"] = round(sum(r["audio_bytes"] for r in runs) / sum(latencies))
+        row["peak_mem_mb_max"] = round(max(r["peak_mem_bytes"] for r in runs) / 1024 / 1024, 2)
+        summary.append(row)
+    return summary
+
+def compare(summary, baseline, tolerance):
+    previous = {(row["engine"], row["voice"], row["rate"]): row for row in baseline.get("summary", [])}
+    regressions = []
+    for row in summary:
+        old = previous.get((row["engine"], row["voice"], row["rate"]))
+        if not old:
+            continue
+        for metric in REGRESSION_METRICS:
+            if old.get(metric) and row[metric] is not None and row[metric] > old[metric] * (1 + tolerance):
+                regressions.append({"engine": row["engine"], "voice": row["voice"], "rate": row["rate"],
+                                    "metric": metric, "baseline": old[metric], "current": row[metric],
+                                    "change": f"{(row[metric] / old[metric] - 1) * 100:+.1f}%"})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the narration paths across voices, rates and engines against local mock TTS servers.")
+    parser.add_argument("--corpus", nargs="*", help="chapter .txt files or directories of them (default: generated chapters)")
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=sorted(ENGINES))
+    parser.add_argument("--edge-voices", nargs="+", default=EDGE_VOICES)
+    parser.add_argument("--gemini-voices", nargs="+", default=GEMINI_VOICES)
+    parser.add_argument("--rates", nargs="+", default=RATES, help="Edge speaking rates; Gemini has no rate setting")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=edge_narrator.CONCURRENCY)
+    parser.add_argument("--report", default="bench_tts.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative increase before a metric counts as regressed")
+    mock_tts_servers.add_arguments(parser)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    mock = mock_tts_servers.from_args(args)
+    settings = {k: getattr(mock, k) for k in ("edge_latency", "edge_speed", "gemini_latency", "gemini_speed")}
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve_mocks, args=(settings, ready), daemon=True)
+    server.start()
+    port = ready.get(timeout=30)
+    edge_narrator.use_endpoint(mock_tts_servers.edge_url(port))
+    test_tts.API_BASE = mock_tts_servers.gemini_base(port)
+
+    plan = []
+    for engine in args.engines:
+        voices, rates = (args.edge_voices, args.rates) if engine == "edge" else (args.gemini_voices, ["+0%"])
+        plan += [(engine, voice, rate) for voice in voices for rate in rates]
+
+    samples = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "out.mp3")
+            for engine, voice, rate in plan:
+                for name, text in corpus.items():
+                    for attempt in range(args.repeat):
+                        sample = ENGINES[engine](text, voice, rate, out, args.concurrency)
+                        sample["audio_s"] = round(sample["audio_bytes"] / mock_tts_servers.BYTES_PER_SECOND, 2)
+                        sample["rtf"] = round(sample["latency_s"] / sample["audio_s"], 4) if sample["audio_s"] else None
+                        samples.append({"engine": engine, "voice": voice, "rate": rate, "text": name,
+                                        "chars": len(text), "run": attempt, **sample})
+                print(f"⏱️  {engine} {voice} {rate}: {len(corpus) * args.repeat} runs", file=sys.stderr)
+    finally:
+        server.terminate()
+
+    summary = summarize(samples)
+    report = {
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "edge_tts": getattr(edge_narrator.edge_tts, "__version__", None)},
+        "settings": {"repeat": args.repeat, "concurrency": args.concurrency, "chunk_chars": edge_narrator.CHUNK_CHARS,
+                     "corpus": {name: len(text) for name, text in corpus.items()}, "mock": settings},
+        "summary": summary,
+        "samples": samples,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(summary, json.load(f), args.tolerance)
+        report["baseline"] = args.baseline
+        report["regressions"] = regressions
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    for row in summary:
+        print(f"{row['engine']:13} {row['voice']:18} {row['rate']:>5}  p50 {row['latency_p50_s']:.2f}s  "
+              f"p95 {row['latency_p95_s']:.2f}s  ttfa p50 {row['ttfa_p50_s']:.2f}s  RTF {row['rtf_mean']:.3f}  "
+              f"{row['audio_bytes_per_s']} B/s  mem {row['peak_mem_mb_max']} MB")
+    for regression in regressions:
+        print(f"🚨 {regression['engine']} {regression['voice']} {regression['rate']}: {regression['metric']} "
+              f"{regression['baseline']} -> {regression['current']} ({regression['change']})")
+    print(f"📄 Report written to {args.report}")
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,331 @@
+import io
 import asyncio
 import edge_tts
 import sys
 import os
+import re
+import json
+import time
+import argparse
+
+from tts_cache import AudioCache, CACHE_DIR, MAX_BYTES, cache_key
+
+# Long chapters are split at paragraph/sentence boundaries into chunks of at most
+# CHUNK_CHARS characters, synthesized CONCURRENCY at a time, and the MP3 frames are
+# written out in order as soon as every earlier chunk is done.
+CHUNK_CHARS = 1500
+CONCURRENCY = 4
+RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+# Edge's default output is audio-24khz-48kbitrate-mono-mp3, i.e. 6000 bytes per second.
+# Used to place each chunk's word boundaries on the timeline of the stitched file.
+BYTES_PER_SECOND = 6000
+
+# Part of every cache key, so audio from another engine or output format is never reused
+ENGINE = "edge-tts/audio-24khz-48kbitrate-mono-mp3"
+
+SENTENCE_RE = re.compile(r'[^.!?…。！？]+(?:[.!?…。！？]+["\'”’)\]]*|$)\s*')
 
 async def generate_tts(text, voice, output_path, rate="+0%"):
     communicate = edge_tts.Communicate(text, voice, rate=rate)
     await communicate.save(output_path)
 
+def _hard_split(sentence, max_chars):
+    # A single sentence longer than a chunk is cut at the last space that fits
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(" ", 0, max_chars)
+        cut = cut if cut > 0 else max_chars
+        yield sentence[:cut].strip()
+        sentence = sentence[cut:]
+    if sentence.strip():
+        yield sentence.strip()
+
+def split_text(text, max_chars=CHUNK_CHARS):
+    chunks, current = [], ""
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        separator = "\n\n"
+        for match in SENTENCE_RE.finditer(paragraph):
+            for piece in _hard_split(match.group(0).strip(), max_chars):
+                if current and len(current) + len(separator) + len(piece) > max_chars:
+                    chunks.append(current)
+                    current = ""
+                current = f"{current}{separator}{piece}" if current else piece
+                separator = " "
+    if current:
+        chunks.append(current)
+    return chunks
+
+def strip_id3(data):
+    # Only the first chunk may keep an ID3v2 tag, later ones would be heard as glitches
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        return data[10 + size:]
+    return data
+
+def use_endpoint(url):
+    # Sends every later Edge request to another websocket endpoint, e.g. mock_tts_servers.py
+    edge_tts.communicate.WSS_URL = url
+
+async def synthesize_edge(text, voice, rate):
+    audio = bytearray()
+    async for chunk in edge_tts.Communicate(text, voice, rate=rate).stream():
+        if chunk["type"] == "audio":
+            audio.extend(chunk["data"])
+    if not audio:
+        raise RuntimeError("No audio received")
+    return bytes(audio)
+
+def _communicate(text, voice, rate):
+    try:
+        return edge_tts.Communicate(text, voice, rate=rate, boundary="WordBoundary")
+    except TypeError:
+        # edge-tts < 7 always emits word boundaries and has no boundary argument
+        return edge_tts.Communicate(text, voice, rate=rate)
+
+async def stream_edge(text, voice, rate):
+    # Yields ("audio", bytes) and ("boundary", {"offset_ms", "duration_ms", "text"}) as they arrive
+    async for chunk in _communicate(text, voice, rate).stream():
+        if chunk["type"] == "audio":
+            yield "audio", chunk["data"]
+        elif chunk["type"] == "WordBoundary":
+            # Edge reports offsets in 100 ns ticks
+            yield "boundary", {"offset_ms": chunk["offset"] / 10000, "duration_ms": chunk["duration"] / 10000, "text": chunk["text"]}
+
+def cached_synthesize(synthesize, cache, engine=ENGINE):
+    async def run(text, voice, rate):
+        key = cache_key(text, voice, rate, engine)
+        hit = cache.get(key)
+        if hit:
+            return hit[0]
+        audio = await synthesize(text, voice, rate)
+        cache.put(key, audio, voice=voice, rate=rate, engine=engine)
+        return audio
+    return run
+
+def cached_stream(stream, cache, engine=ENGINE):
+    async def run(text, voice, rate):
+        key = cache_key(text, voice, rate, engine)
+        hit = cache.get(key, want_boundaries=True)
+        if hit:
+            audio, boundaries = hit
+            yield "audio", audio
+            for boundary in boundaries:
+                yield "boundary", boundary
+            return
+        audio, boundaries = bytearray(), []
+        async for kind, value in stream(text, voice, rate):
+            if kind == "audio":
+                audio.extend(value)
+            else:
+                boundaries.append(value)
+            yield kind, value
+        if audio:
+            cache.put(key, bytes(audio), boundaries, voice=voice, rate=rate, engine=engine)
+    return run
+
+def cache_stats(cache, before):
+    # Hits and misses of this run only; the cache object may be shared
+    return {"cache_hits": cache.hits - before[0], "cache_misses": cache.misses - before[1]}
+
+class _Unclosed(io.RawIOBase):
+    def __init__(self, target):
+        self.target = target
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.target.write(data)
+
+def open_sink(output_path):
+    # "-" is stdout; anything else is opened as a file, which also works for named pipes
+    if output_path == "-":
+        try:
+            return os.fdopen(os.dup(sys.stdout.fileno()), 'wb', buffering=0)
+        except (AttributeError, io.UnsupportedOperation):
+            # stdout captured in memory (cli.py worker); its buffer stays open for the caller
+            return _Unclosed(sys.stdout.buffer)
+    return open(output_path, 'wb', buffering=0)
+
+async def narrate_stream(text, voice, output_path, rate="+0%", boundaries_path=None, stream=stream_edge,
+                         max_chars=CHUNK_CHARS, concurrency=CONCURRENCY, retries=RETRIES, cache=None):
+    """Write audio to output_path as it arrives instead of after the whole chapter.
+
+    The chunk being played streams live while up to concurrency - 1 later chunks are
+    synthesized ahead into memory. A chunk is retried only if it failed before any of
+    its audio was written.
+    """
+    chunks = split_text(text, max_chars)
+    if not chunks:
+        raise ValueError("Nothing to narrate")
+    if cache:
+        stream = cached_stream(stream, cache)
+        before = (cache.hits, cache.misses)
+    semaphore = asyncio.Semaphore(concurrency)
+    queues = [asyncio.Queue() for _ in chunks]
+    stats = {"chunks": len(chunks), "chars": sum(len(c) for c in chunks), "retries": 0, "words": 0}
+    start = time.perf_counter()
+
+    async def produce(i):
+        async with semaphore:
+            for attempt in range(retries + 1):
+                produced = False
+                try:
+                    async for kind, value in stream(chunks[i], voice, rate):
+                        produced = True
+                        await queues[i].put((kind, value))
+                    break
+                except Exception as e:
+                    if produced or attempt == retries:
+                        await queues[i].put(("error", e))
+                        return
+                    stats["retries"] += 1
+                    await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+        await queues[i].put(("end", None))
+
+    tasks = [asyncio.create_task(produce(i)) for i in range(len(chunks))]
+    written = 0
+    boundaries = open(boundaries_path, 'w', encoding='utf-8') if boundaries_path else None
+    try:
+        with open_sink(output_path) as out:
+            for i in range(len(chunks)):
+                base_ms = written / BYTES_PER_SECOND * 1000
+                first = True
+                while True:
+                    kind, value = await queues[i].get()
+                    if kind == "end":
+                        break
+                    if kind == "error":
+                        raise value
+                    if kind == "audio":
+                        data = strip_id3(value) if first and i > 0 else value
+                        first = False
+                        if written == 0:
+                            stats["time_to_first_byte_s"] = round(time.perf_counter() - start, 3)
+                        out.write(data)
+                        written += len(data)
+                    elif boundaries:
+                        stats["words"] += 1
+                        boundaries.write(json.dumps({**value, "offset_ms": round(base_ms + value["offset_ms"], 1), "chunk": i}) + "\n")
+                        boundaries.flush()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if boundaries:
+            boundaries.close()
+        if cache:
+            cache.save()
+
+    elapsed = time.perf_counter() - start
+    stats.update({
+        "bytes": written,
+        "total_s": round(elapsed, 3),
+        "bytes_per_s": round(written / elapsed) if elapsed else None,
+        "audio_s": round(written / BYTES_PER_SECOND, 1),
+    })
+    if cache:
+        stats.update(cache_stats(cache, before))
+    return stats
+
+async def narrate(text, voice, output_path, rate="+0%", synthesize=synthesize_edge,
+                  max_chars=CHUNK_CHARS, concurrency=CONCURRENCY, retries=RETRIES, cache=None):
+    chunks = split_text(text, max_chars)
+    if not chunks:
+        raise ValueError("Nothing to narrate")
+    if cache:
+        synthesize = cached_synthesize(synthesize, cache)
+        before = (cache.hits, cache.misses)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * len(chunks)
+    stats = {"chunks": len(chunks), "chars": sum(len(c) for c in chunks), "retries": 0}
+    start = time.perf_counter()
+
+    async def run(i):
+        for attempt in range(retries + 1):
+            try:
+                async with semaphore:
+                    results[i] = await synthesize(chunks[i], voice, rate)
+                return
+            except Exception:
+                if attempt == retries:
+                    raise
+                stats["retries"] += 1
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    tasks = [asyncio.create_task(run(i)) for i in range(len(chunks))]
+    tmp_path = f"{output_path}.part"
+    written = 0
+    try:
+        with open(tmp_path, 'wb') as out:
+            for i, task in enumerate(tasks):
+                await task
+                data = results[i] if i == 0 else strip_id3(results[i])
+                results[i] = None
+                out.write(data)
+                written += len(data)
+                if i == 0:
+                    stats["time_to_first_audio_s"] = round(time.perf_counter() - start, 3)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if cache:
+            cache.save()
+
+    elapsed = time.perf_counter() - start
+    stats.update({
+        "bytes": written,
+        "total_s": round(elapsed, 3),
+        "chars_per_s": round(stats["chars"] / elapsed, 1) if elapsed else None,
+    })
+    if cache:
+        stats.update(cache_stats(cache, before))
+    return stats
+
 if __name__ == "__main__":
-    if len(sys.argv) < 4:
-        print("Usage: python edge_narrator.py <text> <voice> <output_path> [rate]")
-        sys.exit(1)
-        
-    text = sys.argv[1]
-    voice = sys.argv[2] # e.g. "en-US-AvaNeural"
-    output_path = sys.argv[3]
-    rate = sys.argv[4] if len(sys.argv) > 4 else "+0%"
-    
-    asyncio.run(generate_tts(text, voice, output_path, rate))
-    print(f"SUCCESS: {output_path}")
+    parser = argparse.ArgumentParser(description="Narrate text to MP3 with Edge TTS, chunked and synthesized concurrently.")
+    parser.add_argument("text", help="text to narrate, or - to read it from stdin")
+    parser.add_argument("voice", help='e.g. "en-US-AvaNeural"')
+    parser.add_argument("output_path", help="MP3 file, a named pipe, or - for stdout (with --stream)")
+    parser.add_argument("rate", nargs="?", default="+0%")
+    parser.add_argument("--chunk-chars", type=int, default=CHUNK_CHARS)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--retries", type=int, default=RETRIES)
+    parser.add_argument("--stream", action="store_true", help="write audio as it arrives instead of after every chunk is done")
+    parser.add_argument("--boundaries", metavar="FILE", help="with --stream, write word-boundary JSONL for reader highlighting")
+    parser.add_argument("--no-cache", action="store_true", help="synthesize every chunk again instead of reusing cached audio")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--cache-max-mb", type=int, default=MAX_BYTES // (1024 * 1024))
+    parser.add_argument("--endpoint", metavar="URL", help="Edge websocket endpoint, e.g. mock_tts_servers.edge_url(port)")
+    args, extra = parser.parse_known_args()
+    # argparse reads a negative rate such as -10% as an option
+    if len(extra) == 1 and re.fullmatch(r'-\d+%', extra[0]) and args.rate == "+0%":
+        args.rate = extra[0]
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    # Set on every run, so a long-lived worker (cli.py worker) never keeps a previous command's endpoint
+    use_endpoint(args.endpoint or edge_tts.constants.WSS_URL)
+    text = sys.stdin.read() if args.text == "-" else args.text
+    cache = None if args.no_cache else AudioCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    if args.stream:
+        stats = asyncio.run(narrate_stream(text, args.voice, args.output_path, args.rate, args.boundaries,
+                                           max_chars=args.chunk_chars, concurrency=args.concurrency, retries=args.retries, cache=cache))
+        # stdout may be carrying the audio itself
+        print(f"SUCCESS: {args.output_path}", file=sys.stderr)
+        print(json.dumps(stats), file=sys.stderr)
+    else:
+        stats = asyncio.run(narrate(text, args.voice, args.output_path, args.rate,
+                                    max_chars=args.chunk_chars, concurrency=args.concurrency, retries=args.retries, cache=cache))
+        print(f"SUCCESS: {args.output_path}")
+        print(json.dumps(stats))
@@ -0,0 +1,130 @@
+import json
+import time
+import binascii
+
+# Incremental decoder for Gemini generateContent / streamGenerateContent replies.
+# The base64 "data" strings of inlineData parts are decoded and written to a sink
+# as the bytes arrive; everything else is kept as a small "skeleton" document with
+# those strings emptied, which is parsed with json.loads at the end. A reply is
+# therefore never held in memory as raw JSON, parsed dict and decoded audio at once.
+
+ESCAPES = {ord('/'): b'/', ord('\\'): b'\\', ord('"'): b'"'}
+WHITESPACE = b" \t\r\n"
+
+class InlineAudioDecoder:
+    def __init__(self, sink):
+        self.sink = sink
+        self.skeleton = bytearray()
+        self.in_string = False
+        self.in_data = False
+        self.escaped = False
+        self.string = bytearray()
+        self.last_string = None
+        self.value_key = None
+        self.pending = b""
+        self.bytes = 0
+        self.first_audio = None
+
+    def feed(self, chunk):
+        pos, end = 0, len(chunk)
+        while pos < end:
+            if self.in_data:
+                pos = self._feed_data(chunk, pos)
+            elif self.in_string:
+                pos = self._feed_string(chunk, pos)
+            else:
+                c = chunk[pos]
+                self.skeleton.append(c)
+                pos += 1
+                if c == 0x22: # "
+                    # A string value of a "data" key is audio; the key's own string is not
+                    self.in_data = self.value_key == "data"
+                    self.in_string = not self.in_data
+                    self.string.clear()
+                elif c == 0x3a: # :
+                    self.value_key = self.last_string
+                elif c not in WHITESPACE:
+                    self.value_key = None
+
+    def _feed_string(self, chunk, pos):
+        # Ordinary strings are copied verbatim into the skeleton
+        start = pos
+        while pos < len(chunk):
+            c = chunk[pos]
+            pos += 1
+            if self.escaped:
+                self.escaped = False
+            elif c == 0x5c: # backslash
+                self.escaped = True
+            elif c == 0x22:
+                self.in_string = False
+                if len(self.string) < 64:
+                    self.string += chunk[start:pos - 1]
+                self.skeleton += chunk[start:pos]
+                self.last_string = self.string.decode('utf-8', errors='replace') if len(self.string) < 64 else None
+                return pos
+        if len(self.string) < 64:
+            self.string += chunk[start:pos]
+        self.skeleton += chunk[start:pos]
+        return pos
+
+    def _feed_data(self, chunk, pos):
+        if not self.escaped:
+            quote = chunk.find(b'"', pos)
+            stop = quote if quote != -1 else len(chunk)
+            segment = chunk[pos:stop]
+            if b"\\" not in segment:
+                self._decode(segment)
+                if quote == -1:
+                    return stop
+                self._finish_data()
+                return quote + 1
+        # Base64 has nothing that needs escaping, but encoders may still write "\/"
+        out = bytearray()
+        for i in range(pos, len(chunk)):
+            c = chunk[i]
+            if self.escaped:
+                self.escaped = False
+                out += ESCAPES.get(c, b"")
+            elif c == 0x5c: # backslash
+                self.escaped = True
+            elif c == 0x22:
+                self._decode(bytes(out))
+                self._finish_data()
+                return i + 1
+            else:
+                out.append(c)
+        self._decode(bytes(out))
+        return len(chunk)
+
+    def _decode(self, segment):
+        data = self.pending + segment
+        usable = len(data) - len(data) % 4
+        self.pending = data[usable:]
+        if usable:
+            audio = binascii.a2b_base64(data[:usable])
+            if audio and self.first_audio is None:
+                self.first_audio = time.perf_counter()
+            self.sink.write(audio)
+            self.bytes += len(audio)
+
+    def _finish_data(self):
+        if self.pending:
+            # Unpadded tail
+            self._decode(b"=" * (-len(self.pending) % 4))
+        self.pending = b""
+        self.in_data = False
+        self.value_key = None
+        self.skeleton.append(0x22)
+
+    def close(self):
+        """Parsed reply with every inlineData "data" string emptied."""
+        if self.in_string or self.in_data:
+            raise ValueError("Reply ended inside a string")
+        return json.loads(bytes(self.skeleton))
+
+def inline_parts(document):
+    # generateContent returns one reply; streamGenerateContent returns a list of them
+    for reply in document if isinstance(document, list) else [document]:
+        for candidate in reply.get("candidates", []):
+            yield from candidate.get("content", {}).get("parts", [])
@@ -0,0 +1,185 @@
+import re
+import json
+import base64
+import asyncio
+import argparse
+from html import unescape
+
+from aiohttp import web, WSMsgType
+
+# Usage: python mock_tts_servers.py [--port 8765] [--edge-latency 0.3] [--gemini-latency 0.8]
+# Local stand-ins for the Edge read-aloud websocket and Gemini generateContent /
+# streamGenerateContent, for
+# benchmarks. Audio is silent 48 kbit/s MP3-sized filler: about 14 characters of text
+# per second of speech, scaled by the requested rate, delivered after a first-byte
+# latency at a fixed multiple of real time.
+#
+# Point edge_tts at it with edge_narrator.use_endpoint(edge_url(port)) and test_tts
+# with test_tts.API_BASE = gemini_base(port).
+
+BYTES_PER_SECOND = 6000
+CHARS_PER_SECOND = 14
+FRAME_BYTES = 4096
+# streamGenerateContent replies carry this many seconds of audio each
+GEMINI_PART_SECONDS = 10
+
+SSML_RE = re.compile(r"<voice name='([^']*)'>.*?rate='([^']*)'.*?>(.*?)</prosody>", re.S)
+
+def edge_url(port):
+    return f"ws://127.0.0.1:{port}/edge/v1?TrustedClientToken=mock"
+
+def gemini_base(port):
+    return f"http://127.0.0.1:{port}"
+
+def audio_seconds(text, rate="+0%"):
+    match = re.fullmatch(r'([+-]?\d+)%', rate)
+    speed = 1 + int(match.group(1)) / 100 if match else 1
+    return len(text) / CHARS_PER_SECOND / max(speed, 0.1)
+
+def silent_audio(seconds):
+    size = max(2, int(seconds * BYTES_PER_SECOND))
+    return b"\xff\xf3" + bytes(size - 2)
+
+def _text_message(path, body, content_type="application/json; charset=utf-8"):
+    return f"X-RequestId:mock\r\nContent-Type:{content_type}\r\nPath:{path}\r\n\r\n{body}"
+
+def _audio_message(data):
+    # Two byte header length, the headers (ending in CRLF), then the audio itself
+    headers = b"X-RequestId:mock\r\nContent-Type:audio/mpeg\r\nPath:audio\r\n"
+    return len(headers).to_bytes(2, "big") + headers + data
+
+class MockTTS:
+    def __init__(self, edge_latency=0.3, edge_speed=50.0, gemini_latency=0.8, gemini_speed=50.0,
+                 gemini_mime="audio/mp3"):
+        self.edge_latency = edge_latency
+        self.edge_speed = edge_speed
+        self.gemini_latency = gemini_latency
+        self.gemini_speed = gemini_speed
+        self.gemini_mime = gemini_mime
+        self.requests = {"edge": 0, "gemini": 0}
+
+    def app(self):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_get("/edge/v1", self.edge)
+        app.router.add_post("/v1beta/models/{call}", self.gemini)
+        return app
+
+    async def edge(self, request):
+        ws = web.WebSocketResponse(compress=True)
+        await ws.prepare(request)
+        word_boundary = True
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+            if "Path:speech.config" in message.data:
+                word_boundary = '"wordBoundaryEnabled":"true"' in message.data
+                continue
+            match = SSML_RE.search(message.data)
+            if not match:
+                continue
+            self.requests["edge"] += 1
+            rate, text = match.group(2), unescape(match.group(3))
+            await self._speak(ws, text, rate, word_boundary)
+            break
+        await ws.close()
+        return ws
+
+    async def _speak(self, ws, text, rate, word_boundary):
+        seconds = audio_seconds(text, rate)
+        audio = silent_audio(seconds)
+        words = text.split()
+        await asyncio.sleep(self.edge_latency)
+        await ws.send_str(_text_message("turn.start", "{}"))
+        sent_words = 0
+        for start in range(0, len(audio), FRAME_BYTES):
+            frame = audio[start:start + FRAME_BYTES]
+            await ws.send_bytes(_audio_message(frame))
+            # Boundaries for the words whose speech this frame covers
+            covered = (start + len(frame)) / len(audio)
+            while word_boundary and words and sent_words < covered * len(words):
+                ticks = int(seconds * sent_words / len(words) * 10_000_000)
+                duration = int(seconds / len(words) * 10_000_000)
+                metadata = {"Metadata": [{"Type": "WordBoundary", "Data": {
+                    "Offset": ticks, "Duration": duration,
+                    "text": {"Text": words[sent_words], "Length": len(words[sent_words]), "BoundaryType": "WordBoundary"}}}]}
+                await ws.send_str(_text_message("audio.metadata", json.dumps(metadata)))
+                sent_words += 1
+            await asyncio.sleep(len(frame) / BYTES_PER_SECOND / self.edge_speed)
+        await ws.send_str(_text_message("turn.end", "{}"))
+
+    def _gemini_audio(self, payload):
+        text = "".join(part.get("text", "") for content in payload.get("contents", [])
+                       for part in content.get("parts", []))
+        return text, silent_audio(audio_seconds(text))
+
+    def _gemini_reply(self, audio, finished=True):
+        part = {"inlineData": {"mimeType": self.gemini_mime, "data": base64.b64encode(audio).decode('ascii')}}
+        candidate = {"content": {"role": "model", "parts": [part]}}
+        if finished:
+            candidate["finishReason"] = "STOP"
+        return {"candidates": [candidate]}
+
+    async def gemini(self, request):
+        call = request.match_info["call"]
+        if call.endswith(":streamGenerateContent"):
+            return await self.gemini_stream(request)
+        if not call.endswith(":generateContent"):
+            raise web.HTTPNotFound()
+        self.requests["gemini"] += 1
+        text, audio = self._gemini_audio(await request.json())
+        await asyncio.sleep(self.gemini_latency + len(audio) / BYTES_PER_SECOND / self.gemini_speed)
+        return web.json_response(self._gemini_reply(audio))
+
+    async def gemini_stream(self, request):
+        # Without alt=sse the replies are elements of one JSON array, sent as they are generated
+        self.requests["gemini"] += 1
+        text, audio = self._gemini_audio(await request.json())
+        response = web.StreamResponse(headers={"Content-Type": "application/json; charset=UTF-8"})
+        await response.prepare(request)
+        await asyncio.sleep(self.gemini_latency)
+        step = GEMINI_PART_SECONDS * BYTES_PER_SECOND
+        for start in range(0, len(audio), step):
+            part = audio[start:start + step]
+            await asyncio.sleep(len(part) / BYTES_PER_SECOND / self.gemini_speed)
+            reply = json.dumps(self._gemini_reply(part, finished=start + step >= len(audio)))
+            await response.write(((",\r\n" if start else "[") + reply).encode('utf-8'))
+        await response.write(b"]")
+        await response.write_eof()
+        return response
+
+async def start(mock, port=0):
+    """Start serving on 127.0.0.1; returns (runner, port)."""
+    runner = web.AppRunner(mock.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    return runner, runner.addresses[0][1]
+
+def add_arguments(parser):
+    parser.add_argument("--edge-latency", type=float, default=0.3, help="seconds before the first Edge audio frame")
+    parser.add_argument("--edge-speed", type=float, default=50.0, help="Edge audio delivered at this multiple of real time")
+    parser.add_argument("--gemini-latency", type=float, default=0.8, help="seconds before a Gemini reply starts")
+    parser.add_argument("--gemini-speed", type=float, default=50.0, help="Gemini audio generated at this multiple of real time")
+
+def from_args(args):
+    return MockTTS(args.edge_latency, args.edge_speed, args.gemini_latency, args.gemini_speed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve mock Edge and Gemini TTS endpoints on localhost.")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    async def main():
+        runner, port = await start(from_args(args), args.port)
+        print(f"🎙️  Edge:   {edge_url(port)}")
+        print(f"🎙️  Gemini: {gemini_base(port)}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
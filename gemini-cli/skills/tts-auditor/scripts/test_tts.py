@@ -1,11 +1,26 @@
-import sys
+import os
+import time
 import requests
 import json
+import argparse
+import tempfile
 
-def test_gemini_tts(api_key, text):
+from tts_cache import AudioCache, CACHE_DIR, cache_key
+from gemini_audio import InlineAudioDecoder, inline_parts
+
+MODEL = "gemini-2.5-flash-preview-tts"
+API_BASE = "https://generativelanguage.googleapis.com"
+
+# Replies are read and decoded this many bytes at a time
+CHUNK_BYTES = 64 * 1024
+
+class NoAudio(Exception):
+    def __init__(self, message, reply):
+        super().__init__(message)
+        self.reply = reply
+
+def build_payload(text, voice=None):
     # Using the correct structure for Gemini 2.5 TTS models
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-preview-tts:generateContent?key={api_key}"
-    
     payload = {
         "contents": [{
             "parts": [{
@@ -16,33 +31,98 @@ def test_gemini_tts(api_key, text):
             "response_modalities": ["AUDIO"]
         }
     }
-    
+    if voice:
+        payload["generationConfig"]["speechConfig"] = {"voiceConfig": {"prebuiltVoiceConfig": {"voiceName": voice}}}
+    return payload
+
+def synthesize_gemini(api_key, text, out=None, voice=None, stream=False, timeout=30):
+    """Decode the reply's inline audio into out (or discard it) while it downloads.
+
+    With stream=True, streamGenerateContent sends the audio as a series of replies,
+    so the first part can be written before the whole passage is generated.
+    """
+    method = "streamGenerateContent" if stream else "generateContent"
+    url = f"{API_BASE}/v1beta/models/{MODEL}:{method}?key={api_key}"
+    part_path = f"{out}.part" if out else os.devnull
+    start = time.perf_counter()
+    try:
+        with open(part_path, 'wb') as sink, \
+                requests.post(url, json=build_payload(text, voice), timeout=timeout, stream=True) as response:
+            decoder = InlineAudioDecoder(sink)
+            for chunk in response.iter_content(CHUNK_BYTES):
+                decoder.feed(chunk)
+            reply = decoder.close()
+
+        replies = reply if isinstance(reply, list) else [reply]
+        if not any("candidates" in r for r in replies):
+            raise NoAudio("API Response failed", reply)
+        parts = list(inline_parts(reply))
+        audio = [p["inlineData"]["mimeType"] for p in parts
+                 if "inlineData" in p and p["inlineData"].get("mimeType", "").startswith("audio/")]
+        if not audio and not any("blob" in p for p in parts):
+            raise NoAudio(f"No audio part found in response. Keys: {parts[0].keys() if parts else 'EMPTY'}", reply)
+        if out:
+            os.replace(part_path, out)
+    finally:
+        if out and os.path.exists(part_path):
+            os.remove(part_path)
+
+    return {
+        "mime_type": audio[0] if audio else "blob",
+        "parts": len(audio),
+        "bytes": decoder.bytes,
+        "time_to_first_audio_s": round(decoder.first_audio - start, 3) if decoder.first_audio else None,
+        "total_s": round(time.perf_counter() - start, 3),
+    }
+
+def test_gemini_tts(api_key, text, out=None, cache=None, voice=None, stream=False):
+    # Gemini has no rate setting, so only the text and voice vary
+    key = cache_key(text, voice or "default", "+0%", f"gemini/{MODEL}")
+    if cache:
+        hit = cache.get(key)
+        cache.save()
+        if hit:
+            print(f"✅ SUCCESS: Audio served from cache ({len(hit[0])} bytes)")
+            if out:
+                with open(out, 'wb') as f:
+                    f.write(hit[0])
+            return True
+
+    target = out
+    if cache and not out:
+        # Decode to a scratch file so the audio can be cached without holding it in memory
+        fd, target = tempfile.mkstemp(suffix=".audio")
+        os.close(fd)
     try:
-        response = requests.post(url, json=payload, timeout=30)
-        data = response.json()
-        
-        if "candidates" in data:
-            parts = data["candidates"][0]["content"]["parts"]
-            found_audio = False
-            for part in parts:
-                if "inlineData" in part and part["inlineData"]["mimeType"] == "audio/mp3":
-                    print("✅ SUCCESS: Received audio data (inlineData:audio/mp3)")
-                    found_audio = True
-                    break
-                elif "blob" in part:
-                    print("✅ SUCCESS: Received audio data (blob)")
-                    found_audio = True
-                    break
-            
-            if not found_audio:
-                print(f"❌ ERROR: No audio part found in response. Keys: {parts[0].keys() if parts else 'EMPTY'}")
-                print(json.dumps(data, indent=2))
+        stats = synthesize_gemini(api_key, text, target, voice, stream)
+        if stats["mime_type"] == "blob":
+            print("✅ SUCCESS: Received audio data (blob)")
         else:
-            print(f"❌ ERROR: API Response failed: {json.dumps(data, indent=2)}")
-            
+            print(f"✅ SUCCESS: Received audio data (inlineData:{stats['mime_type']}, {stats['bytes']} bytes, "
+                  f"first audio after {stats['time_to_first_audio_s']}s)")
+        if cache and stats["bytes"]:
+            cache.put_file(key, target, mime_type=stats["mime_type"], voice=voice, engine=f"gemini/{MODEL}")
+            cache.save()
+        return stats
+    except NoAudio as e:
+        print(f"❌ ERROR: {e}")
+        print(json.dumps(e.reply, indent=2))
     except Exception as e:
         print(f"❌ ERROR: Test failed: {str(e)}")
+    finally:
+        if target != out:
+            os.remove(target)
     return False
 
 if __name__ == "__main__":
-    test_gemini_tts(sys.argv[1], "Testing the laboratory environment with audio modality.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Check that the Gemini TTS model returns audio.")
+    parser.add_argument("api_key")
+    parser.add_argument("text", nargs="?", default="Testing the laboratory environment with audio modality.")
+    parser.add_argument("--voice", help='prebuilt voice name, e.g. "Kore" (default: the model\'s own)')
+    parser.add_argument("--out", help="write the received audio to this file")
+    parser.add_argument("--stream", action="store_true", help="use streamGenerateContent so audio arrives in parts")
+    parser.add_argument("--cache", action="store_true", help="reuse audio already synthesized for the same text")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+    test_gemini_tts(args.api_key, args.text, args.out, AudioCache(args.cache_dir) if args.cache else None,
+                    args.voice, args.stream)
@@ -0,0 +1,162 @@
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import unicodedata
+
+# Usage: python tts_cache.py [--cache-dir DIR] (stats|clear)
+# Synthesized audio is stored per chunk under a hash of the normalized text, voice,
+# rate and engine, so re-narrating a chapter (or one with a few edited sentences)
+# only synthesizes the chunks that changed. index.json tracks size and last use
+# for LRU eviction; word boundaries, when known, sit next to the audio.
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "noveldokusha-tts")
+MAX_BYTES = 512 * 1024 * 1024
+
+def normalize_text(text):
+    # Whitespace inside a paragraph does not change the speech, paragraph breaks may
+    text = unicodedata.normalize("NFC", text)
+    paragraphs = (" ".join(p.split()) for p in re.split(r'\n\s*\n', text))
+    return "\n\n".join(p for p in paragraphs if p)
+
+def normalize_rate(rate):
+    match = re.fullmatch(r'\s*([+-]?\d+)\s*%\s*', rate or "+0%")
+    return f"{int(match.group(1)):+d}%" if match else rate.strip()
+
+def cache_key(text, voice, rate, engine):
+    material = "\x00".join([engine, voice.strip(), normalize_rate(rate), normalize_text(text)])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class AudioCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        os.makedirs(os.path.join(directory, "audio"), exist_ok=True)
+        self.index_path = os.path.join(directory, "index.json")
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def audio_path(self, key):
+        return os.path.join(self.directory, "audio", key[:2], key)
+
+    def words_path(self, key):
+        return f"{self.audio_path(key)}.words.json"
+
+    def get(self, key, want_boundaries=False):
+        """(audio bytes, boundaries or None) for a cached chunk, or None on a miss."""
+        entry = self.index.get(key)
+        if entry and want_boundaries and not entry.get("boundaries"):
+            entry = None # Cached by a run that did not ask for word boundaries
+        try:
+            if not entry:
+                raise FileNotFoundError(key)
+            with open(self.audio_path(key), 'rb') as f:
+                audio = f.read()
+            boundaries = None
+            if entry.get("boundaries"):
+                with open(self.words_path(key), 'r', encoding='utf-8') as f:
+                    boundaries = json.load(f)
+        except (OSError, ValueError):
+            if key in self.index and entry:
+                del self.index[key]
+                self.dirty = True
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry["used"] = time.time()
+        self.dirty = True
+        return audio, boundaries
+
+    def put(self, key, audio, boundaries=None, **meta):
+        path = self.audio_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(audio)
+        os.replace(tmp, path)
+        self._add(key, len(audio), boundaries, meta)
+
+    def put_file(self, key, source, **meta):
+        # For audio that was streamed to disk rather than held in memory
+        path = self.audio_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, path)
+        self._add(key, os.path.getsize(path), None, meta)
+
+    def _add(self, key, size, boundaries, meta):
+        if boundaries is not None:
+            tmp = f"{self.words_path(key)}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(boundaries, f)
+            os.replace(tmp, self.words_path(key))
+        now = time.time()
+        self.index[key] = {"size": size, "boundaries": boundaries is not None, "stored": now, "used": now, **meta}
+        self.dirty = True
+        self._evict()
+
+    def _evict(self):
+        # Least recently used chunks go first
+        total = sum(e["size"] for e in self.index.values())
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]["used"]):
+            if total <= self.max_bytes:
+                break
+            del self.index[key]
+            total -= entry["size"]
+            self._remove(key)
+
+    def _remove(self, key):
+        for path in (self.audio_path(key), self.words_path(key)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def save(self):
+        # Written once per run rather than per chunk so a fully cached chapter stays fast
+        if not self.dirty:
+            return
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
+        self.dirty = False
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "directory": self.directory,
+            "entries": len(self.index),
+            "bytes": sum(e["size"] for e in self.index.values()),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+    def clear(self):
+        for key in list(self.index):
+            self._remove(key)
+        self.index = {}
+        self.dirty = True
+        self.save()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or clear the on-disk TTS audio cache used by the narrator.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("command", choices=["stats", "clear"])
+    args = parser.parse_args()
+    cache = AudioCache(args.cache_dir)
+    if args.command == "clear":
+        cache.clear()
+    print(json.dumps(cache.stats(), indent=2))
@@ -1,22 +1,234 @@
 import json
 import sys
 import os
+import re
+import time
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 
-def json_to_kotlin(json_path):
-    with open(json_path, 'r') as f:
-        config = json.load(f)
-    
-    class_name = config['name'].replace(' ', '').replace('(', '').replace(')', '')
-    source_id = config['id']
-    base_url = config['baseUrl']
-    catalog_url = config['catalogUrl']
+# Usage: python3 convert_source.py <config.json | config_dir> [...] [--check] [--force]
+#        [--verify [--fixtures archive.jsonl.gz]]
+# Run from the repository root. Each JSON config becomes one SourceInterface.Catalog
+# in SOURCES_DIR. A file is only written when its generated content changed, and
+# the manifest remembers each config's mtime/size so unchanged configs are skipped
+# without even being parsed - Gradle's incremental build for :scraper stays warm.
+# --verify first runs every selector against the configs' recorded sample pages
+# (fixture_check.py) and refuses to generate sources whose selectors match nothing.
+
+SOURCES_DIR = "scraper/src/main/java/my/noveldokusha/scraper/sources"
+MANIFEST_PATH = "scraper/build/healer/manifest.json"
+
+# Values of my.noveldokusha.core.LanguageCode
+LANGUAGES = ("ENGLISH", "PORTUGUESE", "SPANISH", "FRENCH", "INDONESIAN", "CHINESE")
+
+DEFAULT_SELECTORS = {
+    "chapterTitle": "h1",
+    "chapterText": ".content",
+    "bookDescription": ".description",
+    "chapterItem": "a",
+    "bookItem": ".item",
+    "bookItemTitle": "h3",
+    "bookItemUrl": "a",
+    "bookItemCover": "img",
+    "nextPage": ".next",
+}
+
+URL_RE = r'^https?://[^\s"]+$'
+PAGE_URL_RE = r'^(?:[^{}\s"]|\{(?:baseUrl|bookUrl|novelId|page)\})+$'
+
+# field -> (type, required, rule). A rule is a regex, a tuple of allowed values, a
+# range for ints, a nested schema, or a dict of defaults whose keys are the only ones allowed.
+EXTRACT_SCHEMA = {
+    "selector": (str, True, r'\S'),
+    "attr": (str, False, r'^[\w:-]+$'), # Element text when absent
+    "pattern": (str, False, r'.'), # Last match wins; its last group when it has groups
+}
+
+# Tables of contents that need more than one request. pageUrl may use {baseUrl},
+# {bookUrl}, {novelId} (read from the book page) and {page}; pages after the first are
+# fetched concurrently, at most `concurrency` at a time per source.
+CHAPTER_LIST_SCHEMA = {
+    "pageUrl": (str, False, PAGE_URL_RE),
+    "novelId": (dict, False, EXTRACT_SCHEMA),
+    "lastPage": (dict, False, EXTRACT_SCHEMA),
+    "firstPage": (int, False, range(0, 2)),
+    "maxPages": (int, False, range(1, 10001)),
+    "concurrency": (int, False, range(1, 33)),
+}
+CHAPTER_LIST_DEFAULTS = {"pageUrl": "{bookUrl}", "firstPage": 1, "maxPages": 500, "concurrency": 4}
+
+# Recorded pages used to check a config before its source is built (see fixture_check.py).
+# The catalog sample defaults to catalogUrl.
+SAMPLES_SCHEMA = {
+    "book": (str, False, URL_RE),
+    "chapter": (str, False, URL_RE),
+    "catalog": (str, False, URL_RE),
+}
+
+SCHEMA = {
+    "name": (str, True, r'^[\w\s()]+$'),
+    "id": (str, True, r'^[a-z0-9_]+$'),
+    "baseUrl": (str, True, URL_RE),
+    "catalogUrl": (str, True, URL_RE),
+    "language": (str, False, LANGUAGES),
+    "selectors": (dict, True, DEFAULT_SELECTORS),
+    "chapterList": (dict, False, CHAPTER_LIST_SCHEMA),
+    "samples": (dict, False, SAMPLES_SCHEMA),
+}
+
+def _generator_digest():
+    # Any change to this script (template included) invalidates the manifest
+    with open(__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+GENERATOR = _generator_digest()
+
+def class_name_of(config):
+    return config['name'].replace(' ', '').replace('(', '').replace(')', '')
+
+def is_schema(rule):
+    return isinstance(rule, dict) and all(isinstance(v, tuple) for v in rule.values())
+
+def validate_object(obj, schema, where=""):
+    errors = [f"unknown field '{where}{key}'" for key in obj if key not in schema]
+    for key, (kind, required, rule) in schema.items():
+        name = f"{where}{key}"
+        if key not in obj:
+            if required:
+                errors.append(f"missing required field '{name}'")
+            continue
+        value = obj[key]
+        if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+            errors.append(f"'{name}' must be a {kind.__name__}")
+        elif isinstance(rule, str) and not re.match(rule, value):
+            errors.append(f"'{name}' does not match {rule}: {value!r}")
+        elif isinstance(rule, tuple) and value.upper() not in rule:
+            errors.append(f"'{name}' must be one of {', '.join(rule)}: {value!r}")
+        elif isinstance(rule, range) and value not in rule:
+            errors.append(f"'{name}' must be between {rule.start} and {rule.stop - 1}: {value!r}")
+        elif is_schema(rule):
+            errors += validate_object(value, rule, f"{name}.")
+        elif isinstance(rule, dict):
+            for item, selector in value.items():
+                if item not in rule:
+                    errors.append(f"unknown selector '{item}' (expected one of {', '.join(rule)})")
+                elif not isinstance(selector, str) or not selector.strip():
+                    errors.append(f"selector '{item}' must be a non-empty string")
+    return errors
+
+def validate(config):
+    if not isinstance(config, dict):
+        return ["top level must be an object"]
+    errors = validate_object(config, SCHEMA)
+    chapter_list = config.get("chapterList")
+    if not errors and chapter_list is not None:
+        page_url = chapter_list.get("pageUrl", CHAPTER_LIST_DEFAULTS["pageUrl"])
+        if ("{novelId}" in page_url) != ("novelId" in chapter_list):
+            errors.append("'chapterList.pageUrl' must use {novelId} exactly when 'chapterList.novelId' is set")
+        if ("{page}" in page_url) != ("lastPage" in chapter_list):
+            errors.append("'chapterList.pageUrl' must use {page} exactly when 'chapterList.lastPage' is set")
+    if not errors and not re.match(r'^[A-Za-z_]\w*$', class_name_of(config)):
+        errors.append(f"'name' does not give a valid Kotlin class name: {class_name_of(config)!r}")
+    return errors
+
+def kt(value):
+    # Contents of a Kotlin string literal; "$" would otherwise start a template
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('$', '\\$')
+
+def kotlin_template(template):
+    # pageUrl placeholders become Kotlin string templates of the same name
+    return re.sub(r'\{(baseUrl|bookUrl|novelId|page)\}', r'${\1}', kt(template))
+
+def extract_kotlin(receiver, rule, number=False):
+    """Call chain reading rule's attribute (or text) off its first match, one call per line."""
+    calls = [f'{receiver}.selectFirst("{kt(rule["selector"])}")',
+             f'?.attr("{kt(rule["attr"])}")' if "attr" in rule else "?.text()"]
+    pattern = rule.get("pattern", r"\d+" if number else None)
+    if pattern:
+        calls.append(f'?.let {{ Regex("{kt(pattern)}").findAll(it).lastOrNull()?.groupValues?.last() }}')
+    if number:
+        calls.append("?.toIntOrNull()")
+    return calls
+
+def chapter_list_kotlin(chapter_list, chapter_item):
+    """(imports, class members, functions) replacing the single-request getChapterList."""
+    chapter_list = {**CHAPTER_LIST_DEFAULTS, **chapter_list}
+    has_id, paged = "novelId" in chapter_list, "lastPage" in chapter_list
+    args = ["bookUrl"] + ["novelId"] * has_id
+    params = ["bookUrl: String"] + ["novelId: String"] * has_id + ["page: Int"] * paged
+    to_chapters = f'select("{chapter_item}").map {{ ChapterResult(it.text(), it.attr("abs:href")) }}'
+
+    body = []
+    if has_id:
+        calls = extract_kotlin("networkClient.get(bookUrl).toDocument()", chapter_list["novelId"])
+        body += [f"val novelId = {calls[0]}"] + [f"    {c}" for c in calls[1:]]
+        body.append('    ?: throw IllegalStateException("Novel id not found on $bookUrl")')
+    imports, members = [], []
+    if not paged:
+        body += [f"networkClient.get(chapterPageUrl({', '.join(args)})).toDocument()",
+                 f"    .{to_chapters}"]
+    else:
+        first = chapter_list["firstPage"]
+        last = first + chapter_list["maxPages"] - 1
+        imports = ["kotlinx.coroutines.async", "kotlinx.coroutines.awaitAll", "kotlinx.coroutines.coroutineScope",
+                   "kotlinx.coroutines.sync.Semaphore", "kotlinx.coroutines.sync.withPermit"]
+        members = ["// Shared by every getChapterList call, so a source never has more than",
+                   "// this many table of contents requests in flight",
+                   f"private val chapterPages = Semaphore({chapter_list['concurrency']})"]
+        calls = extract_kotlin("firstDoc", chapter_list["lastPage"], number=True)
+        body += [f"val firstDoc = networkClient.get(chapterPageUrl({', '.join(args + [str(first)])})).toDocument()",
+                 f"val lastPage = {calls[0]}"] + [f"    {c}" for c in calls[1:]] + [
+                 f"    ?.coerceIn({first}, {last}) ?: {first}",
+                 "val otherDocs = coroutineScope {",
+                 f"    ({first + 1}..lastPage).map {{ page ->",
+                 "        async {",
+                 "            chapterPages.withPermit {",
+                 f"                networkClient.get(chapterPageUrl({', '.join(args + ['page'])})).toDocument()",
+                 "            }",
+                 "        }",
+                 "    }.awaitAll()",
+                 "}",
+                 "(listOf(firstDoc) + otherDocs).flatMap { doc ->",
+                 f"    doc.{to_chapters}",
+                 "}"]
+
+    functions = [
+        "override suspend fun getChapterList(bookUrl: String): Response<List<ChapterResult>> =",
+        "    tryConnect {",
+        *(f"        {line}" for line in body),
+        "    }",
+        "",
+        f"private fun chapterPageUrl({', '.join(params)}) =",
+        f'    "{kotlin_template(chapter_list["pageUrl"])}"',
+    ]
+    return imports, members, functions
+
+def render(config):
+    class_name = class_name_of(config)
+    source_id = kt(config['id'])
+    base_url = kt(config['baseUrl'])
+    catalog_url = kt(config['catalogUrl'])
     language = config.get('language', 'ENGLISH').upper()
-    selectors = config['selectors']
+    selectors = {key: kt(value) for key, value in {**DEFAULT_SELECTORS, **config['selectors']}.items()}
+    imports, members = "", ""
+    chapter_list = f"""    override suspend fun getChapterList(bookUrl: String): Response<List<ChapterResult>> =
+        tryConnect {{
+            networkClient.get(bookUrl).toDocument()
+                .select("{selectors['chapterItem']}")
+                .map {{ ChapterResult(it.text(), it.attr("abs:href")) }}
+        }}
+"""
+    if 'chapterList' in config:
+        extra_imports, extra_members, functions = chapter_list_kotlin(config['chapterList'], selectors['chapterItem'])
+        imports = "".join(f"import {name}\n" for name in extra_imports)
+        members = "\n" + "".join(f"\n    {line}" for line in extra_members)
+        chapter_list = "".join(f"    {line}\n" if line else "\n" for line in functions)
 
     template = f"""package my.noveldokusha.scraper.sources
 
 import kotlinx.coroutines.Dispatchers
-import kotlinx.coroutines.withContext
+{imports}import kotlinx.coroutines.withContext
 import my.noveldokusha.core.LanguageCode
 import my.noveldokusha.core.PagedList
 import my.noveldokusha.core.Response
@@ -32,31 +244,25 @@ class {class_name}(private val networkClient: NetworkClient) : SourceInterface.C
     override val id = "{source_id}"
     override val baseUrl = "{base_url}"
     override val catalogUrl = "{catalog_url}"
-    override val language = LanguageCode.{language}
+    override val language = LanguageCode.{language}{members}
 
     override suspend fun getChapterTitle(doc: Document): String =
-        doc.selectFirst("{selectors.get('chapterTitle', 'h1')}")?.text() ?: ""
+        doc.selectFirst("{selectors['chapterTitle']}")?.text() ?: ""
 
     override suspend fun getChapterText(doc: Document): String =
-        doc.selectFirst("{selectors.get('chapterText', '.content')}")?.let {{
+        doc.selectFirst("{selectors['chapterText']}")?.let {{
             TextExtractor.get(it)
         }} ?: ""
 
     override suspend fun getBookDescription(bookUrl: String): Response<String?> =
         tryConnect {{
             networkClient.get(bookUrl).toDocument()
-                .selectFirst("{selectors.get('bookDescription', '.description')}")?.let {{
+                .selectFirst("{selectors['bookDescription']}")?.let {{
                     TextExtractor.get(it)
                 }}
         }}
 
-    override suspend fun getChapterList(bookUrl: String): Response<List<ChapterResult>> =
-        tryConnect {{
-            networkClient.get(bookUrl).toDocument()
-                .select("{selectors.get('chapterItem', 'a')}")
-                .map {{ ChapterResult(it.text(), it.attr("abs:href")) }}
-        }}
-
+{chapter_list}
     override suspend fun getCatalogList(index: Int): Response<PagedList<BookResult>> =
         getPagesList(index, if (index == 0) catalogUrl else catalogUrl.replace("{{page}}", (index + 1).toString()))
 
@@ -66,15 +272,15 @@ class {class_name}(private val networkClient: NetworkClient) : SourceInterface.C
     private suspend fun getPagesList(index: Int, url: String): Response<PagedList<BookResult>> =
         tryConnect {{
             val doc = networkClient.get(url).toDocument()
-            val items = doc.select("{selectors.get('bookItem', '.item')}")
+            val items = doc.select("{selectors['bookItem']}")
                 .map {{
                     BookResult(
-                        title = it.selectFirst("{selectors.get('bookItemTitle', 'h3')}")?.text() ?: "",
-                        url = it.selectFirst("{selectors.get('bookItemUrl', 'a')}")?.attr("abs:href") ?: "",
-                        coverImageUrl = it.selectFirst("{selectors.get('bookItemCover', 'img')}")?.attr("abs:src") ?: ""
+                        title = it.selectFirst("{selectors['bookItemTitle']}")?.text() ?: "",
+                        url = it.selectFirst("{selectors['bookItemUrl']}")?.attr("abs:href") ?: "",
+                        coverImageUrl = it.selectFirst("{selectors['bookItemCover']}")?.attr("abs:src") ?: ""
                     )
                 }}
-            PagedList(items, index, doc.selectFirst("{selectors.get('nextPage', '.next')}") == null)
+            PagedList(items, index, doc.selectFirst("{selectors['nextPage']}") == null)
         }}
 
     private suspend fun <T> tryConnect(block: suspend () -> T): Response<T> {{
@@ -86,13 +292,177 @@ class {class_name}(private val networkClient: NetworkClient) : SourceInterface.C
     }}
 }}
 """
-    output_path = f"scraper/src/main/java/my/noveldokusha/scraper/sources/{class_name}.kt"
-    with open(output_path, 'w') as f:
-        f.write(template)
-    print(f"Generated {output_path}")
+    return class_name, template
+
+def digest_of(data):
+    return hashlib.sha256(data).hexdigest()
+
+def find_configs(paths):
+    configs = []
+    for path in paths:
+        if os.path.isdir(path):
+            configs += sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".json"))
+        else:
+            configs.append(path)
+    return configs
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data["configs"] if data.get("generator") == GENERATOR else {}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+def save_manifest(path, configs):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({"generator": GENERATOR, "configs": configs}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def is_fresh(entry, stat, out_dir):
+    if not entry or entry["config_mtime"] != stat.st_mtime_ns or entry["config_size"] != stat.st_size:
+        return False
+    try:
+        output = os.stat(os.path.join(out_dir, entry["output"]))
+    except OSError:
+        return False
+    return output.st_mtime_ns == entry["output_mtime"] and output.st_size == entry["output_size"]
+
+def prepare(config_path, entry, out_dir, force, verify=None):
+    """Render one config unless the manifest proves its output is current."""
+    stat = os.stat(config_path)
+    # Selectors are checked against the current recordings even when the output is current
+    if not force and not verify and is_fresh(entry, stat, out_dir):
+        return {"path": config_path, "status": "fresh", "entry": entry}
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        return {"path": config_path, "status": "invalid", "errors": [str(e)]}
+    errors = validate(config)
+    if errors:
+        return {"path": config_path, "status": "invalid", "errors": errors}
+    report = verify(config) if verify else None
+    if report and report["errors"]:
+        return {"path": config_path, "status": "invalid", "errors": report["errors"], "verify": report}
+    class_name, text = render(config)
+    data = text.encode('utf-8')
+    output = f"{class_name}.kt"
+    try:
+        with open(os.path.join(out_dir, output), 'rb') as f:
+            current = digest_of(f.read())
+    except OSError:
+        current = None
+    digest = digest_of(data)
+    return {"path": config_path, "status": "unchanged" if current == digest else "changed", "data": data, "verify": report,
+            "entry": {"id": config["id"], "output": output, "digest": digest,
+                      "config_mtime": stat.st_mtime_ns, "config_size": stat.st_size}}
+
+def write_output(result, out_dir):
+    path = os.path.join(out_dir, result["entry"]["output"])
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(result["data"])
+    os.replace(tmp, path)
+
+def duplicate_errors(results):
+    # Two configs generating the same class or id would overwrite or shadow each other
+    errors = []
+    for field in ("output", "id"):
+        owners = {}
+        for result in results:
+            if result["status"] != "invalid":
+                owners.setdefault(result["entry"][field], []).append(result["path"])
+        for value, paths in owners.items():
+            if len(paths) > 1:
+                errors.append(f"{field} {value!r} is generated by {', '.join(paths)}")
+    return errors
+
+def print_verification(result):
+    report = result["verify"]
+    pages = ", ".join(f"{page} {p['parse_ms']:.1f} ms" for page, p in report["pages"].items())
+    print(f"🔎 {result['path']} [{report['backend']}: parsed {pages or 'nothing'}]")
+    for name, found in report["selectors"].items():
+        of = f"/{found['of']}" if "of" in found else ""
+        print(f"   {name:<16}{found['matches']:>5}{of:<5} {found['ms']:>8.3f} ms  {found['selector']}")
+    for warning in report["warnings"]:
+        print(f"   ⚠️  {warning}")
+
+def convert(paths, out_dir=SOURCES_DIR, manifest_path=MANIFEST_PATH, jobs=8, force=False, check=False, verify=None):
+    """verify, when given, maps a config to a fixture_check.verify_selectors report; errors make it invalid."""
+    start = time.perf_counter()
+    manifest = load_manifest(manifest_path)
+    configs = find_configs(paths)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(lambda p: prepare(p, manifest.get(os.path.realpath(p)), out_dir, force, verify), configs))
+    for result in results:
+        if result.get("verify"):
+            print_verification(result)
+
+    invalid = [r for r in results if r["status"] == "invalid"]
+    for result in invalid:
+        print(f"❌ {result['path']}")
+        for error in result["errors"]:
+            print(f"   - {error}")
+    duplicates = duplicate_errors(results)
+    for error in duplicates:
+        print(f"❌ {error}")
+    if duplicates:
+        return False
+
+    changed = [r for r in results if r["status"] == "changed"]
+    if check:
+        for result in changed:
+            print(f"✏️  Out of date: {os.path.join(out_dir, result['entry']['output'])}")
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(lambda r: write_output(r, out_dir), changed))
+        for result in changed:
+            print(f"Generated {os.path.join(out_dir, result['entry']['output'])}")
+        for result in results:
+            if result["status"] in ("changed", "unchanged"):
+                output = os.stat(os.path.join(out_dir, result["entry"]["output"]))
+                manifest[os.path.realpath(result["path"])] = dict(
+                    result["entry"], output_mtime=output.st_mtime_ns, output_size=output.st_size)
+        save_manifest(manifest_path, {k: v for k, v in manifest.items() if os.path.exists(k)})
+
+    counts = {s: sum(r["status"] == s for r in results) for s in ("changed", "unchanged", "fresh", "invalid")}
+    print(f"⏱️  {len(results)} configs: {counts['changed']} {'out of date' if check else 'written'}, "
+          f"{counts['unchanged'] + counts['fresh']} unchanged ({counts['fresh']} from manifest), "
+          f"{counts['invalid']} invalid in {time.perf_counter() - start:.3f}s")
+    return not invalid and not (check and changed)
+
+def json_to_kotlin(json_path):
+    return convert([json_path])
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Kotlin catalog sources from healer JSON configs.")
+    parser.add_argument("paths", nargs="+", metavar="config", help="JSON config files or directories of them")
+    parser.add_argument("--out-dir", default=SOURCES_DIR)
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--force", action="store_true", help="render every config again (files are still only written if they changed)")
+    parser.add_argument("--check", action="store_true", help="validate and list out-of-date sources without writing; exit 1 if any")
+    parser.add_argument("--verify", action="store_true",
+                        help="run every selector against the configs' recorded sample pages first; failures count as invalid")
+    parser.add_argument("--fixtures", help="fixture archive (.jsonl.gz) with the sample pages, for --verify")
+    parser.add_argument("--http-cache", help="scraper HTTP cache to read sample pages from, for --verify "
+                                             "(default: ~/.cache/noveldokusha-scraper/http)")
+    parser.add_argument("--parser", help="HTML parsing backend for --verify (default: lxml when installed)")
     if len(sys.argv) < 2:
-        print("Usage: python3 convert_source.py <path_to_json>")
-    else:
-        json_to_kotlin(sys.argv[1])
+        print("Usage: python3 convert_source.py <path_to_json | config_dir> [...]")
+        sys.exit(0)
+    args = parser.parse_args()
+    verify = None
+    if args.verify:
+        # Only --verify needs the parsers and the scraper-scientist modules
+        import fixture_check
+        if args.parser and args.parser not in fixture_check.parsing.BACKENDS:
+            parser.error(f"--parser must be one of {', '.join(fixture_check.parsing.BACKENDS)}")
+        pages = fixture_check.SamplePages(args.fixtures, args.http_cache or fixture_check.HTTP_CACHE_DIR)
+        verify = lambda config: fixture_check.verify_selectors(config, pages, args.parser)
+    ok = convert(args.paths, args.out_dir, args.manifest, args.jobs, args.force, args.check, verify)
+    sys.exit(0 if ok else 1)
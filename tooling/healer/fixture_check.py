@@ -0,0 +1,235 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+import base64
+import argparse
+from urllib.parse import urljoin
+
+from convert_source import CHAPTER_LIST_DEFAULTS, DEFAULT_SELECTORS, find_configs, validate
+
+# Fixture archives and parsing backends live with the scraper-scientist scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                                "gemini-cli", "skills", "scraper-scientist", "scripts"))
+import parsing
+from fixtures import FixtureArchive
+from http_cache import CACHE_DIR as HTTP_CACHE_DIR, HttpCache
+
+# Usage: python3 fixture_check.py <config.json | config_dir> [...] [--fixtures archive.jsonl.gz] [--parser lxml]
+# Checks configs against recorded pages instead of the network, so a broken
+# selector or pageUrl shows up in seconds rather than after an Android build:
+#  - every selector is run on the samples.chapter/book/catalog page it applies
+#    to, with its match count and extraction time
+#  - the chapter list is walked the way the generated getChapterList does
+#    (novel id, first page, last page, remaining pages)
+# Pages come from a fixture archive (scraper-scientist's --record) and then from
+# the scraper HTTP cache, stale entries included.
+
+# Selectors run on each sample page. chapterItem moves to the chapter list walk
+# when the config has a chapterList.
+PAGE_SELECTORS = {
+    "chapter": ("chapterTitle", "chapterText"),
+    "book": ("bookDescription", "chapterItem"),
+    "catalog": ("bookItem", "nextPage"),
+}
+BOOK_ITEM_SELECTORS = ("bookItemTitle", "bookItemUrl", "bookItemCover")
+# Fine to match nothing: books without a description, the last catalog page, missing covers
+OPTIONAL_SELECTORS = {"bookDescription", "nextPage", "bookItemCover"}
+
+class SamplePages:
+    def __init__(self, archive=None, cache_dir=None):
+        self.archive = FixtureArchive.load(archive) if archive else None
+        self.cache = HttpCache(cache_dir) if cache_dir and os.path.isdir(cache_dir) else None
+
+    def get(self, url):
+        """Recorded body for url, or None."""
+        record = self.archive.get("GET", url) if self.archive else None
+        if record is not None:
+            return base64.b64decode(record["body"])
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry is not None:
+            with open(self.cache.blob_path(entry["body"]), 'rb') as f:
+                return f.read()
+        return None
+
+def extract(doc, rule, number=False):
+    # Mirrors extract_kotlin: first match, attribute or text, last match of the pattern
+    element = doc.select_one(rule["selector"])
+    value = None if element is None else element.attr(rule["attr"]) if "attr" in rule else element.text()
+    pattern = rule.get("pattern", r"\d+" if number else None)
+    if value is not None and pattern:
+        matches = list(re.finditer(pattern, value))
+        value = (matches[-1].group(len(matches[-1].groups())) or "") if matches else None
+    if number:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    return value
+
+def page_url(template, config, book_url, novel_id=None, page=None):
+    values = {"baseUrl": config["baseUrl"], "bookUrl": book_url, "novelId": novel_id, "page": page}
+    return re.sub(r'\{(baseUrl|bookUrl|novelId|page)\}', lambda m: str(values[m.group(1)]), template)
+
+def check_chapter_list(config, pages, backend):
+    chapter_list = {**CHAPTER_LIST_DEFAULTS, **config.get("chapterList", {})}
+    chapter_item = config["selectors"].get("chapterItem", DEFAULT_SELECTORS["chapterItem"])
+    book_url = config.get("samples", {}).get("book")
+    report = {"id": config["id"], "book": book_url, "missing": [], "errors": []}
+    if not book_url:
+        report["errors"].append("no 'samples.book' to start from")
+        return report
+
+    def fetch(url):
+        body = pages.get(url)
+        if body is None:
+            report["missing"].append(url)
+            return None
+        return parsing.parse(body, backend)
+
+    requests_made, waves = 0, 0
+    novel_id = None
+    if "novelId" in chapter_list:
+        book = fetch(book_url)
+        requests_made, waves = 1, 1
+        novel_id = book and extract(book, chapter_list["novelId"])
+        if not novel_id:
+            report["errors"].append(f"novel id not found on {book_url}")
+            return report
+
+    first = chapter_list["firstPage"]
+    last = first
+    urls = [page_url(chapter_list["pageUrl"], config, book_url, novel_id, first if "lastPage" in chapter_list else None)]
+    docs = [fetch(urls[0])]
+    if "lastPage" in chapter_list:
+        found = docs[0] and extract(docs[0], chapter_list["lastPage"], number=True)
+        last = min(max(found, first), first + chapter_list["maxPages"] - 1) if found is not None else first
+        report["last_page"] = last
+        urls += [page_url(chapter_list["pageUrl"], config, book_url, novel_id, page) for page in range(first + 1, last + 1)]
+        docs += [fetch(url) for url in urls[1:]]
+    requests_made += len(urls)
+    waves += 1 + math.ceil((len(urls) - 1) / chapter_list["concurrency"])
+
+    chapters = [(item.text(), urljoin(url, item.attr("href") or ""))
+                for url, doc in zip(urls, docs) if doc is not None
+                for item in doc.select(chapter_item)]
+    seen = set()
+    duplicates = [href for _, href in chapters if href in seen or seen.add(href)]
+    if not chapters:
+        report["errors"].append(f"'{chapter_item}' matched no chapters")
+    report.update({
+        "pages": len(urls),
+        "chapters": len(chapters),
+        "duplicate_chapters": len(duplicates),
+        "first_chapter": chapters[0][0] if chapters else None,
+        "last_chapter": chapters[-1][0] if chapters else None,
+        # Round trips when pages after the first are fetched `concurrency` at a time
+        "sequential_requests": requests_made,
+        "request_waves": waves,
+    })
+    return report
+
+def timed(select, selector):
+    start = time.perf_counter()
+    found = select(selector)
+    return found, round((time.perf_counter() - start) * 1000, 3)
+
+def verify_selectors(config, pages, backend=None):
+    """Match count and extraction time of every selector on its sample page."""
+    backend = backend or parsing.default_backend()
+    selectors = {**DEFAULT_SELECTORS, **config["selectors"]}
+    samples = {"catalog": config["catalogUrl"], **config.get("samples", {})}
+    report = {"id": config["id"], "backend": backend, "pages": {}, "selectors": {}, "errors": [], "warnings": []}
+
+    def record(name, matches, ms, page, **extra):
+        report["selectors"][name] = {"selector": selectors[name], "page": page, "matches": matches, "ms": ms, **extra}
+        if matches == 0:
+            (report["warnings"] if name in OPTIONAL_SELECTORS else report["errors"]).append(
+                f"'{name}' ({selectors[name]}) matched nothing on the {page} page")
+
+    for name, selector in selectors.items():
+        try:
+            parsing.compile_selector(selector, backend)
+        except Exception as e:
+            report["errors"].append(f"'{name}' is not a valid selector ({selector}): {e}")
+    if report["errors"]:
+        return report
+
+    for page, names in PAGE_SELECTORS.items():
+        if page == "book" and "chapterList" in config:
+            names = ("bookDescription",)
+        url = samples.get(page)
+        body = pages.get(url) if url else None
+        if body is None:
+            report["warnings"].append(f"no recorded {page} page ({url or f'set samples.{page}'}), "
+                                      f"{', '.join(names)} not verified")
+            continue
+        start = time.perf_counter()
+        doc = parsing.parse(body, backend)
+        report["pages"][page] = {"url": url, "bytes": len(body), "parse_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+        for name in names:
+            if name == "chapterText":
+                # What getChapterText reads is the first match, an empty one is no better than none
+                element, ms = timed(doc.select_one, selectors[name])
+                chars = len(element.text()) if element is not None else 0
+                record(name, int(chars > 0), ms, page, chars=chars)
+            elif name in ("chapterTitle", "bookDescription"):
+                element, ms = timed(doc.select_one, selectors[name])
+                record(name, int(element is not None), ms, page)
+            else:
+                elements, ms = timed(doc.select, selectors[name])
+                record(name, len(elements), ms, page)
+            if name == "bookItem":
+                # Counted per item, the way getPagesList reads them
+                for child in BOOK_ITEM_SELECTORS:
+                    start = time.perf_counter()
+                    matches = sum(item_doc.select_one(selectors[child]) is not None
+                                  for item_doc in (parsing.Document(e.node, backend) for e in elements))
+                    ms = round((time.perf_counter() - start) * 1000, 3)
+                    record(child, matches, ms, page, of=len(elements))
+                    if 0 < matches < len(elements):
+                        report["warnings"].append(f"'{child}' ({selectors[child]}) matched only {matches} "
+                                                  f"of {len(elements)} book items")
+
+    if "chapterList" in config and samples.get("book"):
+        start = time.perf_counter()
+        walk = check_chapter_list(config, pages, backend)
+        ms = round((time.perf_counter() - start) * 1000, 3)
+        report["chapter_list"] = walk
+        report["errors"] += walk["errors"] + [f"no recorded chapter list page {url}" for url in walk["missing"]]
+        if not walk["errors"]:
+            record("chapterItem", walk["chapters"], ms, "chapter list")
+    if not report["pages"]:
+        report["errors"].append("no sample page is recorded, nothing was verified")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Check healer configs' chapter lists against recorded fixtures.")
+    parser.add_argument("paths", nargs="+", help="JSON configs or directories of them")
+    add_arguments(parser)
+    parsing.add_arguments(parser)
+    args = parser.parse_args()
+
+    pages = SamplePages(args.fixtures, args.http_cache)
+    failed = False
+    for path in find_configs(args.paths):
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        errors = validate(config)
+        report = {"path": path, "errors": errors} if errors else {"path": path, **verify_selectors(config, pages, args.parser)}
+        ok = not report["errors"]
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {path}")
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    sys.exit(1 if failed else 0)
+
+def add_arguments(parser):
+    parser.add_argument("--fixtures", help="fixture archive (.jsonl.gz) with the sample pages")
+    parser.add_argument("--http-cache", default=HTTP_CACHE_DIR,
+                        help="scraper HTTP cache to take pages from when the archive lacks them")
+
+if __name__ == "__main__":
+    main()